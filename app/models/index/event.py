@@ -1,10 +1,21 @@
-from app.models.persistence.base import BaseModel
+from app.models.persistence.base import BaseMeta, BaseModel
+from app.models.persistence.mixins.version import VersionMixin
 from pynamodb.attributes import JSONAttribute, UnicodeAttribute
 
 
-class EventIndexModel(BaseModel):
-    class Meta:
+# The read model of an event page, maintained from the change streams by app.models.index.indexer.Indexer.
+# foreign_data holds the event under 'event', in plain JSON, see app.models.index.stream.plain_image.
+class EventIndexModel(VersionMixin, BaseModel):
+    class Meta(BaseMeta):
         table_name = 'event_index'
 
-    event_id = UnicodeAttribute()
+    event_id = UnicodeAttribute(hash_key=True)
     foreign_data = JSONAttribute()
+
+    # The page data of an event with one GetItem, or None when the event is not indexed.
+    @classmethod
+    def page(cls, event_id, consistent_read=False):
+        try:
+            return cls.get(event_id, consistent_read=consistent_read).foreign_data
+        except cls.DoesNotExist:
+            return None
@@ -0,0 +1,128 @@
+from copy import deepcopy
+from app.models.index.event import EventIndexModel
+from app.models.index.kennel import KennelIndexModel
+from app.models.index.stream import plain_image, plain_value, table_name_of
+from app.models.persistence import VersionConflict
+from app.models.persistence.base import BaseModel
+from app.models.persistence.event import EventDataModel, KennelEventDataModel
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from pynamodb.constants import ITEM
+from pynamodb.exceptions import PutError
+
+
+# Maintains the event and kennel read models, see EventIndexModel and KennelIndexModel, from the change records of
+# the events, kennels, kennel_events and kennel_members tables.  Each record is applied to the index row it belongs
+# to with a read, modify and compare-and-swap write, retried when another indexer wrote the row in between, so
+# records of different shards can be processed concurrently.  Applying a record is idempotent, a record delivered
+# twice leaves the row as it was.  Records of other tables are ignored.
+class Indexer(object):
+    MAX_RETRIES = 8
+
+    def __init__(self):
+        self.handlers = {
+            EventDataModel.Meta.table_name: self.event_changed,
+            KennelDataModel.Meta.table_name: self.kennel_changed,
+            KennelEventDataModel.Meta.table_name: self.kennel_event_changed,
+            KennelMemberDataModel.Meta.table_name: self.kennel_member_changed,
+        }
+        self.model_classes = {
+            EventDataModel.Meta.table_name: EventDataModel,
+            KennelDataModel.Meta.table_name: KennelDataModel,
+            KennelEventDataModel.Meta.table_name: KennelEventDataModel,
+            KennelMemberDataModel.Meta.table_name: KennelMemberDataModel,
+        }
+
+    # Applies the records in order and returns how many were applied.
+    def process(self, records):
+        return sum(1 for record in records if self.process_record(record))
+
+    def process_record(self, record):
+        table_name = table_name_of(record)
+        handler = self.handlers.get(table_name)
+        if handler is None:
+            return False
+        change = record['dynamodb']
+        keys = plain_image(change['Keys'])
+        image = None
+        if record['eventName'] != 'REMOVE':
+            image = self.new_image(self.model_classes[table_name], change)
+        handler(keys, image)
+        return True
+
+    # The plain new image of a record, read from the table when the stream view carries no image.  None when the item
+    # no longer exists, a later REMOVE record follows.
+    @staticmethod
+    def new_image(model_class, change):
+        if 'NewImage' in change:
+            return plain_image(change['NewImage'])
+        meta_data = model_class._get_meta_data()
+        keys = change['Keys']
+        range_key = None
+        if meta_data.range_keyname is not None:
+            range_key = plain_value(keys[meta_data.range_keyname])
+        data = model_class._get_connection().get_item(plain_value(keys[meta_data.hash_keyname]), range_key=range_key,
+                                                      consistent_read=True)
+        item = data.get(ITEM)
+        return None if item is None else plain_image(item)
+
+    def event_changed(self, keys, image):
+        if image is None:
+            self.remove_row(EventIndexModel, keys['event_id'])
+        else:
+            self.apply(EventIndexModel, keys['event_id'], lambda data: data.__setitem__('event', image))
+
+    def kennel_changed(self, keys, image):
+        if image is None:
+            self.remove_row(KennelIndexModel, keys['kennel_id'])
+        else:
+            self.apply(KennelIndexModel, keys['kennel_id'], lambda data: data.__setitem__('kennel', image))
+
+    def kennel_event_changed(self, keys, image):
+        start_time = keys['start_time']
+        if image is None:
+            self.apply(KennelIndexModel, keys['kennel_id'],
+                       lambda data: data.setdefault('events', dict()).pop(start_time, None), create=False)
+        else:
+            self.apply(KennelIndexModel, keys['kennel_id'],
+                       lambda data: data.setdefault('events', dict()).__setitem__(start_time, image['event_ref']))
+
+    def kennel_member_changed(self, keys, image):
+        hasher_id = keys['hasher_id']
+        if image is None:
+            self.apply(KennelIndexModel, keys['kennel_id'],
+                       lambda data: data.setdefault('members', dict()).pop(hasher_id, None), create=False)
+        else:
+            self.apply(KennelIndexModel, keys['kennel_id'],
+                       lambda data: data.setdefault('members', dict()).__setitem__(hasher_id, image['hasher_ref']))
+
+    # Applies modify to the foreign data of an index row and writes the row if that changed it.  A row that does not
+    # exist is created, unless create is False.
+    def apply(self, index_class, hash_key, modify, create=True):
+        for _ in range(self.MAX_RETRIES + 1):
+            try:
+                row = index_class.get(hash_key, consistent_read=True)
+                foreign_data = deepcopy(row.foreign_data)
+            except index_class.DoesNotExist:
+                if not create:
+                    return None
+                row = index_class(hash_key, foreign_data=dict())
+                foreign_data = dict()
+            modify(row.foreign_data)
+            if row.persisted and row.foreign_data == foreign_data:
+                return row
+            try:
+                if row.persisted:
+                    row.save()
+                else:
+                    row.save(condition=index_class._hash_key_attribute().does_not_exist())
+                return row
+            except VersionConflict:
+                continue
+            except PutError as e:
+                if BaseModel._error_code(e) != 'ConditionalCheckFailedException':
+                    raise
+        raise VersionConflict(f'{index_class.Meta.table_name} record {hash_key} kept changing while indexing')
+
+    @staticmethod
+    def remove_row(index_class, hash_key):
+        index_class(hash_key).delete()
@@ -1,10 +1,23 @@
-from app.models.persistence.base import BaseModel
+from app.models.persistence.base import BaseMeta, BaseModel
+from app.models.persistence.mixins.version import VersionMixin
 from pynamodb.attributes import JSONAttribute, UnicodeAttribute
 
 
-class KennelIndexModel(BaseModel):
-    class Meta:
+# The read model of a kennel page, maintained from the change streams by app.models.index.indexer.Indexer.
+# foreign_data holds the kennel under 'kennel', the hasher references of its members by hasher id under 'members' and
+# the event references of its events by start time under 'events', in plain JSON, see
+# app.models.index.stream.plain_image.
+class KennelIndexModel(VersionMixin, BaseModel):
+    class Meta(BaseMeta):
         table_name = 'kennel_index'
 
-    kennel_id = UnicodeAttribute()
+    kennel_id = UnicodeAttribute(hash_key=True)
     foreign_data = JSONAttribute()
+
+    # The page data of a kennel with one GetItem, or None when the kennel is not indexed.
+    @classmethod
+    def page(cls, kennel_id, consistent_read=False):
+        try:
+            return cls.get(kennel_id, consistent_read=consistent_read).foreign_data
+        except cls.DoesNotExist:
+            return None
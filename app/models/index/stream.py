@@ -0,0 +1,88 @@
+from collections import deque
+import itertools
+import threading
+from app.models.persistence import base
+
+# Change records in the DynamoDB Streams format, e.g.
+# {'eventName': 'MODIFY', 'eventSourceARN': 'arn:aws:dynamodb:us-east-1:000000000000:table/kennels/stream/local',
+#  'dynamodb': {'Keys': {'kennel_id': {'S': '...'}}, 'NewImage': {...}, 'SequenceNumber': '1'}}
+LOCAL_STREAM_ARN = 'arn:aws:dynamodb:local:000000000000:table/{table_name}/stream/local'
+
+
+def table_name_of(record):
+    return record['eventSourceARN'].split(':table/', 1)[1].split('/', 1)[0]
+
+
+def change_record(event_name, table_name, keys, new_image=None, sequence_number=None):
+    change = {'Keys': keys}
+    if new_image is not None:
+        change['NewImage'] = new_image
+    if sequence_number is not None:
+        change['SequenceNumber'] = str(sequence_number)
+    return {'eventName': event_name, 'eventSource': 'aws:dynamodb',
+            'eventSourceARN': LOCAL_STREAM_ARN.format(table_name=table_name), 'dynamodb': change}
+
+
+# Converts an attribute value, e.g. {'M': {'name': {'S': 'Test'}}}, to plain JSON.  Dates stay in their serialized
+# string form and integral numbers become ints.
+def plain_value(value):
+    ((value_type, data),) = value.items()
+    if value_type == 'M':
+        return plain_image(data)
+    if value_type == 'L':
+        return [plain_value(item) for item in data]
+    if value_type == 'N':
+        return _number(data)
+    if value_type == 'NS':
+        return sorted(_number(item) for item in data)
+    if value_type == 'SS':
+        return sorted(data)
+    if value_type == 'NULL':
+        return None
+    return data
+
+
+def plain_image(image):
+    return {name: plain_value(value) for (name, value) in image.items()}
+
+
+def _number(data):
+    try:
+        return int(data)
+    except ValueError:
+        return float(data)
+
+
+# An in-process stand-in for DynamoDB Streams.  Once attached it records every write made through the persistence
+# models as a change record, in the order the writes completed, and #read hands them to a consumer the way a shard
+# iterator would.  Records of transactional updates carry no NewImage, consumers read the item instead.
+class LocalChangeStream(object):
+    def __init__(self):
+        self.records = deque()
+        self.sequence = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self.attach()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.detach()
+
+    def __call__(self, event_name, model_class, keys, new_image):
+        with self.lock:
+            self.records.append(change_record(event_name, model_class.Meta.table_name, keys, new_image,
+                                              next(self.sequence)))
+
+    def attach(self):
+        if self not in base.change_listeners:
+            base.change_listeners.append(self)
+        return self
+
+    def detach(self):
+        if self in base.change_listeners:
+            base.change_listeners.remove(self)
+
+    def read(self, max_records=None):
+        with self.lock:
+            count = len(self.records) if max_records is None else min(max_records, len(self.records))
+            return [self.records.popleft() for _ in range(count)]
@@ -1,7 +1,12 @@
 from copy import copy
+import random
+import time
+from app.models.persistence import aio, VersionConflict
 
 
 class LogicBase(object):
+    CONFLICT_BASE_BACKOFF_MS = 25
+    __persistence_model__ = None
     __unpersistable_attributes__ = ['persistence_object', '_unpersistable_attributes_']
 
     def __init__(self):
@@ -12,6 +17,13 @@ class LogicBase(object):
     def persistable_attributes(self):
         return {k: v for (k, v) in self.__dict__.items() if k not in self._unpersistable_attributes_}
 
+    # References read back from an untyped ListAttribute are plain dicts rather than MapAttributes.
+    @staticmethod
+    def reference_value(reference, key):
+        if isinstance(reference, dict):
+            return reference[key]
+        return getattr(reference, key)
+
     def reload_from_persistence(self):
         if self.persistence_object is None:
             raise ValueError('Persistence object not successfully created or set.')
@@ -19,10 +31,68 @@ class LogicBase(object):
             if hasattr(self, k):
                 setattr(self, k, v)
 
-    def save(self):
-        self.persistence_object.save()
+    # Persistable attributes whose value differs from the persistence object.  Values are compared in their
+    # serialized form, so a reference held as a dict matches the same reference held as a MapAttribute.  Key
+    # attributes are never changed by a save.  Assign new values rather than mutating loaded ones in place, a mutated
+    # value is shared with the persistence object and is not seen as a change.
+    def changed_attributes(self):
+        persistence_object = self.persistence_object
+        fields = persistence_object.get_attributes()
+        changes = dict()
+        for (k, v) in self.persistable_attributes().items():
+            field = fields.get(k)
+            if field is None or field.is_hash_key or field.is_range_key:
+                continue
+            if self._differs(field, v, getattr(persistence_object, k)):
+                changes[k] = v
+        return changes
+
+    @staticmethod
+    def _differs(field, value, current):
+        if value is None or current is None:
+            return value is not current
+        return field.serialize(value) != field.serialize(current)
+
+    # A new record is written whole.  A persisted record is written with one UpdateItem of just its changed
+    # attributes, or not at all when nothing changed, so the uniqueness check only runs when the name changes.
+    # With retries, a version conflict re-reads the record and writes the same changes on top of it, after a jittered
+    # exponential backoff.  Changed attributes win over the concurrent write, the attributes it changed are kept.
+    def save(self, retries=0):
+        changes = self.changed_attributes()
+        if not self.persistence_object.persisted:
+            self.apply_changes(changes)
+            self.persistence_object.save()
+        elif changes:
+            self.update_with_retries(changes, retries)
         self.reload_from_persistence()
 
+    async def async_save(self, retries=0):
+        await aio.run_blocking(self.save, retries=retries)
+
+    def update_with_retries(self, changes, retries=0):
+        attempt = 0
+        while True:
+            try:
+                return self.persistence_object.update_changes(changes)
+            except VersionConflict:
+                if attempt == retries:
+                    raise
+            time.sleep(random.uniform(0, self.CONFLICT_BASE_BACKOFF_MS * (2 ** attempt)) / 1000.0)
+            attempt += 1
+            self.persistence_object.refresh(consistent_read=True)
+
+    def save_in_transaction(self, transaction):
+        changes = self.changed_attributes()
+        if not self.persistence_object.persisted:
+            self.apply_changes(changes)
+            self.persistence_object.save_in_transaction(transaction)
+        elif changes:
+            self.persistence_object.update_changes_in_transaction(transaction, changes)
+
+    def apply_changes(self, changes):
+        for (k, v) in changes.items():
+            setattr(self.persistence_object, k, v)
+
     def unpersist_values(self, klazz):
         values = copy(klazz.__unpersistable_attributes__)
         try:
@@ -0,0 +1,117 @@
+from ulid import ulid
+from app.models.logic.base import LogicBase
+from app.models.persistence.lazy import LazyClass
+
+EventDataModel = LazyClass('app.models.persistence.event', 'EventDataModel')
+EventLocationDataModel = LazyClass('app.models.persistence.location', 'EventLocationDataModel')
+HareEventDataModel = LazyClass('app.models.persistence.event', 'HareEventDataModel')
+KennelDataModel = LazyClass('app.models.persistence.kennel', 'KennelDataModel')
+KennelEventDataModel = LazyClass('app.models.persistence.event', 'KennelEventDataModel')
+TransactWrite = LazyClass('app.models.persistence.transaction', 'TransactWrite')
+
+
+class EventLogicModel(LogicBase):
+    __persistence_model__ = EventDataModel
+    __unpersistable_attributes__ = ['location']
+
+    def __init__(self, name, start_time, kennels, hares, start_location, event_id=None, description=None,
+                 type=None, end_time=None, trails=None, location=None, persistence_object=None):
+        super().__init__()
+        self.unpersist_values(__class__)
+        self.event_id = ulid() if event_id is None else event_id
+        self.name = name
+        self.description = description
+        self.start_time = start_time
+        self.end_time = end_time
+        self.kennels = [self.map_reference(kennel) for kennel in kennels]
+        self.hares = [self.map_reference(hare) for hare in hares]
+        self.start_location = start_location
+        self.type = type
+        self.trails = trails
+        self.location = None if location is None else self.map_reference(location)
+        if persistence_object is None:
+            self.persistence_object = EventDataModel(**self.persistable_attributes())
+        else:
+            self.persistence_object = persistence_object
+
+    @classmethod
+    def create(cls, name, start_time, kennels, hares, start_location, event_id=None, description=None, type=None,
+               end_time=None, trails=None, location=None, persistence_object=None):
+        event = EventLogicModel(name, start_time, kennels, hares, start_location, event_id=event_id,
+                                description=description, type=type, end_time=end_time, trails=trails,
+                                location=location, persistence_object=persistence_object)
+        event.save_with_fan_out()
+        return event
+
+    @classmethod
+    def lookup_by_id(cls, event_id, start_time):
+        result = EventDataModel.get(event_id, start_time)
+        attribute_dict = result.attributes()
+        attribute_dict['persistence_object'] = result
+        return EventLogicModel(**attribute_dict)
+
+    # Events within radius_km of the point as (distance in km, event reference) pairs, nearest first, optionally only
+    # those starting between start and end.
+    @classmethod
+    def events_near(cls, latitude, longitude, radius_km, start=None, end=None, limit=None):
+        results = EventLocationDataModel.events_near(latitude, longitude, radius_km, start=start, end=end, limit=limit)
+        return [(distance, record.event_ref) for (distance, record) in results]
+
+    # Every record that denormalizes the event is built from a single reference of the event record.
+    def fan_out_records(self):
+        event_ref = self.persistence_object.to_ref()
+        records = [KennelEventDataModel(self.reference_value(kennel, 'kennel_id'), self.start_time,
+                                        event_id=self.event_id, event_ref=event_ref) for kennel in self.kennels]
+        records.extend([HareEventDataModel(self.reference_value(hare, 'hasher_id'), self.start_time,
+                                           event_id=self.event_id, event_ref=event_ref) for hare in self.hares])
+        if self.location is not None:
+            records.append(EventLocationDataModel(self.location.geohash, self.start_time, location_ref=self.location,
+                                                  event_ref=event_ref))
+        return records
+
+    # The event, the trail number increments and the fan out records are committed in one TransactWriteItems call
+    # when they fit.  When an event has too many hares or kennels for one transaction, the event and the trail number
+    # increments are still committed together and the fan out records follow in chunked BatchWriteItem calls.
+    def save_with_fan_out(self):
+        records = self.fan_out_records()
+        for record in records:
+            record.run_before_save_hooks()
+        kennel_ids = [self.reference_value(kennel, 'kennel_id') for kennel in self.kennels]
+        if 1 + len(kennel_ids) > TransactWrite.MAX_OPERATIONS:
+            raise ValueError(f'An event cannot have more than {TransactWrite.MAX_OPERATIONS - 1} kennels')
+        fits_in_transaction = 1 + len(kennel_ids) + len(records) <= TransactWrite.MAX_OPERATIONS
+        with TransactWrite() as transaction:
+            self.persistence_object.save_in_transaction(transaction,
+                                                        condition=EventDataModel.event_id.does_not_exist())
+            for kennel_id in kennel_ids:
+                transaction.update_by_key(KennelDataModel, kennel_id, KennelDataModel.trail_number_actions(),
+                                          condition=KennelDataModel.kennel_id.exists())
+            if fits_in_transaction:
+                for record in records:
+                    transaction.save(record)
+        if not fits_in_transaction:
+            self.batch_save(records)
+        self.reload_from_persistence()
+
+    # BatchWriteItem bypasses BaseModel#save, so the changes are published once each model's batch is written, as a
+    # save would publish them.
+    @staticmethod
+    def batch_save(records):
+        by_model = dict()
+        for record in records:
+            by_model.setdefault(record.__class__, list()).append(record)
+        for (model, model_records) in by_model.items():
+            with model.batch_write() as batch:
+                for record in model_records:
+                    batch.save(record)
+            for record in model_records:
+                record.publish_change('MODIFY' if record.persisted else 'INSERT')
+                record.persisted = True
+
+    @staticmethod
+    def map_reference(thing):
+        if hasattr(thing, 'persistence_object'):
+            return thing.persistence_object.to_ref()
+        if hasattr(thing, 'to_ref'):
+            return thing.to_ref()
+        return thing
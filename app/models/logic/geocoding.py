@@ -0,0 +1,179 @@
+from collections import OrderedDict
+import re
+import sqlite3
+import threading
+import time
+from app.models.persistence import geo
+from app.models.persistence.coalescing import SingleFlight
+
+
+# Geocoding for locations.  Addresses are resolved to (latitude, longitude) pairs by a provider, the results are
+# cached by normalized address in a memory LRU in front of an optional on-disk store, so an address is only sent to the
+# provider once.  Concurrent lookups of the same address share one provider call, see SingleFlight.  A provider is any
+# object with geocode(address) and geocode_many(addresses) methods, returning None for addresses it cannot resolve and
+# raising GeocodingFailed when it could not answer, e.g. a timeout, an exhausted quota or a server error.  Only a real
+# "no match" is cached, for NEGATIVE_TTL seconds so an address that becomes known is eventually resolved.
+GEOHASH_PRECISION = 8
+NEGATIVE_TTL = 24 * 60 * 60
+
+
+class GeocodingFailed(BaseException):
+    pass
+
+
+def normalize_address(address):
+    address = re.sub(r'\s*,\s*', ', ', address.strip().lower())
+    return re.sub(r'\s+', ' ', address).strip(' ,.')
+
+
+def location_address(location):
+    parts = [location.address1, location.address2, location.city, location.state_province_region,
+             location.postal_code]
+    return ', '.join(part for part in parts if part)
+
+
+# Resolves addresses with the geocoder package, imported on first use since only this provider needs it.
+class GeocoderProvider(object):
+    NO_MATCH_ERRORS = ('ZERO_RESULTS', 'ERROR - No results found')
+
+    def __init__(self, provider='osm', **kwargs):
+        self.provider = provider
+        self.kwargs = kwargs
+
+    # The geocoder package reports failed requests, HTTP errors included, in the error of the result.  Providers that
+    # answer an unknown address with an error status report one of NO_MATCH_ERRORS, the others an empty result.
+    def geocode(self, address):
+        import geocoder
+        result = geocoder.get(address, provider=self.provider, **self.kwargs)
+        if result.error and result.error not in self.NO_MATCH_ERRORS:
+            raise GeocodingFailed(f'{self.provider} could not geocode {address}: {result.error}')
+        if not result.ok or not result.latlng:
+            return None
+        return tuple(float(value) for value in result.latlng)
+
+    def geocode_many(self, addresses):
+        return [self.geocode(address) for address in addresses]
+
+
+class MemoryCache(object):
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return False, None
+            self.entries.move_to_end(key)
+            return True, self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+# Keeps resolved addresses in a SQLite file.  Entries are (coordinates, expires) pairs, addresses the provider could not
+# resolve are kept with no coordinates until they expire, so they are not retried on every lookup.  Stores written
+# before entries expired get the column on open, their unresolved addresses count as expired.
+class DiskStore(object):
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS geocodes '
+                                    '(address TEXT PRIMARY KEY, latitude REAL, longitude REAL, expires REAL)')
+            columns = [row[1] for row in self.connection.execute('PRAGMA table_info(geocodes)')]
+            if 'expires' not in columns:
+                self.connection.execute('ALTER TABLE geocodes ADD COLUMN expires REAL')
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute('SELECT latitude, longitude, expires FROM geocodes WHERE address = ?',
+                                          (key,)).fetchone()
+        if row is None:
+            return False, None
+        if row[0] is None:
+            return True, (None, 0 if row[2] is None else row[2])
+        return True, ((row[0], row[1]), row[2])
+
+    def put(self, key, entry):
+        value, expires = entry
+        latitude, longitude = (None, None) if value is None else value
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?)',
+                                    (key, latitude, longitude, expires))
+
+    def close(self):
+        self.connection.close()
+
+
+# The cache and the store hold (coordinates, expires) entries, expires is None for resolved addresses.
+class Geocoder(object):
+    def __init__(self, provider=None, cache=None, store=None, negative_ttl=NEGATIVE_TTL):
+        self.provider = GeocoderProvider() if provider is None else provider
+        self.cache = MemoryCache() if cache is None else cache
+        self.store = store
+        self.negative_ttl = negative_ttl
+        self.single_flight = SingleFlight()
+
+    def geocode(self, address):
+        key = normalize_address(address)
+        found, value = self.cached(key)
+        if found:
+            return value
+        return self.single_flight.do(key, lambda: self.resolve(key))
+
+    def resolve(self, key):
+        value = self.provider.geocode(key)
+        self.remember(key, value)
+        return value
+
+    # Resolves the addresses that are not cached with a single provider batch, results follow the order of addresses.
+    def geocode_many(self, addresses):
+        keys = [normalize_address(address) for address in addresses]
+        resolved = dict()
+        for key in dict.fromkeys(keys):
+            found, value = self.cached(key)
+            if found:
+                resolved[key] = value
+        missing = [key for key in dict.fromkeys(keys) if key not in resolved]
+        if missing:
+            for (key, value) in zip(missing, self.provider.geocode_many(missing)):
+                self.remember(key, value)
+                resolved[key] = value
+        return [resolved[key] for key in keys]
+
+    # Sets the coordinates and geohash of a location that has none from its address, returns whether it is located.
+    def locate(self, location, precision=GEOHASH_PRECISION):
+        if location.latitude is None or location.longitude is None:
+            coordinates = self.geocode(location_address(location))
+            if coordinates is None:
+                return False
+            location.latitude, location.longitude = coordinates
+        if not location.geohash:
+            location.geohash = geo.encode(location.latitude, location.longitude, precision)
+        return True
+
+    def cached(self, key):
+        found, entry = self.cache.get(key)
+        if not found and self.store is not None:
+            found, entry = self.store.get(key)
+            if found:
+                self.cache.put(key, entry)
+        if not found or self.expired(entry):
+            return False, None
+        return True, entry[0]
+
+    def remember(self, key, value):
+        entry = (value, None if value is not None else time.time() + self.negative_ttl)
+        self.cache.put(key, entry)
+        if self.store is not None:
+            self.store.put(key, entry)
+
+    @staticmethod
+    def expired(entry):
+        return entry[1] is not None and entry[1] <= time.time()
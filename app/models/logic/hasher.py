@@ -1,9 +1,14 @@
 from ulid import ulid
 from app.models.logic.base import LogicBase
-from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.lazy import LazyClass
+
+HareEventDataModel = LazyClass('app.models.persistence.event', 'HareEventDataModel')
+HasherDataModel = LazyClass('app.models.persistence.hasher', 'HasherDataModel')
 
 
 class HasherLogicModel(LogicBase):
+    __persistence_model__ = HasherDataModel
+
     def __init__(self, hash_name, mother_kennel, hasher_id=None, contact_info=None, real_name=None, user=None,
                  persistence_object=None):
         super().__init__()
@@ -30,13 +35,49 @@ class HasherLogicModel(LogicBase):
         return hasher
 
     @classmethod
-    def lookup_by_id(cls, hasher_id):
-        result = HasherDataModel.get(hasher_id)
+    def from_persistence_object(cls, result):
         attribute_dict = result.attributes()
         attribute_dict['persistence_object'] = result
         attribute_dict['hasher_id'] = result.hasher_id
         return HasherLogicModel(**attribute_dict)
 
+    @classmethod
+    async def async_create(cls, hash_name, mother_kennel, hasher_id=None, contact_info=None, real_name=None, user=None,
+                           persistence_object=None):
+        hasher = HasherLogicModel(hash_name, mother_kennel, hasher_id=hasher_id, contact_info=contact_info,
+                                  real_name=real_name, user=user, persistence_object=persistence_object)
+        await hasher.async_save()
+        return hasher
+
+    @classmethod
+    async def async_lookup_by_id(cls, hasher_id):
+        return cls.from_persistence_object(await HasherDataModel.async_get(hasher_id))
+
+    @classmethod
+    def lookup_by_id(cls, hasher_id):
+        return cls.from_persistence_object(HasherDataModel.get(hasher_id))
+
+    @classmethod
+    def lookup_by_ref(cls, hasher_ref):
+        return cls.lookup_by_id(hasher_ref.hasher_id)
+
+    # Missing hashers are returned as None, in the position of their id.
+    @classmethod
+    def lookup_many(cls, hasher_ids):
+        results = HasherDataModel.batch_get_in_order(hasher_ids)
+        return [None if result is None else cls.from_persistence_object(result) for result in results]
+
+    @classmethod
+    def lookup_many_by_ref(cls, hasher_refs):
+        return cls.lookup_many([cls.reference_value(hasher_ref, 'hasher_id') for hasher_ref in hasher_refs])
+
+    # The events a hasher has hared, newest first, read from the event references stored with the hare event records.
+    @classmethod
+    def hare_history(cls, hasher, before=None, limit=None, page_size=None, cursor=None):
+        condition = None if before is None else HareEventDataModel.start_time < before
+        return HareEventDataModel.events(cls.reference_value(hasher, 'hasher_id'), condition, scan_index_forward=False,
+                                         limit=limit, page_size=page_size, cursor=cursor)
+
     @staticmethod
     def map_mother_kennel(momma):
         return {'kennel_id': momma.kennel_id, 'name': momma.name, 'acronym': momma.acronym}
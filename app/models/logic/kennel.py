@@ -1,12 +1,18 @@
+from bisect import bisect
 from ulid import ulid
 from datetime import datetime, timezone
-from app.models.persistence import AlreadyExists
-from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from app.models.persistence import aio, AlreadyExists
 from app.models.logic.base import LogicBase
+from app.models.persistence.lazy import LazyClass
+
+KennelDataModel = LazyClass('app.models.persistence.kennel', 'KennelDataModel')
+KennelEventDataModel = LazyClass('app.models.persistence.event', 'KennelEventDataModel')
+KennelMemberDataModel = LazyClass('app.models.persistence.kennel', 'KennelMemberDataModel')
 
 
 class KennelLogicModel(LogicBase):
-    __unpersistable_attributes__ = ['events', 'members', 'officers']
+    __persistence_model__ = KennelDataModel
+    __unpersistable_attributes__ = ['events', '_members', '_member_ids', 'officers']
 
     def __init__(self, name, acronym, kennel_id=None, description=None, region=None, contact=None, webpage=None,
                  founding=None, next_trail_number=None, facebook=None, persistence_object=None):
@@ -17,7 +23,8 @@ class KennelLogicModel(LogicBase):
         self.acronym = acronym
         self.region = region
         self.events = None
-        self.members = list()
+        self._members = None
+        self._member_ids = set()
         self.officers = None
         self.contact = contact
         self.webpage = webpage
@@ -25,7 +32,6 @@ class KennelLogicModel(LogicBase):
         self.founding = founding
         self.description = description
         self.next_trail_number = next_trail_number
-        self.load_members()
         if persistence_object is None:
             self.persistence_object = KennelDataModel(**self.persistable_attributes())
         else:
@@ -35,20 +41,50 @@ class KennelLogicModel(LogicBase):
         if self.has_member(hasher):
             raise AlreadyExists(f'{self.name} already has a member with id {hasher}')
         self.create_membership(self, hasher)
-        self.load_members()
+        self._member_ids.add(hasher.hasher_id)
+        if self.members_loaded():
+            position = bisect([member.hasher_id for member in self._members], hasher.hasher_id)
+            self._members.insert(position, hasher.persistence_object.to_ref())
+
+    def allocate_trail_numbers(self, count=1):
+        trail_numbers = KennelDataModel.allocate_trail_numbers(self.kennel_id, count=count,
+                                                               record=self.persistence_object)
+        self.next_trail_number = trail_numbers.stop
+        return trail_numbers
 
+    # Known members are kept in a set keyed by hasher id.  Once the roster is loaded that set is complete, otherwise
+    # a miss falls back to a single GetItem on the membership record rather than loading the whole roster.
     def has_member(self, hasher):
-        return hasher.persistence_object.to_ref() in self.members
+        if hasher.hasher_id in self._member_ids:
+            return True
+        if self.members_loaded():
+            return False
+        if KennelMemberDataModel.is_member(self.kennel_id, hasher.hasher_id):
+            self._member_ids.add(hasher.hasher_id)
+            return True
+        return False
+
+    # The member roster is only queried the first time it is used, kennel creation and lookup should not pay
+    # for a query whose cost grows with the size of the roster.  Use #load_members to force a reload.
+    @property
+    def members(self):
+        if self._members is None:
+            self.load_members()
+        return self._members
+
+    def load_members(self, page_size=None):
+        self._members = self.list_members(self, page_size=page_size)
+        self._member_ids = {member.hasher_id for member in self._members}
+
+    def members_loaded(self):
+        return self._members is not None
 
-    def load_members(self):
-        self.members = self.list_members(self)
+    def unload_members(self):
+        self._members = None
 
     @staticmethod
     def _extract_hasher_ids_from_query(result):
-        result = list(result)
-        if len(result) == 0:
-            return list()
-        return [member_record.attributes()['hasher_id'] for member_record in result]
+        return [member_record.hasher_id for member_record in result]
 
     @classmethod
     def create(cls, name, acronym, kennel_id=None, description=None, region=None, contact=None, webpage=None,
@@ -60,6 +96,16 @@ class KennelLogicModel(LogicBase):
         kennel.save()
         return kennel
 
+    @classmethod
+    async def async_create(cls, name, acronym, kennel_id=None, description=None, region=None, contact=None,
+                           webpage=None, founding=None, next_trail_number=None, facebook=None, persistence_object=None):
+        kennel = KennelLogicModel(name, acronym, kennel_id=kennel_id, description=description, region=region,
+                                  contact=contact, webpage=webpage, founding=founding,
+                                  next_trail_number=next_trail_number, facebook=facebook,
+                                  persistence_object=persistence_object)
+        await kennel.async_save()
+        return kennel
+
     @staticmethod
     def create_membership(kennel, hasher):
         KennelMemberDataModel(kennel.kennel_id, hasher.hasher_id, kennel_ref=kennel.persistence_object.to_ref(),
@@ -67,17 +113,70 @@ class KennelLogicModel(LogicBase):
                               joined=datetime.now(tz=timezone.utc)).save()
 
     @staticmethod
-    def lookup_by_id(kennel_id):
-        result = KennelDataModel.get(kennel_id)
+    def from_persistence_object(result):
         attribute_dict = result.attributes()
         attribute_dict['persistence_object'] = result
-        attribute_dict['kennel_id'] = kennel_id
+        attribute_dict['kennel_id'] = result.kennel_id
         return KennelLogicModel(**attribute_dict)
 
+    @staticmethod
+    def lookup_by_id(kennel_id):
+        return KennelLogicModel.from_persistence_object(KennelDataModel.get(kennel_id))
+
+    @staticmethod
+    async def async_lookup_by_id(kennel_id):
+        return KennelLogicModel.from_persistence_object(await KennelDataModel.async_get(kennel_id))
+
     @classmethod
     def lookup_by_ref(cls, kennel_ref):
         return cls.lookup_by_id(kennel_ref.kennel_id)
 
+    # Missing kennels are returned as None, in the position of their id.
+    @classmethod
+    def lookup_many(cls, kennel_ids):
+        results = KennelDataModel.batch_get_in_order(kennel_ids)
+        return [None if result is None else cls.from_persistence_object(result) for result in results]
+
+    @classmethod
+    def lookup_many_by_ref(cls, kennel_refs):
+        return cls.lookup_many([cls.reference_value(kennel_ref, 'kennel_id') for kennel_ref in kennel_refs])
+
+    @classmethod
+    def list_members(cls, kennel, page_size=None):
+        return list(cls.stream_members(kennel, page_size=page_size))
+
+    @classmethod
+    async def async_list_members(cls, kennel, page_size=None):
+        return await aio.run_blocking(cls.list_members, kennel, page_size=page_size)
+
+    # Kennel event listings read the event references stored with the kennel event records, with a condition on their
+    # start_time range key, so they take one query and no reads of the events themselves.  The listings and the member
+    # listings take a kennel or a reference of one, e.g. {'kennel_id': kennel_id}.
+    @classmethod
+    def upcoming_events(cls, kennel, count=10, after=None):
+        after = datetime.now(tz=timezone.utc) if after is None else after
+        return list(KennelEventDataModel.events(cls.reference_value(kennel, 'kennel_id'),
+                                                KennelEventDataModel.start_time >= after, limit=count))
+
+    @classmethod
+    async def async_upcoming_events(cls, kennel, count=10, after=None):
+        return await aio.run_blocking(cls.upcoming_events, kennel, count=count, after=after)
+
+    @classmethod
+    def past_events(cls, kennel, count=10, before=None):
+        before = datetime.now(tz=timezone.utc) if before is None else before
+        return list(KennelEventDataModel.events(cls.reference_value(kennel, 'kennel_id'),
+                                                KennelEventDataModel.start_time < before, scan_index_forward=False,
+                                                limit=count))
+
+    @classmethod
+    def events_between(cls, kennel, start, end, page_size=None, cursor=None):
+        return KennelEventDataModel.events(cls.reference_value(kennel, 'kennel_id'),
+                                           KennelEventDataModel.start_time.between(start, end), page_size=page_size,
+                                           cursor=cursor)
+
+    # Streams the member references, use the stream's cursor to resume a listing where a page of it stopped.
     @classmethod
-    def list_members(cls, kennel):
-        return KennelMemberDataModel.members(kennel.kennel_id)
+    def stream_members(cls, kennel, page_size=None, cursor=None):
+        return KennelMemberDataModel.stream_members(cls.reference_value(kennel, 'kennel_id'), page_size=page_size,
+                                                    cursor=cursor)
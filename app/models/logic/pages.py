@@ -0,0 +1,62 @@
+import asyncio
+from collections import namedtuple
+from app.models.logic.hasher import HasherLogicModel
+from app.models.logic.kennel import KennelLogicModel
+from app.models.persistence import aio
+from app.models.persistence.lazy import LazyClass
+
+KennelMemberDataModel = LazyClass('app.models.persistence.kennel', 'KennelMemberDataModel')
+
+# Aggregate loaders for the kennel and hasher pages.  The reads of a page only depend on the id being viewed, so they
+# are issued together on the persistence executor and the page takes about as long as its slowest read rather than
+# the sum of them.  The listings are given a reference of the id, so they do not wait for the kennel or hasher to be
+# read.  A kennel or hasher that does not exist raises its DoesNotExist, as the lookups do.
+KennelPage = namedtuple('KennelPage', ['kennel', 'members', 'upcoming_events'])
+HasherPage = namedtuple('HasherPage', ['hasher', 'memberships', 'hare_history'])
+
+
+def kennel_page_reads(kennel_id, event_count, after, member_page_size):
+    kennel_ref = {'kennel_id': kennel_id}
+    return [lambda: KennelLogicModel.lookup_by_id(kennel_id),
+            lambda: KennelLogicModel.list_members(kennel_ref, page_size=member_page_size),
+            lambda: KennelLogicModel.upcoming_events(kennel_ref, count=event_count, after=after)]
+
+
+def hasher_page_reads(hasher_id, history_count, before, membership_page_size):
+    hasher_ref = {'hasher_id': hasher_id}
+    return [lambda: HasherLogicModel.lookup_by_id(hasher_id),
+            lambda: KennelMemberDataModel.memberships(hasher_id, page_size=membership_page_size),
+            lambda: list(HasherLogicModel.hare_history(hasher_ref, before=before, limit=history_count))]
+
+
+# Waits for every read before raising the first failure, so no read is left running once the loader returns.
+def run_concurrently(reads):
+    futures = [aio.executor().submit(read) for read in reads]
+    for future in futures:
+        future.exception()
+    return [future.result() for future in futures]
+
+
+async def gather_concurrently(reads):
+    results = await asyncio.gather(*(aio.run_blocking(read) for read in reads), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+def load_kennel_page(kennel_id, event_count=10, after=None, member_page_size=None):
+    return KennelPage(*run_concurrently(kennel_page_reads(kennel_id, event_count, after, member_page_size)))
+
+
+async def async_load_kennel_page(kennel_id, event_count=10, after=None, member_page_size=None):
+    return KennelPage(*await gather_concurrently(kennel_page_reads(kennel_id, event_count, after, member_page_size)))
+
+
+def load_hasher_page(hasher_id, history_count=10, before=None, membership_page_size=None):
+    return HasherPage(*run_concurrently(hasher_page_reads(hasher_id, history_count, before, membership_page_size)))
+
+
+async def async_load_hasher_page(hasher_id, history_count=10, before=None, membership_page_size=None):
+    return HasherPage(*await gather_concurrently(hasher_page_reads(hasher_id, history_count, before,
+                                                                   membership_page_size)))
@@ -0,0 +1,97 @@
+from app.models.persistence import AlreadyExists
+from app.models.persistence.lazy import LazyClass
+
+TransactWrite = LazyClass('app.models.persistence.transaction', 'TransactWrite')
+
+
+# A unit of work over the logic models.  Entities read through a session are kept in an identity map keyed by logic
+# class and primary key, so a request that touches the same kennel several times reads it once and every caller
+# shares one object.  Logic objects passed to #add are written together on #commit, in as few TransactWriteItems
+# calls as their operations allow, new records whole and persisted ones as updates of their changed attributes, with
+# the same save hooks and uniqueness checks as #save.  Used as a context
+# manager the session commits on a clean exit and discards pending writes otherwise.
+# A commit that needs more than one transaction is not atomic.  The transactions are committed in order and the
+# objects of each are dropped from the pending writes once it succeeds, so after a failure the session holds only
+# the objects that were not written and committing again does not write the others twice.
+class Session(object):
+    def __init__(self):
+        self.identity_map = dict()
+        self.dirty = list()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def add(self, logic_object):
+        identity = self.identity_of(logic_object)
+        known = self.identity_map.setdefault(identity, logic_object)
+        if known is not logic_object:
+            raise ValueError(f'The session already holds a different {identity[0].__name__} for key {identity[1]}')
+        if all(dirty is not logic_object for dirty in self.dirty):
+            self.dirty.append(logic_object)
+
+    def commit(self):
+        transactions = [(TransactWrite(), list())]
+        unique_keys = set()
+        for logic_object in self.dirty:
+            staged = TransactWrite(limited=False)
+            logic_object.save_in_transaction(staged)
+            if len(staged) > TransactWrite.MAX_OPERATIONS:
+                raise ValueError(f'Saving {logic_object.__class__.__name__} {self.identity_of(logic_object)[1]} takes '
+                                 f'{len(staged)} operations, more than fit in one transaction')
+            if not logic_object.persistence_object.persisted and \
+                    hasattr(logic_object.persistence_object, 'unique_key'):
+                unique_key = logic_object.persistence_object.unique_key()
+                if unique_key in unique_keys:
+                    raise AlreadyExists(f'Record with unique key {unique_key} is written twice in one session.')
+                unique_keys.add(unique_key)
+            if len(transactions[-1][0]) + len(staged) > TransactWrite.MAX_OPERATIONS:
+                transactions.append((TransactWrite(), list()))
+            transactions[-1][0].extend(staged)
+            transactions[-1][1].append(logic_object)
+        for (transaction, logic_objects) in transactions:
+            transaction.commit()
+            for logic_object in logic_objects:
+                logic_object.reload_from_persistence()
+            self.dirty = [dirty for dirty in self.dirty if all(dirty is not written for written in logic_objects)]
+
+    def get(self, logic_class, hash_key, range_key=None):
+        identity = self.identity(logic_class, hash_key, range_key)
+        try:
+            return self.identity_map[identity]
+        except KeyError:
+            pass
+        keys = (hash_key,) if range_key is None else (hash_key, range_key)
+        logic_object = logic_class.lookup_by_id(*keys)
+        self.identity_map[identity] = logic_object
+        return logic_object
+
+    # Only the keys that are not already in the identity map are read, with one ordered batch lookup.  Missing
+    # entities are returned as None, in the position of their key.
+    def get_many(self, logic_class, hash_keys):
+        identities = [self.identity(logic_class, hash_key) for hash_key in hash_keys]
+        missing = dict()
+        for (identity, hash_key) in zip(identities, hash_keys):
+            if identity not in self.identity_map:
+                missing.setdefault(identity, hash_key)
+        if missing:
+            for (identity, logic_object) in zip(missing.keys(), logic_class.lookup_many(list(missing.values()))):
+                if logic_object is not None:
+                    self.identity_map[identity] = logic_object
+        return [self.identity_map.get(identity) for identity in identities]
+
+    @staticmethod
+    def identity(logic_class, hash_key, range_key=None):
+        return logic_class, logic_class.__persistence_model__._serialize_keys(hash_key, range_key)
+
+    @staticmethod
+    def identity_of(logic_object):
+        return logic_object.__class__, logic_object.persistence_object._item_key()
+
+    def rollback(self):
+        self.dirty = list()
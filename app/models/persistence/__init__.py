@@ -1,8 +1,25 @@
-# https://www.python.org/dev/peps/pep-0382/
-__import__('pkg_resources').declare_namespace(__name__)
+# pkgutil-style namespace package, see https://packaging.python.org/guides/packaging-namespace-packages/
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
 
 
 # This exception is for all persistence module classes to use when needing to alert a calling functin that a record
 # cannot be created due to a record already existing.
 class AlreadyExists(BaseException):
     pass
+
+
+# This exception is raised when a write of a versioned record is rejected because the stored record is no longer at the
+# version that was read, someone else has written it since.
+class VersionConflict(BaseException):
+    pass
+
+
+# This exception is raised when DynamoDB cancels a TransactWriteItems call.  The reasons are in the same order as the
+# operations of the transaction, an operation that did not cause the cancellation has a reason of 'None'.
+class TransactionCanceled(BaseException):
+    def __init__(self, msg, reasons=None):
+        super().__init__(msg)
+        self.reasons = list() if reasons is None else reasons
+
+    def failed_operations(self):
+        return [index for (index, reason) in enumerate(self.reasons) if reason not in (None, 'None')]
@@ -0,0 +1,40 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import itertools
+import threading
+
+# The asyncio counterparts of the persistence and logic methods run the blocking calls on this executor, sized like the
+# connection pool of BaseMeta so that every worker thread has a pooled connection.  Coroutines awaiting DynamoDB calls
+# then share a bounded set of threads instead of parking a thread of the web worker each, and independent calls
+# gathered on one event loop run concurrently.  The executor is created on first use, importing the persistence base
+# here would load pynamodb with the logic modules, see app.models.persistence.lazy.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from app.models.persistence.base import BaseMeta
+            _executor = ThreadPoolExecutor(max_workers=BaseMeta.pool_size, thread_name_prefix='dynamodb')
+        return _executor
+
+
+async def run_blocking(function, *args, **kwargs):
+    return await asyncio.get_event_loop().run_in_executor(executor(), functools.partial(function, *args, **kwargs))
+
+
+# Consumes at most count results of a blocking iterator, e.g. one DynamoDB page of a query.
+def take(results, count):
+    return list(itertools.islice(results, count))
+
+
+async def iterate(results, batch_size):
+    while True:
+        records = await run_blocking(take, results, batch_size)
+        for record in records:
+            yield record
+        if len(records) < batch_size:
+            return
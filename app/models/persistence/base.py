@@ -1,30 +1,134 @@
 from copy import copy
 import functools
+import inspect
 import os
+import random
 import re
+import time
+from app.models.persistence import aio
+from app.models.persistence.connections import connection_registry
+from app.models.persistence.pagination import decode_cursor, QueryStream
+from pynamodb.constants import ATTR_TYPE_MAP, BATCH_GET_PAGE_LIMIT, KEYS, RESPONSES, UNPROCESSED_KEYS
+from pynamodb.exceptions import PutError, UpdateError
 from pynamodb.models import Model
+from pynamodb.pagination import ResultIterator
 
 
+# The connection settings are shared by every model with the same settings, see ConnectionRegistry.  Timeouts are in
+# seconds, max_retry_attempts is the number of retries of a request that failed or was throttled, with jittered
+# exponential backoff from base_backoff_ms.  connections.warm_up() opens connections and describes the tables ahead of
+# the first request.
 class BaseMeta(object):
     host = os.environ.get('DYNAMODBURL')
+    unique_key_guard = False
+    pool_size = int(os.environ.get('DYNAMODB_POOL_SIZE', 10))
+    connect_timeout_seconds = 2
+    read_timeout_seconds = 10
+    max_retry_attempts = 3
+    base_backoff_ms = 25
+    keep_alive = True
+    connections = connection_registry
+
+
+# Listeners are called with (event_name, model_class, keys, new_image) for every write made through BaseModel, with the
+# keys and image in the DynamoDB attribute value format.  The image is None when the written item is not known, e.g.
+# for updates made in a transaction.  They feed in-process consumers that would otherwise read a DynamoDB stream, see
+# app.models.index.stream.LocalChangeStream.  Models that set observes_changes are told about their own writes through
+# #observe_change with the keys alone, see CachedGetMixin, so a write to any other model serializes nothing unless a
+# listener is registered.
+change_listeners = list()
+
+
+def publish_change(event_name, model_class, keys, new_image=None):
+    if model_class.observes_changes:
+        model_class.observe_change(event_name, keys)
+    for listener in list(change_listeners):
+        listener(event_name, model_class, keys, new_image)
 
 
 class BaseModel(Model):
     VALID_UPDATE_ACTIONS = ['set', 'remove', 'add', 'delete']
+    BATCH_GET_BASE_BACKOFF_MS = 25
+    BATCH_GET_MAX_RETRIES = 8
+    ASYNC_QUERY_BATCH_SIZE = 100
+    HOOK_CHAINS = ('before_save_hooks', 'on_init_hooks', 'on_update_hooks')
+    observes_changes = False
     __before_save_hooks__ = list()
+    __meta_attributes__ = list()
     __on_init_hooks__ = list()
-    __update_hooks__ = list()
+    __on_update_hooks__ = list()
     __update_action_hooks__ = dict()
+    before_save_hooks = tuple()
+    on_init_hooks = tuple()
+    on_update_hooks = tuple()
+    update_action_hooks = dict()
+    _field_objects_ = dict()
+    _meta_attribute_names_ = frozenset()
+    _reference_projections_ = dict()
+
+    # Hook names declared by a class and by every class in its MRO are resolved once, when the class is created, into
+    # shared chains of callables that take the instance as their first argument.  The chains run most derived class
+    # first, which is the order the hooks were historically collected in.  A class declaring a table registers with its
+    # connection registry, so the registry can warm up every model without one having made a request.
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        mro = [klass for klass in cls.__mro__ if issubclass(klass, BaseModel)]
+        cls.__meta_attributes__ = cls._collect_names(mro, '__meta_attributes__')
+        cls._meta_attribute_names_ = frozenset(cls.__meta_attributes__)
+        cls._field_objects_ = dict()
+        cls._reference_projections_ = dict()
+        cls.before_save_hooks = cls._resolve_hooks(mro, '__before_save_hooks__')
+        cls.on_init_hooks = cls._resolve_hooks(mro, '__on_init_hooks__')
+        cls.on_update_hooks = cls._resolve_hooks(mro, '__on_update_hooks__')
+        update_action_hooks = dict()
+        for klass in reversed(mro):
+            for (action, field_hooks) in klass.__dict__.get('__update_action_hooks__', dict()).items():
+                for (field, name) in field_hooks.items():
+                    update_action_hooks.setdefault(action, dict())[field] = cls._resolve_hook(name)
+        cls.update_action_hooks = update_action_hooks
+        meta = cls.__dict__.get('Meta')
+        if getattr(meta, 'table_name', None) is not None:
+            getattr(meta, 'connections', connection_registry).register(cls)
 
     def __init__(self, hash_key=None, range_key=None, **attributes):
-        self.assign_or_extend('before_save_hooks', __class__.__before_save_hooks__)
-        self.assign_or_extend('on_init_hooks', __class__.__on_init_hooks__)
-        self.assign_or_extend('on_update_hooks', __class__.__update_hooks__)
-        self.assign_or_update('update_action_hooks', __class__.__update_action_hooks__)
         super(BaseModel, self).__init__(hash_key, range_key, **attributes)
+        self.persisted = not attributes.get('_user_instantiated', True)
         self.update_actions = list()
         for hook in self.on_init_hooks:
-            getattr(self, hook)()
+            hook(self)
+
+    # Every model's reads go through a CoalescingTableConnection, concurrent identical gets and queries share one
+    # request, over the shared connection of its settings, see BaseMeta.
+    @classmethod
+    def _get_connection(cls):
+        if cls.__dict__.get('_connection') is None:
+            registry = getattr(cls.Meta, 'connections', connection_registry)
+            cls._connection = registry.table_connection(cls)
+        return cls._connection
+
+    @staticmethod
+    def _collect_names(mro, declaration):
+        names = list()
+        for klass in mro:
+            for name in klass.__dict__.get(declaration, list()):
+                if name not in names:
+                    names.append(name)
+        return names
+
+    @classmethod
+    def _resolve_hooks(cls, mro, declaration):
+        return tuple(cls._resolve_hook(name) for name in cls._collect_names(mro, declaration))
+
+    @classmethod
+    def _resolve_hook(cls, name):
+        hook = inspect.getattr_static(cls, name)
+        if isinstance(hook, staticmethod):
+            function = hook.__func__
+            return lambda instance, *args: function(*args)
+        if isinstance(hook, classmethod):
+            function = hook.__func__
+            return lambda instance, *args: function(instance.__class__, *args)
+        return hook
 
     def add_update_action(self, field, action, value=None):
         action = action.lower()
@@ -34,22 +138,46 @@ class BaseModel(Model):
         if field_obj.is_hash_key or field_obj.is_range_key:
             raise ValueError(f"Field cannot be used because it is part of the key.")
         action_obj = getattr(field_obj, action)
-        if value:
+        if value is not None:
             thing = action_obj(value)
         else:
             thing = action_obj()
         self.update_actions.append(thing)
-        if self.update_action_hooks.get(action, {field: None}).get(field):
-            self.update_actions.extend(getattr(self, self.update_action_hooks[action][field])(value))
+        hook = self.update_action_hooks.get(action, dict()).get(field)
+        if hook:
+            self.update_actions.extend(hook(self, value))
 
+    # Dotted field paths and reference projections are resolved once per class and kept in per-class registries,
+    # building update actions and references is then a dictionary lookup.
     @classmethod
     def __get_field_object__(cls, field):
-        return functools.reduce(lambda x, y: getattr(x, y), field.split('.'), cls)
+        try:
+            return cls._field_objects_[field]
+        except KeyError:
+            field_obj = functools.reduce(lambda x, y: getattr(x, y), field.split('.'), cls)
+            cls._field_objects_[field] = field_obj
+            return field_obj
+
+    @classmethod
+    def reference_keys(cls, reference_class):
+        try:
+            return cls._reference_projections_[reference_class]
+        except KeyError:
+            keys = tuple(key for key in reference_class.get_attributes() if key not in cls._meta_attribute_names_)
+            cls._reference_projections_[reference_class] = keys
+            return keys
 
+    # The hook chains can still be extended for one instance with hook names, as models used to do in __init__.  The
+    # names are resolved and the instance gets its own copy of the chain, the class chain is left as it is.
     def assign_or_extend(self, field, value_list):
         copied_list = copy(value_list)
         if not hasattr(value_list, 'extend'):
             raise ValueError(f'{self.__class__}#assign_or_extend expects a list-like object for the value_list')
+        if field in self.HOOK_CHAINS:
+            chain = getattr(self, field)
+            hooks = [self._resolve_hook(name) for name in copied_list]
+            self.__setattr__(field, chain + tuple(hook for hook in hooks if hook not in chain))
+            return
         try:
             self.__getattribute__(field).extend(copied_list)
         except AttributeError:
@@ -59,34 +187,279 @@ class BaseModel(Model):
         copied_dict = copy(value_dict)
         if not hasattr(value_dict, 'update'):
             raise ValueError(f'{self.__class__}#assign_or_update expects a dict-like object for the value_list')
+        if field == 'update_action_hooks':
+            hooks = {action: dict(field_hooks) for (action, field_hooks) in self.update_action_hooks.items()}
+            for (action, field_hooks) in copied_dict.items():
+                hooks.setdefault(action, dict()).update(
+                    {name: self._resolve_hook(hook) for (name, hook) in field_hooks.items()})
+            self.__setattr__(field, hooks)
+            return
         try:
             self.__getattribute__(field).update(copied_dict)
         except AttributeError:
             self.__setattr__(field, copied_dict)
 
     def attributes(self):
-        return {k: v for (k, v) in self.attribute_values.items() if k not in self.__meta_attributes__}
+        return {k: v for (k, v) in self.attribute_values.items() if k not in self._meta_attribute_names_}
+
+    # Gets items with BatchGetItem in pages of 100 keys, retrying unprocessed keys with jittered exponential backoff.
+    # Keys follow the batch_get convention (hash keys, or (hash, range) tuples) and the result has one entry per
+    # requested key, in the requested order, with None for keys that do not exist.
+    @classmethod
+    def batch_get_in_order(cls, keys, consistent_read=None, attributes_to_get=None):
+        requested = [cls._batch_key(key) for key in keys]
+        unique_keys = list(dict.fromkeys(requested))
+        found = dict()
+        for start in range(0, len(unique_keys), BATCH_GET_PAGE_LIMIT):
+            for item in cls._batch_get_keys(unique_keys[start:start + BATCH_GET_PAGE_LIMIT], consistent_read,
+                                            attributes_to_get):
+                found[item._item_key()] = item
+        return [found.get(key) for key in requested]
+
+    # Queries the values of one attribute, typically a reference map, with a projection expression.  Only the projected
+    # attribute is deserialized, items are never built into models and their init hooks do not run.  The key
+    # attributes are projected as well so the stream's cursor can resume the query, see QueryStream.
+    @classmethod
+    def query_attribute(cls, hash_key, attribute_name, range_key_condition=None, index_name=None,
+                        scan_index_forward=None, limit=None, page_size=None, cursor=None, consistent_read=False):
+        attribute = cls.get_attributes()[attribute_name]
+        key_attributes = [attr for attr in cls.get_attributes().values() if attr.is_hash_key or attr.is_range_key]
+        if index_name is None:
+            hash_key = cls._serialize_keys(hash_key)[0]
+        else:
+            cls._get_indexes()
+            index = cls._index_classes[index_name]
+            hash_key = index._hash_key_attribute().serialize(hash_key)
+            key_attributes.extend(index._get_attributes().values())
+        attributes_to_get = list(dict.fromkeys([attr.attr_name for attr in key_attributes] + [attribute.attr_name]))
+        query_kwargs = dict(range_key_condition=range_key_condition, index_name=index_name,
+                            exclusive_start_key=decode_cursor(cursor), consistent_read=consistent_read,
+                            scan_index_forward=scan_index_forward, limit=page_size or limit,
+                            attributes_to_get=attributes_to_get)
+
+        def deserialize(item):
+            value = item.get(attribute.attr_name)
+            return None if value is None else attribute.deserialize(attribute.get_value(value))
+        results = ResultIterator(cls._get_connection().query, (hash_key,), query_kwargs, map_fn=deserialize,
+                                 limit=limit)
+        return QueryStream(results)
+
+    @classmethod
+    def _batch_get_keys(cls, keys, consistent_read, attributes_to_get):
+        meta_data = cls._get_meta_data()
+        keys_to_get = list()
+        for (hash_key, range_key) in keys:
+            key = {meta_data.hash_keyname: hash_key}
+            if meta_data.range_keyname is not None:
+                key[meta_data.range_keyname] = range_key
+            keys_to_get.append(key)
+        retries = 0
+        while keys_to_get:
+            data = cls._get_connection().batch_get_item(keys_to_get, consistent_read=consistent_read,
+                                                        attributes_to_get=attributes_to_get)
+            for item_data in data.get(RESPONSES, dict()).get(cls.Meta.table_name) or list():
+                yield cls.from_raw_data(item_data)
+            keys_to_get = data.get(UNPROCESSED_KEYS, dict()).get(cls.Meta.table_name, dict()).get(KEYS)
+            if keys_to_get:
+                if retries == cls.BATCH_GET_MAX_RETRIES:
+                    raise RuntimeError(f'{len(keys_to_get)} keys of {cls.Meta.table_name} remained unprocessed')
+                time.sleep(random.uniform(0, cls.BATCH_GET_BASE_BACKOFF_MS * (2 ** retries)) / 1000.0)
+                retries += 1
+
+    @classmethod
+    def _batch_key(cls, key):
+        if isinstance(key, (list, tuple)):
+            return cls._serialize_keys(key[0], key[1])
+        return cls._serialize_keys(key)
+
+    def _item_key(self):
+        args, kwargs = self._get_save_args(attributes=False, null_check=False)
+        return args[0], kwargs.get('range_key')
 
     def clear_update_set(self):
         self.update_actions = list()
 
-    def save(self, condition=None, conditional_operator=None, **expected_values):
+    def run_before_save_hooks(self):
         for hook in self.before_save_hooks:
-            getattr(self, hook)()
-        super(BaseModel, self).save(condition=condition, conditional_operator=conditional_operator, **expected_values)
+            hook(self)
+
+    def save(self, condition=None, conditional_operator=None, **expected_values):
+        write_condition = self._write_condition(condition, conditional_operator, expected_values)
+        self.run_before_save_hooks()
+        try:
+            super(BaseModel, self).save(condition=write_condition, conditional_operator=conditional_operator,
+                                        **expected_values)
+        except PutError as e:
+            self._raise_write_conflict(e, condition)
+            raise
+        self.publish_change('MODIFY' if self.persisted else 'INSERT')
+        self.persisted = True
+
+    # Runs the save hooks and adds the PutItem for this record to a TransactWrite, models that write companion
+    # records alongside their own add those operations as well.
+    def save_in_transaction(self, transaction, condition=None):
+        write_condition = self.write_condition(condition)
+        self.run_before_save_hooks()
+        transaction.save(self, condition=write_condition, failure=self._write_failure(condition))
+        transaction.after_commit(functools.partial(setattr, self, 'persisted', True))
+
+    # Models can make every write of a record carry a condition of their own, e.g. the version that was read, see
+    # VersionMixin.  #write_conflict is the error raised when that condition fails, it is only raised for writes
+    # where the caller passed no condition, otherwise the caller's error handling applies.
+    def write_condition(self, condition=None):
+        return condition
+
+    def write_conflict(self):
+        return None
+
+    # BatchWriteItem writes without conditions, so records whose writes carry one, e.g. a versioned record that has
+    # been read, refuse to be batch written rather than have the condition silently dropped.
+    def check_batch_write(self):
+        if self.write_condition() is not None:
+            raise ValueError(f'{self.__class__.__name__} writes are conditional and cannot be batch written')
+
+    def check_batch_delete(self):
+        pass
+
+    def _write_condition(self, condition, conditional_operator, expected_values):
+        if conditional_operator is None and not expected_values:
+            return self.write_condition(condition)
+        if self.write_condition() is not None:
+            raise ValueError(f'{self.__class__.__name__} writes only support condition expressions')
+        return condition
+
+    def _write_failure(self, condition):
+        return self.write_conflict() if condition is None else None
+
+    def _raise_write_conflict(self, error, condition):
+        conflict = self._write_failure(condition)
+        if conflict is not None and self._error_code(error) == 'ConditionalCheckFailedException':
+            raise conflict
+
+    @staticmethod
+    def _error_code(error):
+        try:
+            return error.cause.response['Error']['Code']
+        except (AttributeError, KeyError):
+            return None
+
+    # Writes only the given field values with one UpdateItem, None values are removed.  The update action hooks and
+    # the on update hooks add the derived fields, timestamps and version, as they do for #add_update_action.
+    def add_change_actions(self, changes):
+        for (field, value) in changes.items():
+            self.add_update_action(field, 'remove' if value is None else 'set', value)
+
+    def update_changes(self, changes, condition=None):
+        self.add_change_actions(changes)
+        self.update(condition=condition)
+
+    def update_changes_in_transaction(self, transaction, changes, condition=None):
+        write_condition = self.write_condition(condition)
+        self.add_change_actions(changes)
+        transaction.update(self, self.take_update_actions(), condition=write_condition,
+                           failure=self._write_failure(condition))
+        transaction.after_commit(self.refresh)
+
+    def take_update_actions(self):
+        actions = self.update_actions
+        self.update_actions = list()
+        actions.extend([hook(self) for hook in self.on_update_hooks])
+        return actions
 
     def to_ref(self, reference_class):
-        valid_keys = [key for key in reference_class.__dict__.keys() if not key.startswith('_')]
-        return reference_class(**{k: v for k, v in self.attributes().items() if k in valid_keys})
+        values = self.attribute_values
+        return reference_class(**{k: values[k] for k in self.reference_keys(reference_class) if k in values})
 
     def update(self, attributes=None, condition=None, conditional_operator=None, **expected_values):
         if self.update_actions is None:
             raise ValueError('Update Action list is empty. (Use #add_update_action to create update actions')
-        actions = self.update_actions
-        self.update_actions = list()
-        actions.extend([getattr(self, hook)() for hook in self.on_update_hooks])
-        super(BaseModel, self).update(attributes=attributes, actions=actions, condition=condition,
-                                      conditional_operator=conditional_operator, **expected_values)
+        write_condition = self._write_condition(condition, conditional_operator, expected_values)
+        actions = self.take_update_actions()
+        try:
+            super(BaseModel, self).update(attributes=attributes, actions=actions, condition=write_condition,
+                                          conditional_operator=conditional_operator, **expected_values)
+        except UpdateError as e:
+            self._raise_write_conflict(e, condition)
+            raise
+        self.persisted = True
+        self.publish_change('MODIFY')
+
+    def delete(self, condition=None, conditional_operator=None, **expected_values):
+        response = super(BaseModel, self).delete(condition=condition, conditional_operator=conditional_operator,
+                                                 **expected_values)
+        self.publish_change('REMOVE', new_image=False)
+        return response
+
+    def publish_change(self, event_name, new_image=True):
+        if not change_listeners and not self.observes_changes:
+            return
+        meta_data = self._get_meta_data()
+        attributes = self.get_attributes()
+        keys = dict()
+        for name in (meta_data.hash_keyname, meta_data.range_keyname):
+            if name is not None:
+                attribute = attributes[name]
+                keys[name] = {ATTR_TYPE_MAP[attribute.attr_type]: attribute.serialize(getattr(self, name))}
+        item = None
+        if new_image and change_listeners:
+            item = self._serialize(attr_map=True, null_check=False)['attributes']
+        publish_change(event_name, self.__class__, keys, item)
+
+    @classmethod
+    def observe_change(cls, event_name, keys):
+        pass
+
+    # The asyncio counterparts of the reads and writes, see app.models.persistence.aio.  They run the same methods, so
+    # the save and update hooks, the write conditions and the uniqueness checks apply as they do to the blocking calls.
+    # #async_batch_write is the exception, BatchWriteItem takes no conditions so it refuses stored versioned records and
+    # unique key guarded models, see #check_batch_write.
+    @classmethod
+    async def async_get(cls, hash_key, range_key=None, consistent_read=False, attributes_to_get=None):
+        return await aio.run_blocking(cls.get, hash_key, range_key=range_key, consistent_read=consistent_read,
+                                      attributes_to_get=attributes_to_get)
+
+    # Yields the records of a query, each DynamoDB page is fetched on the executor when the previous one is consumed.
+    @classmethod
+    async def async_query(cls, hash_key, range_key_condition=None, filter_condition=None, page_size=None, **kwargs):
+        results = cls.query(hash_key, range_key_condition, filter_condition, page_size=page_size, **kwargs)
+        async for record in aio.iterate(results, page_size or cls.ASYNC_QUERY_BATCH_SIZE):
+            yield record
+
+    @classmethod
+    async def async_batch_get_in_order(cls, keys, consistent_read=None, attributes_to_get=None):
+        return await aio.run_blocking(cls.batch_get_in_order, keys, consistent_read=consistent_read,
+                                      attributes_to_get=attributes_to_get)
+
+    # Runs the save hooks and the checks of #check_batch_write and #check_batch_delete, then publishes the changes
+    # once the batch is written, as the saves and deletes would.
+    @classmethod
+    async def async_batch_write(cls, items_to_save=(), items_to_delete=()):
+        def batch_write():
+            for item in items_to_save:
+                item.check_batch_write()
+                item.run_before_save_hooks()
+            for item in items_to_delete:
+                item.check_batch_delete()
+            with cls.batch_write() as batch:
+                for item in items_to_save:
+                    batch.save(item)
+                for item in items_to_delete:
+                    batch.delete(item)
+            for item in items_to_save:
+                item.publish_change('MODIFY' if item.persisted else 'INSERT')
+                item.persisted = True
+            for item in items_to_delete:
+                item.publish_change('REMOVE', new_image=False)
+        await aio.run_blocking(batch_write)
+
+    async def async_save(self, condition=None):
+        await aio.run_blocking(self.save, condition=condition)
+
+    async def async_update(self, attributes=None, condition=None):
+        return await aio.run_blocking(self.update, attributes=attributes, condition=condition)
+
+    async def async_update_changes(self, changes, condition=None):
+        await aio.run_blocking(self.update_changes, changes, condition=condition)
 
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
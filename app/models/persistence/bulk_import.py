@@ -0,0 +1,456 @@
+from abc import ABC, abstractmethod
+import argparse
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from ulid import ulid
+from app.models.persistence import AlreadyExists
+from app.models.persistence.base import BaseMeta, BaseModel
+from app.models.persistence.hasher import HasherDataModel, HasherMotherKennelAttribute
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from app.models.persistence.mixins.version import VersionMixin
+from app.models.persistence.throttle import CapacityThrottle
+from pynamodb.attributes import JSONAttribute, ListAttribute, NumberAttribute, UnicodeAttribute
+from pynamodb.constants import BATCH_WRITE_PAGE_LIMIT, ITEM, PUT_REQUEST, UNPROCESSED_ITEMS
+
+
+# A line of a JSON Lines file that is not a JSON object.  It takes the place of its row, so the import rejects it and
+# the positions of the rows after it do not change.
+InvalidRow = namedtuple('InvalidRow', ['line', 'error'])
+
+
+# Rows of a CSV file with a header line, or of a JSON Lines file with one object per line.  Both are read as a stream,
+# so an import never holds its input in memory.  Empty CSV cells are left out of the row.
+def read_rows(stream, file_format='csv'):
+    if file_format == 'csv':
+        return ({key: value for (key, value) in row.items() if value not in (None, '')}
+                for row in csv.DictReader(stream))
+    if file_format == 'json':
+        return (json_row(line) for line in stream if line.strip())
+    raise ValueError(f'{file_format} is not a supported import format')
+
+
+def json_row(line):
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return InvalidRow(line, str(e))
+    if not isinstance(row, dict):
+        return InvalidRow(line, 'not a JSON object')
+    return row
+
+
+# CSV cells are text, list fields hold values separated by ';' and JSON fields hold JSON.
+def field_value(attribute, value):
+    if not isinstance(value, str):
+        return value
+    if isinstance(attribute, ListAttribute):
+        return [part.strip() for part in value.split(';') if part.strip()]
+    if isinstance(attribute, JSONAttribute):
+        return json.loads(value)
+    if isinstance(attribute, NumberAttribute):
+        return int(value)
+    return value
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+ImportReport = namedtuple('ImportReport', ['job_id', 'kind', 'read', 'written', 'duplicates', 'existing', 'rejected',
+                                           'seconds', 'records_per_second'])
+
+
+# An import job is the checkpoint of one import, position is the number of input rows whose records are written.  A
+# job run again resumes after that position, and a job that is done is not run again.  The counts and the seconds
+# spent add up over the runs of the job.
+class ImportJobModel(VersionMixin, BaseModel):
+    RUNNING = 'running'
+    DONE = 'done'
+
+    class Meta(BaseMeta):
+        table_name = 'import_jobs'
+
+    job_id = UnicodeAttribute(hash_key=True)
+    kind = UnicodeAttribute()
+    status = UnicodeAttribute()
+    position = NumberAttribute(default=0)
+    written = NumberAttribute(default=0)
+    duplicates = NumberAttribute(default=0)
+    existing = NumberAttribute(default=0)
+    rejected = NumberAttribute(default=0)
+    seconds = NumberAttribute(default=0)
+
+    @classmethod
+    def start(cls, job_id, kind):
+        try:
+            job = cls.get(job_id, consistent_read=True)
+        except cls.DoesNotExist:
+            job = cls(job_id, kind=kind, status=cls.RUNNING)
+            job.save(condition=cls.job_id.does_not_exist())
+        if job.kind != kind:
+            raise ValueError(f'Import job {job_id} imports {job.kind}, not {kind}')
+        return job
+
+    def report(self):
+        return ImportReport(self.job_id, self.kind, self.position, self.written, self.duplicates, self.existing,
+                            self.rejected, self.seconds, self.written / self.seconds if self.seconds else 0.0)
+
+
+# Kennels and hashers referenced by the rows being imported, looked up for a whole chunk of rows at once.  Lookups by
+# name take one GSI query per distinct name, run concurrently, and lookups by id take one BatchGetItem.  Results are
+# kept for the rest of the import.
+class ReferenceLookups(object):
+    def __init__(self, executor):
+        self.executor = executor
+        self.kennels_by_id = dict()
+        self.kennels_by_name = dict()
+        self.hashers_by_id = dict()
+        self.hashers_by_name = dict()
+        self.hash_names = set()
+
+    def load_kennel_names(self, searchable_names):
+        names = [name for name in set(searchable_names) if name not in self.kennels_by_name]
+        pages = self.executor.map(lambda name: list(KennelDataModel.name_index.query(name, limit=1)), names)
+        for (name, page) in zip(names, pages):
+            self.kennels_by_name[name] = page[0] if page else None
+
+    def load_kennel_ids(self, kennel_ids):
+        kennel_ids = [kennel_id for kennel_id in set(kennel_ids) if kennel_id not in self.kennels_by_id]
+        for (kennel_id, kennel) in zip(kennel_ids, KennelDataModel.batch_get_in_order(kennel_ids)):
+            self.kennels_by_id[kennel_id] = kennel
+
+    # One query per hash name finds the hashers of that name in every mother kennel.
+    def load_hash_names(self, searchable_hash_names):
+        names = [name for name in set(searchable_hash_names) if name not in self.hash_names]
+        pages = self.executor.map(lambda name: list(HasherDataModel.hash_name_index.query(name)), names)
+        for page in pages:
+            for hasher in page:
+                self.hashers_by_name[(hasher.searchable_hash_name, hasher.searchable_mother_kennel_name)] = hasher
+        self.hash_names.update(names)
+
+    def load_hasher_ids(self, hasher_ids):
+        hasher_ids = [hasher_id for hasher_id in set(hasher_ids) if hasher_id not in self.hashers_by_id]
+        for (hasher_id, hasher) in zip(hasher_ids, HasherDataModel.batch_get_in_order(hasher_ids)):
+            self.hashers_by_id[hasher_id] = hasher
+
+    def kennel(self, kennel_id=None, name=None):
+        if kennel_id is not None:
+            kennel = self.kennels_by_id.get(kennel_id)
+        else:
+            kennel = None if name is None else self.kennels_by_name.get(BaseModel.searchable_value(name))
+        if kennel is None:
+            raise ValueError(f'Kennel {kennel_id or name} does not exist')
+        return kennel
+
+    def hasher(self, hasher_id=None, hash_name=None, mother_kennel=None):
+        if hasher_id is not None:
+            hasher = self.hashers_by_id.get(hasher_id)
+        elif hash_name is None or mother_kennel is None:
+            hasher = None
+        else:
+            key = (BaseModel.searchable_value(hash_name), BaseModel.searchable_value(mother_kennel))
+            hasher = self.hashers_by_name.get(key)
+        if hasher is None:
+            raise ValueError(f'Hasher {hasher_id or hash_name} does not exist')
+        return hasher
+
+
+# The kinds of import.  #resolve looks up what the rows of a chunk reference, #build makes the record of a row and
+# raises ValueError for a row that cannot be imported, #dedupe_key is the key that makes records duplicates of each
+# other and #existing returns the keys of records that are already stored.
+class ImportKind(ABC):
+    model_class = None
+    fields = ()
+
+    def __init__(self, lookups):
+        self.lookups = lookups
+
+    def attributes(self, row):
+        model_attributes = self.model_class.get_attributes()
+        return {field: field_value(model_attributes[field], row[field]) for field in self.fields
+                if row.get(field) not in (None, '')}
+
+    def resolve(self, rows):
+        pass
+
+    @abstractmethod
+    def build(self, row):
+        pass
+
+    @abstractmethod
+    def dedupe_key(self, record):
+        pass
+
+    @abstractmethod
+    def existing(self, records):
+        pass
+
+
+class KennelImport(ImportKind):
+    model_class = KennelDataModel
+    fields = ('name', 'acronym', 'description', 'region', 'contact', 'webpage', 'facebook', 'founding',
+              'next_trail_number')
+
+    def build(self, row):
+        return KennelDataModel(row.get('kennel_id') or ulid(), **self.attributes(row))
+
+    def dedupe_key(self, record):
+        return record.searchable_name
+
+    def existing(self, records):
+        self.lookups.load_kennel_names(record.searchable_name for record in records)
+        return {record.searchable_name for record in records if self.lookups.kennels_by_name[record.searchable_name]}
+
+
+# The mother kennel of a hasher is given by mother_kennel_id or by its name in mother_kennel.
+class HasherImport(ImportKind):
+    model_class = HasherDataModel
+    fields = ('hash_name', 'contact_info', 'real_name', 'user')
+
+    def resolve(self, rows):
+        self.lookups.load_kennel_ids(row['mother_kennel_id'] for row in rows if row.get('mother_kennel_id'))
+        self.lookups.load_kennel_names(BaseModel.searchable_value(row['mother_kennel']) for row in rows
+                                       if not row.get('mother_kennel_id') and row.get('mother_kennel'))
+
+    def build(self, row):
+        kennel = self.lookups.kennel(row.get('mother_kennel_id'), row.get('mother_kennel'))
+        if not row.get('hash_name'):
+            raise ValueError('hash_name cannot be None')
+        return HasherDataModel(row.get('hasher_id') or ulid(), **self.attributes(row),
+                               mother_kennel=HasherMotherKennelAttribute(**kennel.to_ref().attribute_values))
+
+    def dedupe_key(self, record):
+        return record.searchable_hash_name, record.searchable_mother_kennel_name
+
+    def existing(self, records):
+        self.lookups.load_hash_names(record.searchable_hash_name for record in records)
+        return {self.dedupe_key(record) for record in records
+                if self.dedupe_key(record) in self.lookups.hashers_by_name}
+
+
+# The kennel of a membership is given by kennel_id or by its name in kennel, the hasher by hasher_id or by hash_name
+# and the name of its mother kennel in mother_kennel.
+class MembershipImport(ImportKind):
+    model_class = KennelMemberDataModel
+
+    def resolve(self, rows):
+        self.lookups.load_kennel_ids(row['kennel_id'] for row in rows if row.get('kennel_id'))
+        self.lookups.load_kennel_names(BaseModel.searchable_value(row['kennel']) for row in rows
+                                       if not row.get('kennel_id') and row.get('kennel'))
+        self.lookups.load_hasher_ids(row['hasher_id'] for row in rows if row.get('hasher_id'))
+        self.lookups.load_hash_names(BaseModel.searchable_value(row['hash_name']) for row in rows
+                                     if not row.get('hasher_id') and row.get('hash_name'))
+
+    def build(self, row):
+        kennel = self.lookups.kennel(row.get('kennel_id'), row.get('kennel'))
+        hasher = self.lookups.hasher(row.get('hasher_id'), row.get('hash_name'), row.get('mother_kennel'))
+        return KennelMemberDataModel(kennel.kennel_id, hasher.hasher_id, kennel_ref=kennel.to_ref(),
+                                     hasher_ref=hasher.to_ref(), joined=datetime.now(tz=timezone.utc))
+
+    def dedupe_key(self, record):
+        return record.kennel_id, record.hasher_id
+
+    def existing(self, records):
+        keys = [self.dedupe_key(record) for record in records]
+        found = KennelMemberDataModel.batch_get_in_order(keys, consistent_read=True,
+                                                         attributes_to_get=['kennel_id', 'hasher_id'])
+        return {key for (key, record) in zip(keys, found) if record is not None}
+
+
+# Imports kennels, hashers or memberships from a stream of rows.  Rows are taken a chunk at a time:
+# - the kennels and hashers the chunk references are looked up together, see ReferenceLookups,
+# - rows that cannot be imported are rejected, and rows whose name, or kennel and hasher, came earlier in the input
+#   are dropped as duplicates, names are compared by their searchable value,
+# - records that are already stored are skipped, checked with one query per distinct name,
+# - the rest are written with BatchWriteItem by max_workers workers, with at most max_pending batches in flight, so
+#   reading the input waits for the writes.  Unprocessed items are retried with jittered exponential backoff.
+# The job records the position after each chunk whose writes all completed, and rows after it are read again when the
+# import is resumed.  Their records are then found by the pre-check and skipped, the GSIs are eventually consistent so
+# a record written just before a crash can still be written twice.  Writes are throttled like those of
+# ReferencePropagator.  Records of models that guard their unique key cannot be batch written, their claims must be
+# conditional, so each is saved with its claim in a transaction, see UniqueKeyMixin.  One whose key was claimed since
+# the pre-check counts as existing.
+class BulkImporter(object):
+    KINDS = {'kennels': KennelImport, 'hashers': HasherImport, 'memberships': MembershipImport}
+    CHUNK_SIZE = 100
+    BASE_BACKOFF_MS = 50
+    MAX_RETRIES = 8
+
+    def __init__(self, chunk_size=CHUNK_SIZE, max_workers=4, max_pending=8, capacity_fraction=0.5,
+                 units_per_second=None):
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.capacity_fraction = capacity_fraction
+        self.units_per_second = units_per_second
+        self.throttles = dict()
+        self.lock = threading.Lock()
+
+    # Returns the ImportReport of the job, on_checkpoint is called with the report after every checkpoint.
+    def run(self, job_id, kind, rows, on_checkpoint=None):
+        if kind not in self.KINDS:
+            raise ValueError(f'{kind} is not a kind of import')
+        job = ImportJobModel.start(job_id, kind)
+        if job.status == ImportJobModel.DONE:
+            return job.report()
+        started, seconds = time.monotonic(), job.seconds
+        slots = threading.BoundedSemaphore(self.max_pending)
+        pending = deque()
+        seen = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            import_kind = self.KINDS[kind](ReferenceLookups(executor))
+            for chunk in chunks(itertools.islice(rows, int(job.position), None), self.chunk_size):
+                records, counts = self.prepare(import_kind, chunk, seen)
+                futures = [self.submit(executor, slots, batch) for batch in self.batches(records)]
+                pending.append((len(chunk), counts, futures))
+                while pending and all(future.done() for future in pending[0][2]):
+                    self.checkpoint(job, pending.popleft(), seconds + time.monotonic() - started, on_checkpoint)
+            while pending:
+                self.checkpoint(job, pending.popleft(), seconds + time.monotonic() - started, on_checkpoint)
+        job.status = ImportJobModel.DONE
+        job.seconds = seconds + time.monotonic() - started
+        job.save()
+        return job.report()
+
+    @staticmethod
+    def prepare(import_kind, rows, seen):
+        counts = Counter()
+        import_kind.resolve([row for row in rows if not isinstance(row, InvalidRow)])
+        records = list()
+        for row in rows:
+            if isinstance(row, InvalidRow):
+                counts['rejected'] += 1
+                continue
+            try:
+                record = import_kind.build(row)
+                record.run_before_save_hooks()
+                record._serialize(null_check=True)
+            except (KeyError, TypeError, ValueError):
+                counts['rejected'] += 1
+                continue
+            key = import_kind.dedupe_key(record)
+            if key in seen:
+                counts['duplicates'] += 1
+                continue
+            seen.add(key)
+            records.append(record)
+        existing = import_kind.existing(records) if records else set()
+        counts['existing'] = sum(1 for record in records if import_kind.dedupe_key(record) in existing)
+        records = [record for record in records if import_kind.dedupe_key(record) not in existing]
+        counts['written'] = len(records)
+        return records, counts
+
+    @staticmethod
+    def batches(records):
+        by_model = dict()
+        for record in records:
+            by_model.setdefault(record.__class__, list()).append(record)
+        for (model_class, model_records) in by_model.items():
+            for start in range(0, len(model_records), BATCH_WRITE_PAGE_LIMIT):
+                yield model_records[start:start + BATCH_WRITE_PAGE_LIMIT]
+
+    # The future of a batch is the number of its records that turned out to exist, see #write_guarded.
+    def submit(self, executor, slots, records):
+        guarded = getattr(records[0], 'unique_key_guarded', lambda: False)()
+        slots.acquire()
+        future = executor.submit(self.write_guarded if guarded else self.write_batch, records[0].__class__, records)
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    # A save of a guarded record writes the record and its claim, the claim is conditional on the key being unclaimed.
+    def write_guarded(self, model_class, records):
+        existing = 0
+        for record in records:
+            self.throttle(model_class).acquire(2)
+            try:
+                record.save()
+            except AlreadyExists:
+                existing += 1
+        return existing
+
+    def write_batch(self, model_class, records):
+        put_items = [record._serialize(attr_map=True, null_check=True)['attributes'] for record in records]
+        retries = 0
+        while put_items:
+            self.throttle(model_class).acquire(len(put_items))
+            data = model_class._get_connection().batch_write_item(put_items=put_items) or dict()
+            unprocessed = data.get(UNPROCESSED_ITEMS, dict()).get(model_class.Meta.table_name) or list()
+            put_items = [item[PUT_REQUEST][ITEM] for item in unprocessed]
+            if put_items:
+                if retries == self.MAX_RETRIES:
+                    raise RuntimeError(f'{len(put_items)} items of {model_class.Meta.table_name} remained unprocessed')
+                time.sleep(random.uniform(0, self.BASE_BACKOFF_MS * (2 ** retries)) / 1000.0)
+                retries += 1
+        for record in records:
+            record.persisted = True
+            record.publish_change('INSERT')
+        return 0
+
+    # Raises the error of a failed write, the position then stays before the chunk and a resumed import retries it.
+    @staticmethod
+    def checkpoint(job, chunk, seconds, on_checkpoint):
+        size, counts, futures = chunk
+        existing = sum(future.result() for future in futures)
+        counts['written'] -= existing
+        counts['existing'] += existing
+        job.position += size
+        for (name, count) in counts.items():
+            setattr(job, name, getattr(job, name) + count)
+        job.seconds = seconds
+        job.save()
+        if on_checkpoint is not None:
+            on_checkpoint(job.report())
+
+    def throttle(self, model_class):
+        with self.lock:
+            throttle = self.throttles.get(model_class.Meta.table_name)
+            if throttle is None:
+                if self.units_per_second is None:
+                    throttle = CapacityThrottle.for_table(model_class, fraction=self.capacity_fraction)
+                else:
+                    throttle = CapacityThrottle(self.units_per_second)
+                self.throttles[model_class.Meta.table_name] = throttle
+            return throttle
+
+
+def format_report(report):
+    return (f'{report.job_id}: read {report.read} {report.kind} rows, wrote {report.written}, skipped '
+            f'{report.duplicates} duplicates and {report.existing} existing, rejected {report.rejected}, '
+            f'{report.records_per_second:.1f} records/s over {report.seconds:.1f}s')
+
+
+# python -m app.models.persistence.bulk_import kennels region.csv
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk import kennels, hashers or kennel memberships.')
+    parser.add_argument('kind', choices=sorted(BulkImporter.KINDS))
+    parser.add_argument('path', help='a CSV file with a header line, or a JSON Lines file')
+    parser.add_argument('--format', choices=['csv', 'json'], help='defaults to the extension of the file')
+    parser.add_argument('--job-id', help='the checkpoint to resume, defaults to the kind and file name')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--units-per-second', type=float, help='defaults to half the provisioned write capacity')
+    args = parser.parse_args(argv)
+    file_format = args.format or ('csv' if args.path.lower().endswith('.csv') else 'json')
+    job_id = args.job_id or f'{args.kind}#{os.path.basename(args.path)}'
+    importer = BulkImporter(max_workers=args.workers, units_per_second=args.units_per_second)
+    with open(args.path, newline='', encoding='utf-8') as stream:
+        report = importer.run(job_id, args.kind, read_rows(stream, file_format),
+                              on_checkpoint=lambda progress: print(format_report(progress), flush=True))
+    print(format_report(report))
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+# An in-process LRU of cache entries that expire ttl seconds after they are put.  Entries are plain, JSON serializable
+# values, so a backend out of process, e.g. memcached or redis, can stand in for it by implementing the same get,
+# put, delete and clear methods.  #get returns a (found, value) pair.
+class TTLCache(object):
+    def __init__(self, max_size=1024, ttl=300, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires <= self.clock():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            return True, value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class CacheStats(object):
+    COUNTERS = ('hits', 'misses', 'validations', 'invalidations')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def record(self, counter):
+        with self.lock:
+            self.counts[counter] += 1
+
+    def reset(self):
+        with self.lock:
+            self.counts = dict.fromkeys(self.COUNTERS, 0)
+
+    def as_dict(self):
+        with self.lock:
+            stats = dict(self.counts)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,77 @@
+from concurrent.futures import Future
+import json
+import threading
+from pynamodb.connection import TableConnection
+
+
+# Concurrent calls with the same key share one call of the first caller's function and its result, or its error.
+# A call made after the shared call completed starts a new one, results are never cached.
+class SingleFlight(object):
+    def __init__(self):
+        self.in_flight = dict()
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, function):
+        with self.lock:
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self.in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not owner:
+            return future.result()
+        try:
+            result = function()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+
+single_flight = SingleFlight()
+
+
+# Condition objects, keys and projections are reduced to a hashable form for the single flight key.
+def request_key(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, 'serialize') and callable(value.serialize):
+        names, values = dict(), dict()
+        expression = value.serialize(names, values)
+        return expression, json.dumps(names, sort_keys=True), json.dumps(values, sort_keys=True)
+    if isinstance(value, (list, tuple)):
+        return tuple(request_key(item) for item in value)
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+# A table connection whose eventually consistent GetItem and Query calls are coalesced, keyed by the table and every
+# parameter of the request.  Callers share the response, which is only read when it is turned into records.
+# Consistent reads are never shared, one that started before a write could miss it.
+class CoalescingTableConnection(TableConnection):
+    def __init__(self, table_name, single_flight=single_flight, **kwargs):
+        super().__init__(table_name, **kwargs)
+        self.single_flight = single_flight
+
+    def get_item(self, hash_key, range_key=None, consistent_read=False, attributes_to_get=None):
+        get_item = super().get_item
+        if consistent_read:
+            return get_item(hash_key, range_key=range_key, consistent_read=True, attributes_to_get=attributes_to_get)
+        key = ('GetItem', self.table_name, hash_key, range_key, request_key(attributes_to_get))
+        return self.single_flight.do(
+            key, lambda: get_item(hash_key, range_key=range_key, attributes_to_get=attributes_to_get))
+
+    def query(self, hash_key, consistent_read=False, **kwargs):
+        query = super().query
+        if consistent_read:
+            return query(hash_key, consistent_read=True, **kwargs)
+        parameters = tuple(sorted((name, request_key(value)) for (name, value) in kwargs.items()))
+        key = ('Query', self.table_name, hash_key) + parameters
+        return self.single_flight.do(key, lambda: query(hash_key, **kwargs))
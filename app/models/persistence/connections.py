@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+import threading
+from app.models.persistence.coalescing import CoalescingTableConnection
+from botocore.vendored import requests
+from pynamodb.connection import Connection
+from pynamodb.exceptions import TableDoesNotExist
+
+ConnectionSettings = namedtuple('ConnectionSettings', [
+    'region', 'host', 'pool_size', 'connect_timeout_seconds', 'read_timeout_seconds', 'max_retry_attempts',
+    'base_backoff_ms', 'keep_alive', 'aws_access_key_id', 'aws_secret_access_key'])
+
+
+# The connection settings of a model's Meta, see BaseMeta.  A Meta without them, e.g. of a model that does not use
+# BaseMeta, falls back to the pynamodb defaults with a single timeout for connect and read.
+def connection_settings(meta):
+    timeout = getattr(meta, 'request_timeout_seconds', None)
+    return ConnectionSettings(
+        region=meta.region, host=meta.host, pool_size=getattr(meta, 'pool_size', 10),
+        connect_timeout_seconds=getattr(meta, 'connect_timeout_seconds', timeout),
+        read_timeout_seconds=getattr(meta, 'read_timeout_seconds', timeout),
+        max_retry_attempts=meta.max_retry_attempts, base_backoff_ms=meta.base_backoff_ms,
+        keep_alive=getattr(meta, 'keep_alive', True), aws_access_key_id=meta.aws_access_key_id,
+        aws_secret_access_key=meta.aws_secret_access_key)
+
+
+# HTTP sessions with a connection pool of pool_size connections per host.  Requests are not retried by the adapter,
+# the pynamodb connection retries them with backoff up to max_retry_attempts.  Without keep alive every request asks
+# for its connection to be closed.
+def session_class(pool_size, keep_alive):
+    class PooledSession(requests.Session):
+        def __init__(self):
+            super().__init__()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            self.mount('https://', adapter)
+            self.mount('http://', adapter)
+            if not keep_alive:
+                self.headers['Connection'] = 'close'
+    return PooledSession
+
+
+# Model classes with the same connection settings share one pynamodb connection, so they share its HTTP connection
+# pool, its botocore client and its cache of table descriptions.  Every model class with a table registers itself
+# when it is defined, see BaseModel, and #warm_up creates the clients and describes the tables before the first
+# request, so that request pays for neither.
+class ConnectionRegistry(object):
+    def __init__(self):
+        self.connections = dict()
+        self.model_classes = dict()
+        self.lock = threading.Lock()
+
+    def register(self, model_class):
+        with self.lock:
+            self.model_classes[model_class.Meta.table_name] = model_class
+
+    def connection(self, settings):
+        with self.lock:
+            connection = self.connections.get(settings)
+            if connection is None:
+                connection = Connection(
+                    region=settings.region, host=settings.host,
+                    session_cls=session_class(settings.pool_size, settings.keep_alive),
+                    request_timeout_seconds=(settings.connect_timeout_seconds, settings.read_timeout_seconds),
+                    max_retry_attempts=settings.max_retry_attempts, base_backoff_ms=settings.base_backoff_ms)
+                if settings.aws_access_key_id and settings.aws_secret_access_key:
+                    connection.session.set_credentials(settings.aws_access_key_id, settings.aws_secret_access_key)
+                self.connections[settings] = connection
+            return connection
+
+    def table_connection(self, model_class):
+        table_connection = CoalescingTableConnection(model_class.Meta.table_name)
+        table_connection.connection = self.connection(connection_settings(model_class.Meta))
+        self.register(model_class)
+        return table_connection
+
+    # Describes the tables of the model classes, by default of every registered model, with up to connections
+    # concurrent requests so as many pooled connections are opened.  Each model keeps its table's description, so its
+    # first request does not describe the table again.  Returns the names of the tables that do not exist.
+    def warm_up(self, model_classes=None, connections=1):
+        if model_classes is None:
+            with self.lock:
+                model_classes = list(self.model_classes.values())
+        for connection in {id(connection): connection for connection in
+                           (model_class._get_connection().connection for model_class in model_classes)}.values():
+            create_client(connection)
+
+        def describe(model_class):
+            table_connection = model_class._get_connection()
+            try:
+                meta_table = table_connection.connection.get_meta_table(table_connection.table_name, refresh=True)
+            except TableDoesNotExist:
+                return table_connection.table_name
+            model_class._meta_table = meta_table
+            return None
+        with ThreadPoolExecutor(max_workers=max(1, connections)) as executor:
+            return [name for name in executor.map(describe, model_classes) if name is not None]
+
+    def clear(self):
+        with self.lock:
+            self.connections.clear()
+            self.model_classes.clear()
+
+
+connection_registry = ConnectionRegistry()
+
+
+# A pynamodb connection creates its botocore client, and loads the service model and credentials, on the first read
+# of its client property.
+def create_client(connection):
+    return connection.client
@@ -1,6 +1,7 @@
 from app.models.persistence.base import BaseMeta, BaseModel
 from app.models.persistence.mixins.timestamps import TimeStampableMixin
 from pynamodb.attributes import ListAttribute, MapAttribute, UnicodeAttribute, UTCDateTimeAttribute
+from pynamodb.constants import STREAM_NEW_IMAGE
 
 
 class EventReferenceModel(MapAttribute):
@@ -29,6 +30,7 @@ class EventReferenceModel(MapAttribute):
 class EventDataModel(TimeStampableMixin, BaseModel):
     class Meta(BaseMeta):
         table_name = 'events'
+        stream_view_type = STREAM_NEW_IMAGE
 
     event_id = UnicodeAttribute(hash_key=True)
     hares = ListAttribute()
@@ -42,8 +44,7 @@ class EventDataModel(TimeStampableMixin, BaseModel):
     trails = ListAttribute(null=True)
 
     def to_ref(self):
-        valid_keys = [key for key in EventReferenceModel.__dict__.keys() if not key.startswith('_')]
-        return EventReferenceModel(**{k: v for k, v in self.attributes().items() if k in valid_keys})
+        return super().to_ref(EventReferenceModel)
 
 
 class HareEventDataModel(TimeStampableMixin, BaseModel):
@@ -55,12 +56,29 @@ class HareEventDataModel(TimeStampableMixin, BaseModel):
     start_time = UTCDateTimeAttribute(range_key=True)
     event_ref = EventReferenceModel()
 
+    # Streams the embedded event references in start time order, see BaseModel#query_attribute.
+    @classmethod
+    def events(cls, hasher_id, range_key_condition=None, scan_index_forward=None, limit=None, page_size=None,
+               cursor=None):
+        return cls.query_attribute(hasher_id, 'event_ref', range_key_condition=range_key_condition,
+                                   scan_index_forward=scan_index_forward, limit=limit, page_size=page_size,
+                                   cursor=cursor)
+
 
 class KennelEventDataModel(TimeStampableMixin, BaseModel):
     class Meta(BaseMeta):
         table_name = 'kennel_events'
+        stream_view_type = STREAM_NEW_IMAGE
 
     kennel_id = UnicodeAttribute(hash_key=True)
     event_id = UnicodeAttribute()
     start_time = UTCDateTimeAttribute(range_key=True)
     event_ref = EventReferenceModel()
+
+    # Streams the embedded event references in start time order, see BaseModel#query_attribute.
+    @classmethod
+    def events(cls, kennel_id, range_key_condition=None, scan_index_forward=None, limit=None, page_size=None,
+               cursor=None):
+        return cls.query_attribute(kennel_id, 'event_ref', range_key_condition=range_key_condition,
+                                   scan_index_forward=scan_index_forward, limit=limit, page_size=page_size,
+                                   cursor=cursor)
@@ -0,0 +1,86 @@
+import math
+
+# Geohash cell arithmetic for proximity searches.  The declared geohash package only encodes and decodes, and does not
+# import on Python 3, so encoding, decoding and neighbouring cells are implemented here.
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+BASE32_VALUES = {character: value for (value, character) in enumerate(BASE32)}
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def encode(latitude, longitude, precision=12):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    characters = list()
+    bits, value, even = 0, 0, True
+    while len(characters) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            characters.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(characters)
+
+
+# Returns the centre of the cell and its half height and half width, in degrees.
+def decode_exactly(geohash):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for character in geohash:
+        value = BASE32_VALUES[character]
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if (value >> shift) & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return ((lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2,
+            (lat_range[1] - lat_range[0]) / 2, (lon_range[1] - lon_range[0]) / 2)
+
+
+# The cell itself and the eight cells around it, without duplicates near the poles.  Longitudes wrap at the
+# antimeridian.
+def cell_and_neighbours(geohash):
+    latitude, longitude, lat_error, lon_error = decode_exactly(geohash)
+    cells = list()
+    for lat_step in (0, 1, -1):
+        neighbour_latitude = latitude + 2 * lat_error * lat_step
+        if abs(neighbour_latitude) > 90:
+            continue
+        for lon_step in (0, 1, -1):
+            neighbour_longitude = (longitude + 2 * lon_error * lon_step + 180) % 360 - 180
+            cell = encode(neighbour_latitude, neighbour_longitude, len(geohash))
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def cell_size_km(precision, latitude=0.0):
+    _, _, lat_error, lon_error = decode_exactly(encode(latitude, 0.0, precision))
+    return 2 * lat_error * KM_PER_DEGREE, 2 * lon_error * KM_PER_DEGREE * math.cos(math.radians(latitude))
+
+
+# The finest of the precisions whose cells are at least radius_km across at the latitude, so a circle of that radius
+# around any point of a cell lies within the cell and its neighbours.  None when even the coarsest cells are too small.
+def precision_for_radius(radius_km, latitude, precisions):
+    for precision in sorted(precisions, reverse=True):
+        if min(cell_size_km(precision, latitude)) >= radius_km:
+            return precision
+    return None
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
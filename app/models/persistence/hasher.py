@@ -1,7 +1,11 @@
 from app.models.persistence import AlreadyExists
 from app.models.persistence.base import BaseMeta, BaseModel
+from app.models.persistence.mixins.cached_get import CachedGetMixin
 from app.models.persistence.mixins.timestamps import TimeStampableMixin
+from app.models.persistence.mixins.unique_key import UniqueKeyMixin
+from app.models.persistence.pagination import decode_cursor, QueryStream
 from pynamodb.attributes import JSONAttribute, MapAttribute, UnicodeAttribute
+from pynamodb.exceptions import UpdateError
 from pynamodb.indexes import AllProjection, GlobalSecondaryIndex
 
 
@@ -27,6 +31,19 @@ class HashNameIndex(GlobalSecondaryIndex):
     searchable_mother_kennel_name = UnicodeAttribute(range_key=True)
 
 
+# Finds the hashers of a mother kennel, e.g. to rewrite their mother kennel reference when the kennel is renamed.
+# Hashers written before mother_kennel_id existed are missing from it until HasherDataModel#backfill_mother_kennel_id.
+class HasherMotherKennelIndex(GlobalSecondaryIndex):
+    class Meta(BaseMeta):
+        index_name = 'hasher_mother_kennel_index'
+        read_capacity_units = 1
+        write_capacity_units = 1
+        projection = AllProjection()
+
+    mother_kennel_id = UnicodeAttribute(hash_key=True)
+    hasher_id = UnicodeAttribute(range_key=True)
+
+
 class HasherReferenceModel(MapAttribute):
     hasher_id = UnicodeAttribute()
     hash_name = UnicodeAttribute()
@@ -45,39 +62,36 @@ class HasherReferenceModel(MapAttribute):
         return self.__dict__ == other.__dict__
 
 
-class HasherDataModel(TimeStampableMixin, BaseModel):
-    __before_save_hooks__ = ['set_searchable_hash_name', 'set_searchable_mother_kennel_name']
-    __on_init_hooks__ = ['set_searchable_hash_name', 'set_searchable_mother_kennel_name']
+# Hashers are not versioned, so a cached hasher is not validated against the table and cache_ttl bounds how long a
+# write from another process goes unseen, see CachedGetMixin.
+class HasherDataModel(CachedGetMixin, TimeStampableMixin, UniqueKeyMixin, BaseModel):
+    cache_ttl = 30
+    __unique_key_fields__ = ['searchable_hash_name', 'searchable_mother_kennel_name']
+    __before_save_hooks__ = ['set_searchable_hash_name', 'set_searchable_mother_kennel_name', 'set_mother_kennel_id']
+    __meta_attributes__ = ['hasher_id', 'searchable_hash_name', 'searchable_mother_kennel_name', 'mother_kennel_id']
+    __on_init_hooks__ = ['set_searchable_hash_name', 'set_searchable_mother_kennel_name', 'set_mother_kennel_id']
     __update_action_hooks__ = {'set': {'hash_name': 'set_searchable_hash_name_action',
                                        'mother_kennel': 'set_searchable_mother_kennel_action'}}
 
     class Meta(BaseMeta):
         table_name = 'hashers'
 
-    def __init__(self, hash_key=None, range_key=None, **attributes):
-        meta_attributes = ['hasher_id', 'searchable_hash_name', 'searchable_mother_hash_name']
-        self.assign_or_extend('__meta_attributes__', meta_attributes)
-        self.assign_or_extend('before_save_hooks', __class__.__before_save_hooks__)
-        self.assign_or_extend('on_init_hooks', __class__.__on_init_hooks__)
-        self.assign_or_update('update_action_hooks', __class__.__update_action_hooks__)
-        super().__init__(hash_key, range_key, **attributes)
-
     hasher_id = UnicodeAttribute(hash_key=True)
     contact_info = JSONAttribute(null=True)
     hash_name = UnicodeAttribute()
     searchable_hash_name = UnicodeAttribute()
     mother_kennel = HasherMotherKennelAttribute()
     searchable_mother_kennel_name = UnicodeAttribute()
+    mother_kennel_id = UnicodeAttribute(null=True)
     real_name = UnicodeAttribute(null=True)
     user = UnicodeAttribute(null=True)
     hash_name_index = HashNameIndex()
+    mother_kennel_index = HasherMotherKennelIndex()
 
-    def save(self, condition=None, conditional_operator=None, **expected_values):
-        matches = self.matching_records(self)
-        if matches:
+    def raise_if_duplicate(self):
+        if next(self.stream_matching_records(self), None) is not None:
             msg = f'Record with hash name {self.hash_name} with mother kennel {self.mother_kennel} already exists'
             raise AlreadyExists(msg)
-        super().save(condition=condition, conditional_operator=conditional_operator, **expected_values)
 
     def set_searchable_hash_name(self):
         self.searchable_hash_name = self.searchable_value(self.hash_name)
@@ -89,7 +103,12 @@ class HasherDataModel(TimeStampableMixin, BaseModel):
         self.searchable_mother_kennel_name = self.searchable_value(self.mother_kennel.name)
 
     def set_searchable_mother_kennel_action(self, value):
-        return [HasherDataModel.searchable_mother_kennel_name.set(self.searchable_value(value['name']))]
+        return [HasherDataModel.searchable_mother_kennel_name.set(self.searchable_value(value['name'])),
+                HasherDataModel.mother_kennel_id.set(value['kennel_id'])]
+
+    def set_mother_kennel_id(self):
+        if self.mother_kennel is not None:
+            self.mother_kennel_id = self.mother_kennel.kennel_id
 
     def to_ref(self):
         return HasherReferenceModel(hasher_id=self.hasher_id, hash_name=self.hash_name)
@@ -105,19 +124,45 @@ class HasherDataModel(TimeStampableMixin, BaseModel):
     # disambiguate this situation, if an existing hash record has a user reference, then it should all work out.
     @classmethod
     def matching_records(cls, record, filter_self=True):
+        return list(cls.stream_matching_records(record, filter_self=filter_self))
+
+    # The stream variant of #matching_records, see QueryStream.
+    @classmethod
+    def stream_matching_records(cls, record, filter_self=True, page_size=None, cursor=None):
         query_result = cls.hash_name_index.query(
-            record.searchable_hash_name, cls.searchable_mother_kennel_name == record.searchable_mother_kennel_name)
+            record.searchable_hash_name, cls.searchable_mother_kennel_name == record.searchable_mother_kennel_name,
+            page_size=page_size, last_evaluated_key=decode_cursor(cursor))
         record_attrs = record.attributes()
-        results = [result for result in query_result]
-        results = [result for result in results if cls._record_match(result.attributes(), record_attrs)]
-        if filter_self:
-            results = [result for result in results if result.hasher_id != record.hasher_id]
-        return results
+
+        def matches(result):
+            if filter_self and result.hasher_id == record.hasher_id:
+                return False
+            return cls._record_match(result.attributes(), record_attrs)
+        return QueryStream(query_result, predicate=matches)
 
     @classmethod
     def record_exists(cls, record):
         return cls.count(record.hasher_id) > 0
 
+    # Sets mother_kennel_id on the hashers stored without it, so they appear in the mother kennel index.  Each hasher
+    # is updated conditional on it still existing, a hasher deleted in the meantime is skipped.  Returns the number of
+    # hashers updated, the throttle paces the writes, see CapacityThrottle.
+    @classmethod
+    def backfill_mother_kennel_id(cls, throttle=None):
+        count = 0
+        for record in cls.scan(cls.mother_kennel_id.does_not_exist() & cls.mother_kennel.exists()):
+            if throttle is not None:
+                throttle.acquire()
+            try:
+                record.update_changes({'mother_kennel_id': record.mother_kennel.kennel_id},
+                                      condition=cls.hasher_id.exists())
+            except UpdateError as e:
+                if cls._error_code(e) == 'ConditionalCheckFailedException':
+                    continue
+                raise
+            count += 1
+        return count
+
     @staticmethod
     def _record_match(a, b):
         try:
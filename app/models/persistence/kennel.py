@@ -1,10 +1,15 @@
 from app.models.persistence import AlreadyExists
-from app.models.persistence.base import BaseMeta, BaseModel
+from app.models.persistence.base import BaseMeta, BaseModel, publish_change
+from app.models.persistence.mixins.cached_get import CachedGetMixin
 from app.models.persistence.mixins.timestamps import TimeStampableMixin
+from app.models.persistence.mixins.unique_key import UniqueKeyMixin
 from app.models.persistence.mixins.version import VersionMixin
+from app.models.persistence.pagination import decode_cursor, QueryStream
 from app.models.persistence.hasher import HasherReferenceModel
 from pynamodb.attributes import JSONAttribute, ListAttribute, MapAttribute, NumberAttribute, UnicodeAttribute, \
     UTCDateTimeAttribute
+from pynamodb.constants import ATTRIBUTES, STREAM_NEW_IMAGE, STRING_SHORT, UPDATED_NEW
+from pynamodb.exceptions import UpdateError
 from pynamodb.indexes import AllProjection, GlobalSecondaryIndex
 
 
@@ -34,22 +39,19 @@ class KennelAcronymIndex(GlobalSecondaryIndex):
 # the kennel name, for case insensitve searching, but any update to the
 #  kennel name requires that lower_name be automatically updated.
 # This is a price to pay for using atomic updates.
-class KennelDataModel(TimeStampableMixin, VersionMixin, BaseModel):
+class KennelDataModel(CachedGetMixin, TimeStampableMixin, VersionMixin, UniqueKeyMixin, BaseModel):
+    __unique_key_fields__ = ['searchable_name']
     __before_save_hooks__ = ['set_searchable_name', 'set_searchable_acronym']
+    __meta_attributes__ = ['kennel_id', 'searchable_name', 'searchable_acronym']
     __on_init_hooks__ = ['set_searchable_name', 'set_searchable_acronym']
     __update_action_hooks__ = {'set': {'name': 'set_searchable_name_action',
                                        'acronym': 'set_searchable_acronym_action'}}
 
+    FIRST_TRAIL_NUMBER = 1
+
     class Meta(BaseMeta):
         table_name = 'kennels'
-
-    def __init__(self, hash_key=None, range_key=None, **attributes):
-        meta_attributes = ['kennel_id', 'searchable_name', 'searchable_acronym']
-        self.assign_or_extend('__meta_attributes__', meta_attributes)
-        self.assign_or_extend('on_init_hooks', __class__.__on_init_hooks__)
-        self.assign_or_extend('before_save_hooks', __class__.__before_save_hooks__)
-        self.assign_or_update('update_action_hooks', __class__.__update_action_hooks__)
-        super().__init__(hash_key, range_key, **attributes)
+        stream_view_type = STREAM_NEW_IMAGE
 
     kennel_id = UnicodeAttribute(hash_key=True)
     name = UnicodeAttribute()
@@ -66,12 +68,42 @@ class KennelDataModel(TimeStampableMixin, VersionMixin, BaseModel):
     name_index = KennelNameIndex()
     acronym_index = KennelAcronymIndex()
 
-    def save(self, condition=None, conditional_operator=None, **expected_values):
-        matches = self.matching_records_by_name(self)
-        if matches:
-            msg = f'Record with name {self.name} already exists.'
-            raise AlreadyExists(msg)
-        super().save(condition=condition, conditional_operator=conditional_operator, **expected_values)
+    # next_trail_number holds the next unallocated trail number.  Allocation is a single UpdateItem that adds the
+    # size of the block and returns the new value, so concurrent allocations never hand out the same number and bulk
+    # imports can reserve a whole block of numbers at once.  The allocation bumps the version, so a record read
+    # before it can no longer be saved over the counter, see VersionMixin.  A record passed in takes the new counter
+    # and version.
+    @classmethod
+    def allocate_trail_numbers(cls, kennel_id, count=1, record=None):
+        hash_key = cls._serialize_keys(kennel_id)[0]
+        try:
+            data = cls._get_connection().update_item(hash_key, actions=cls.trail_number_actions(count),
+                                                     condition=cls.kennel_id.exists(), return_values=UPDATED_NEW)
+        except UpdateError as e:
+            if cls._error_code(e) == 'ConditionalCheckFailedException':
+                raise cls.DoesNotExist()
+            raise
+        publish_change('MODIFY', cls, {cls.kennel_id.attr_name: {STRING_SHORT: hash_key}})
+        attributes = data[ATTRIBUTES]
+        next_trail_number = cls.next_trail_number.deserialize(
+            cls.next_trail_number.get_value(attributes[cls.next_trail_number.attr_name]))
+        if record is not None:
+            record.next_trail_number = next_trail_number
+            record.version = cls.version.deserialize(cls.version.get_value(attributes[cls.version.attr_name]))
+        return range(next_trail_number - count, next_trail_number)
+
+    # Records written before versioning have no version, the first allocation gives them one.
+    @classmethod
+    def trail_number_actions(cls, count=1):
+        if count < 1:
+            raise ValueError('At least one trail number must be allocated')
+        next_trail_number = (cls.next_trail_number | cls.FIRST_TRAIL_NUMBER) + count
+        return [cls.next_trail_number.set(next_trail_number), cls.version.add(1),
+                cls.generate_timestamp_update_action()]
+
+    def raise_if_duplicate(self):
+        if next(self.stream_matching_records_by_name(self), None) is not None:
+            raise AlreadyExists(f'Record with name {self.name} already exists.')
 
     def set_searchable_acronym(self):
         if self.acronym is None:
@@ -94,24 +126,40 @@ class KennelDataModel(TimeStampableMixin, VersionMixin, BaseModel):
 
     @classmethod
     def matching_records(cls, record, filter_self=True):
+        return list(cls.stream_matching_records(record, filter_self=filter_self))
+
+    @classmethod
+    def matching_records_by_name(cls, record, filter_self=True):
+        return list(cls.stream_matching_records_by_name(record, filter_self=filter_self))
+
+    # The stream variants of the matching record queries, see QueryStream.  A uniqueness check stops at the first match
+    # and a listing can resume from the stream's cursor.
+    @classmethod
+    def stream_matching_records(cls, record, filter_self=True, page_size=None, cursor=None):
         if record.searchable_name is None:
             raise ValueError('searchable name cannot be None.')
-        query_result = cls.name_index.query(record.searchable_name)
+        query_result = cls.name_index.query(record.searchable_name, page_size=page_size,
+                                            last_evaluated_key=decode_cursor(cursor))
         record_attrs = record.attributes()
-        results = [result for result in query_result if cls._record_match(result.attributes(), record_attrs)]
-        if filter_self:
-            results = [result for result in results if result.kennel_id != record.kennel_id]
-        return results
+
+        def matches(result):
+            if filter_self and result.kennel_id == record.kennel_id:
+                return False
+            return cls._record_match(result.attributes(), record_attrs)
+        return QueryStream(query_result, predicate=matches)
 
     @classmethod
-    def matching_records_by_name(cls, record, filter_self=True):
+    def stream_matching_records_by_name(cls, record, filter_self=True, page_size=None, cursor=None):
         if record.searchable_name is None:
             raise ValueError('searchable name cannot be None.')
-        query_result = cls.name_index.query(record.searchable_name)
-        results = [result for result in query_result if result.searchable_name == record.searchable_name]
-        if filter_self:
-            results = [result for result in results if result.kennel_id != record.kennel_id]
-        return results
+        query_result = cls.name_index.query(record.searchable_name, page_size=page_size,
+                                            last_evaluated_key=decode_cursor(cursor))
+
+        def matches(result):
+            if filter_self and result.kennel_id == record.kennel_id:
+                return False
+            return result.searchable_name == record.searchable_name
+        return QueryStream(query_result, predicate=matches)
 
     @classmethod
     def record_exists(cls, record):
@@ -159,6 +207,7 @@ class KennelReferenceModel(MapAttribute):
 class KennelMemberDataModel(TimeStampableMixin, VersionMixin, BaseModel):
     class Meta(BaseMeta):
         table_name = 'kennel_members'
+        stream_view_type = STREAM_NEW_IMAGE
 
     kennel_id = UnicodeAttribute(hash_key=True)
     kennel_ref = KennelReferenceModel()
@@ -168,5 +217,28 @@ class KennelMemberDataModel(TimeStampableMixin, VersionMixin, BaseModel):
     hasher_membership_index = HasherMembershipIndex()
 
     @classmethod
-    def members(cls, kennel_id):
-        return [result.hasher_ref for result in cls.query(kennel_id)]
+    def members(cls, kennel_id, page_size=None):
+        return list(cls.stream_members(kennel_id, page_size=page_size))
+
+    # Streams the hasher references of a kennel's members, ordered by hasher id, see BaseModel#query_attribute.
+    @classmethod
+    def stream_members(cls, kennel_id, page_size=None, cursor=None):
+        return cls.query_attribute(kennel_id, 'hasher_ref', page_size=page_size, cursor=cursor)
+
+    @classmethod
+    def memberships(cls, hasher_id, page_size=None):
+        return list(cls.stream_memberships(hasher_id, page_size=page_size))
+
+    # Streams the kennel references of a hasher's memberships, ordered by kennel id.
+    @classmethod
+    def stream_memberships(cls, hasher_id, page_size=None, cursor=None):
+        return cls.query_attribute(hasher_id, 'kennel_ref', index_name=HasherMembershipIndex.Meta.index_name,
+                                   page_size=page_size, cursor=cursor)
+
+    @classmethod
+    def is_member(cls, kennel_id, hasher_id):
+        try:
+            cls.get(kennel_id, hasher_id, consistent_read=True, attributes_to_get=['kennel_id', 'hasher_id'])
+        except cls.DoesNotExist:
+            return False
+        return True
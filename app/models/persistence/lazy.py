@@ -0,0 +1,47 @@
+import importlib
+
+
+# A stand-in for a class that imports the class's module on first use.  The persistence models pull in pynamodb and
+# botocore, which dominate the import time of the logic modules, so the logic modules refer to them through these and
+# a process only pays for the import when it first touches the database.  Attribute access, calls, isinstance and
+# issubclass are forwarded to the class.
+class LazyClass(object):
+    __slots__ = ('_module_name', '_class_name', '_target')
+
+    def __init__(self, module_name, class_name):
+        object.__setattr__(self, '_module_name', module_name)
+        object.__setattr__(self, '_class_name', class_name)
+        object.__setattr__(self, '_target', None)
+
+    def resolve(self):
+        target = self._target
+        if target is None:
+            target = getattr(importlib.import_module(self._module_name), self._class_name)
+            object.__setattr__(self, '_target', target)
+        return target
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.resolve(), name, value)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __instancecheck__(self, instance):
+        return isinstance(instance, self.resolve())
+
+    def __subclasscheck__(self, subclass):
+        return issubclass(subclass, self.resolve())
+
+    def __eq__(self, other):
+        if isinstance(other, LazyClass):
+            other = other.resolve()
+        return self.resolve() is other
+
+    def __hash__(self):
+        return hash(self.resolve())
+
+    def __repr__(self):
+        return f'<lazy {self._module_name}.{self._class_name}>'
@@ -1,7 +1,9 @@
 from app.models.persistence.base import BaseMeta, BaseModel
 from app.models.persistence.event import EventReferenceModel
+from app.models.persistence.mixins.geohash_buckets import GeohashBucketsMixin
 from app.models.persistence.mixins.timestamps import TimeStampableMixin
 from pynamodb.attributes import MapAttribute, NumberAttribute, UnicodeAttribute, UTCDateTimeAttribute
+from pynamodb.indexes import AllProjection, GlobalSecondaryIndex
 
 
 class LocationReferenceModel(MapAttribute):
@@ -29,7 +31,40 @@ class LocationReferenceModel(MapAttribute):
         return self.__dict__ == other.__dict__
 
 
-class LocationDataModel(TimeStampableMixin, BaseModel):
+class LocationGeohash3Index(GlobalSecondaryIndex):
+    class Meta(BaseMeta):
+        index_name = 'location_geohash_3_index'
+        read_capacity_units = 1
+        write_capacity_units = 1
+        projection = AllProjection()
+
+    geohash_3 = UnicodeAttribute(hash_key=True)
+    searchable_name = UnicodeAttribute(range_key=True)
+
+
+class LocationGeohash4Index(GlobalSecondaryIndex):
+    class Meta(BaseMeta):
+        index_name = 'location_geohash_4_index'
+        read_capacity_units = 1
+        write_capacity_units = 1
+        projection = AllProjection()
+
+    geohash_4 = UnicodeAttribute(hash_key=True)
+    searchable_name = UnicodeAttribute(range_key=True)
+
+
+class LocationGeohash5Index(GlobalSecondaryIndex):
+    class Meta(BaseMeta):
+        index_name = 'location_geohash_5_index'
+        read_capacity_units = 1
+        write_capacity_units = 1
+        projection = AllProjection()
+
+    geohash_5 = UnicodeAttribute(hash_key=True)
+    searchable_name = UnicodeAttribute(range_key=True)
+
+
+class LocationDataModel(TimeStampableMixin, GeohashBucketsMixin, BaseModel):
     class Meta(BaseMeta):
         table_name = 'locations'
 
@@ -43,12 +78,51 @@ class LocationDataModel(TimeStampableMixin, BaseModel):
     postal_code = UnicodeAttribute()
     longitude = NumberAttribute()
     latitude = NumberAttribute()
+    geohash_3_index = LocationGeohash3Index()
+    geohash_4_index = LocationGeohash4Index()
+    geohash_5_index = LocationGeohash5Index()
+
+    def coordinates(self):
+        return self.latitude, self.longitude
 
     def to_ref(self):
         return super().to_ref(LocationReferenceModel)
 
 
-class EventLocationDataModel(TimeStampableMixin, BaseModel):
+class EventLocationGeohash3Index(GlobalSecondaryIndex):
+    class Meta(BaseMeta):
+        index_name = 'event_location_geohash_3_index'
+        read_capacity_units = 1
+        write_capacity_units = 1
+        projection = AllProjection()
+
+    geohash_3 = UnicodeAttribute(hash_key=True)
+    start_time = UTCDateTimeAttribute(range_key=True)
+
+
+class EventLocationGeohash4Index(GlobalSecondaryIndex):
+    class Meta(BaseMeta):
+        index_name = 'event_location_geohash_4_index'
+        read_capacity_units = 1
+        write_capacity_units = 1
+        projection = AllProjection()
+
+    geohash_4 = UnicodeAttribute(hash_key=True)
+    start_time = UTCDateTimeAttribute(range_key=True)
+
+
+class EventLocationGeohash5Index(GlobalSecondaryIndex):
+    class Meta(BaseMeta):
+        index_name = 'event_location_geohash_5_index'
+        read_capacity_units = 1
+        write_capacity_units = 1
+        projection = AllProjection()
+
+    geohash_5 = UnicodeAttribute(hash_key=True)
+    start_time = UTCDateTimeAttribute(range_key=True)
+
+
+class EventLocationDataModel(TimeStampableMixin, GeohashBucketsMixin, BaseModel):
     class Meta(BaseMeta):
         table_name = 'event_locations'
 
@@ -56,3 +130,23 @@ class EventLocationDataModel(TimeStampableMixin, BaseModel):
     start_time = UTCDateTimeAttribute(range_key=True)
     location_ref = LocationReferenceModel()
     event_ref = EventReferenceModel()
+    geohash_3_index = EventLocationGeohash3Index()
+    geohash_4_index = EventLocationGeohash4Index()
+    geohash_5_index = EventLocationGeohash5Index()
+
+    def coordinates(self):
+        return self.location_ref.latitude, self.location_ref.longitude
+
+    # Events within radius_km of the point that start between start and end, nearest first, see
+    # GeohashBucketsMixin#near.
+    @classmethod
+    def events_near(cls, latitude, longitude, radius_km, start=None, end=None, limit=None):
+        if start is not None and end is not None:
+            condition = cls.start_time.between(start, end)
+        elif start is not None:
+            condition = cls.start_time >= start
+        elif end is not None:
+            condition = cls.start_time <= end
+        else:
+            condition = None
+        return cls.near(latitude, longitude, radius_km, range_key_condition=condition, limit=limit)
@@ -0,0 +1,109 @@
+import threading
+import time
+from app.models.persistence.base import BaseModel
+from app.models.persistence.cache import CacheStats, TTLCache
+from pynamodb.constants import ITEM
+
+
+# This mixin makes eventually consistent gets of whole records read through a cache, see TTLCache for the backend
+# interface.  Entries are the raw items, every hit builds a new record.  Writes made through the persistence models,
+# including transactions, invalidate the entry of the record they wrote, see base.publish_change.  A get or a
+# validation that raced with an invalidation does not fill the cache.  For versioned models an entry older than
+# cache_validate_after seconds is checked against the stored version with a GetItem of the version alone before it is
+# served, which catches writes from other processes.  Models without a version have no such check, a write from
+# another process is only seen once the entry expires, so they set a cache_ttl no longer than the staleness they
+# tolerate.
+# Consistent reads and projections always go to the table.
+class CachedGetMixin(BaseModel):
+    observes_changes = True
+    cache_validate_after = 30
+    cache_ttl = 300
+    entity_cache = None
+    cache_stats = None
+    _cache_generation_ = 0
+    _cache_lock_ = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.entity_cache = TTLCache(ttl=cls.cache_ttl)
+        cls.cache_stats = CacheStats()
+        cls._cache_generation_ = 0
+        cls._cache_lock_ = threading.Lock()
+
+    @classmethod
+    def use_cache(cls, entity_cache):
+        cls.entity_cache = entity_cache
+
+    @classmethod
+    def cache_statistics(cls):
+        return cls.cache_stats.as_dict()
+
+    @classmethod
+    def get(cls, hash_key, range_key=None, consistent_read=False, attributes_to_get=None):
+        if consistent_read or attributes_to_get is not None or cls.entity_cache is None:
+            return super().get(hash_key, range_key=range_key, consistent_read=consistent_read,
+                               attributes_to_get=attributes_to_get)
+        hash_key, range_key = cls._serialize_keys(hash_key, range_key)
+        key = cls.cache_key(hash_key, range_key)
+        found, entry = cls.entity_cache.get(key)
+        if found and cls._cache_entry_current(key, entry, hash_key, range_key):
+            cls.cache_stats.record('hits')
+            return cls.from_raw_data(entry['item'])
+        cls.cache_stats.record('misses')
+        generation = cls._cache_generation_
+        item = cls._get_connection().get_item(hash_key, range_key=range_key).get(ITEM)
+        if item is None:
+            raise cls.DoesNotExist()
+        with cls._cache_lock_:
+            if generation == cls._cache_generation_:
+                cls.entity_cache.put(key, cls._cache_entry(item))
+        return cls.from_raw_data(item)
+
+    @classmethod
+    def cache_key(cls, hash_key, range_key=None):
+        return '#'.join(str(key) for key in (cls.Meta.table_name, hash_key, range_key) if key is not None)
+
+    # Takes the keys in the attribute value format, as the change listeners are given them.
+    @classmethod
+    def invalidate_cached(cls, keys):
+        meta_data = cls._get_meta_data()
+        hash_key = next(iter(keys[meta_data.hash_keyname].values()))
+        range_key = None
+        if meta_data.range_keyname is not None:
+            range_key = next(iter(keys[meta_data.range_keyname].values()))
+        with cls._cache_lock_:
+            cls._cache_generation_ += 1
+            if cls.entity_cache is not None:
+                cls.entity_cache.delete(cls.cache_key(hash_key, range_key))
+        cls.cache_stats.record('invalidations')
+
+    @classmethod
+    def observe_change(cls, event_name, keys):
+        cls.invalidate_cached(keys)
+
+    @classmethod
+    def delete_table(cls):
+        if cls.entity_cache is not None:
+            cls.entity_cache.clear()
+        return super().delete_table()
+
+    @classmethod
+    def _cache_entry(cls, item):
+        version = item.get('version') if 'version' in cls.get_attributes() else None
+        return {'item': item, 'version': version, 'cached_at': time.time()}
+
+    @classmethod
+    def _cache_entry_current(cls, key, entry, hash_key, range_key):
+        if entry['version'] is None or time.time() - entry['cached_at'] < cls.cache_validate_after:
+            return True
+        cls.cache_stats.record('validations')
+        generation = cls._cache_generation_
+        stored = cls._get_connection().get_item(hash_key, range_key=range_key, attributes_to_get=['version'])
+        with cls._cache_lock_:
+            if stored.get(ITEM, dict()).get('version') != entry['version']:
+                cls.entity_cache.delete(key)
+                return False
+            if generation != cls._cache_generation_:
+                return False
+            cls.entity_cache.put(key, dict(entry, cached_at=time.time()))
+        return True
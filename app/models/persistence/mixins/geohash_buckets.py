@@ -0,0 +1,85 @@
+from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from app.models.persistence import geo
+from app.models.persistence.base import BaseModel, publish_change
+from pynamodb.attributes import UnicodeAttribute
+from pynamodb.exceptions import UpdateError
+
+
+# This mixin buckets a record by the prefixes of its geohash at a few precisions, each bucket is the hash key of a
+# global secondary index the model declares as geohash_<precision>_index.  A proximity search picks the finest bucket
+# whose cells are at least as wide as the radius, queries that cell and its eight neighbours concurrently and filters
+# the records by their haversine distance.  Models implement #coordinates to give the latitude and longitude.
+class GeohashBucketsMeta(ABCMeta, type(BaseModel)):
+    pass
+
+
+class GeohashBucketsMixin(BaseModel, metaclass=GeohashBucketsMeta):
+    GEOHASH_PRECISIONS = (3, 4, 5)
+    geohash_3 = UnicodeAttribute(null=True)
+    geohash_4 = UnicodeAttribute(null=True)
+    geohash_5 = UnicodeAttribute(null=True)
+    __before_save_hooks__ = ['set_geohash_buckets']
+    __meta_attributes__ = ['geohash_3', 'geohash_4', 'geohash_5']
+
+    @abstractmethod
+    def coordinates(self):
+        pass
+
+    def set_geohash_buckets(self):
+        for precision in self.GEOHASH_PRECISIONS:
+            setattr(self, f'geohash_{precision}', self.geohash[:precision])
+
+    # Records written before the buckets existed are missing from the geohash indexes.  This scans for records without
+    # the buckets and sets only the bucket fields with an UpdateItem, conditioned on the record still existing so one
+    # deleted in the meantime is not recreated.  Returns the number of records updated, the throttle paces the
+    # writes, see CapacityThrottle.
+    @classmethod
+    def backfill_geohash_buckets(cls, throttle=None):
+        meta_data = cls._get_meta_data()
+        key_attributes = [getattr(cls, name) for name in (meta_data.hash_keyname, meta_data.range_keyname)
+                          if name is not None]
+        count = 0
+        for record in cls.scan(cls.geohash_bucket(cls.GEOHASH_PRECISIONS[-1]).does_not_exist()):
+            if throttle is not None:
+                throttle.acquire()
+            keys = [attribute.serialize(getattr(record, attribute.attr_name)) for attribute in key_attributes]
+            actions = [cls.geohash_bucket(precision).set(record.geohash[:precision])
+                       for precision in cls.GEOHASH_PRECISIONS]
+            try:
+                cls._get_connection().update_item(*keys, actions=actions, condition=key_attributes[0].exists())
+            except UpdateError as e:
+                if cls._error_code(e) == 'ConditionalCheckFailedException':
+                    continue
+                raise
+            publish_change('MODIFY', cls, {attribute.attr_name: {attribute.attr_type: key}
+                                           for (attribute, key) in zip(key_attributes, keys)})
+            count += 1
+        return count
+
+    @classmethod
+    def geohash_bucket(cls, precision):
+        return getattr(cls, f'geohash_{precision}')
+
+    @classmethod
+    def geohash_index(cls, precision):
+        return getattr(cls, f'geohash_{precision}_index')
+
+    # Returns (distance in km, record) pairs within radius_km of the point, nearest first.  The range key condition
+    # applies to the range key of the geohash indexes.
+    @classmethod
+    def near(cls, latitude, longitude, radius_km, range_key_condition=None, limit=None):
+        precision = geo.precision_for_radius(radius_km, latitude, cls.GEOHASH_PRECISIONS)
+        if precision is None:
+            raise ValueError(f'A radius of {radius_km} km is too large for a proximity search')
+        cells = geo.cell_and_neighbours(geo.encode(latitude, longitude, precision))
+        index = cls.geohash_index(precision)
+        with ThreadPoolExecutor(max_workers=len(cells)) as executor:
+            pages = list(executor.map(lambda cell: list(index.query(cell, range_key_condition)), cells))
+        results = list()
+        for record in (record for page in pages for record in page):
+            distance = geo.haversine_km(latitude, longitude, *record.coordinates())
+            if distance <= radius_km:
+                results.append((distance, record))
+        results.sort(key=lambda result: result[0])
+        return results if limit is None else results[:limit]
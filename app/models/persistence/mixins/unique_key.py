@@ -0,0 +1,127 @@
+import functools
+from app.models.persistence import AlreadyExists
+from app.models.persistence.base import BaseModel
+from app.models.persistence.transaction import TransactWrite
+from app.models.persistence.unique_key import UniqueKeyDataModel
+
+
+# This mixin enforces uniqueness of the fields listed in __unique_key_fields__ when the model's Meta enables
+# unique_key_guard.  Instead of querying a GSI before the PutItem, the record and a claim on its unique key are written
+# in one transaction, the claim is conditional on the key being unclaimed or already claimed by this record.  A key
+# released by a rename or a delete is deleted in the same transaction, on the condition that this record owns it.
+class UniqueKeyMixin(BaseModel):
+    __unique_key_fields__ = list()
+    __on_init_hooks__ = ['remember_unique_key']
+    UNIQUE_KEY_SEPARATOR = '#'
+
+    def owner_key(self):
+        args, kwargs = self._get_save_args(attributes=False, null_check=False)
+        keys = [args[0]] if kwargs.get('range_key') is None else [args[0], kwargs['range_key']]
+        return self.UNIQUE_KEY_SEPARATOR.join(str(key) for key in keys)
+
+    # Only a stored record has claimed its unique key, a new record renamed before its first save owns no claim.
+    def remember_unique_key(self):
+        self.persisted_unique_key = self.unique_key() if self.persisted and self.unique_key_guarded() else None
+
+    # Models whose uniqueness is not guarded fall back to querying for duplicates, see #raise_if_duplicate.
+    def raise_if_duplicate(self):
+        pass
+
+    def save(self, condition=None, conditional_operator=None, **expected_values):
+        if not self.unique_key_guarded():
+            self.raise_if_duplicate()
+            return super().save(condition=condition, conditional_operator=conditional_operator, **expected_values)
+        if conditional_operator is not None or expected_values:
+            raise ValueError('A unique key guarded save only supports condition expressions')
+        transaction = TransactWrite()
+        self.save_in_transaction(transaction, condition=condition)
+        transaction.commit()
+
+    def save_in_transaction(self, transaction, condition=None):
+        if not self.unique_key_guarded():
+            self.raise_if_duplicate()
+            return super().save_in_transaction(transaction, condition=condition)
+        super().save_in_transaction(transaction, condition=condition)
+        self.claim_unique_key(transaction, self.unique_key())
+
+    # A guarded record is written together with its claim, which a batch write cannot do.  Other records are checked
+    # for duplicates as a save checks them.
+    def check_batch_write(self):
+        if self.unique_key_guarded():
+            raise ValueError(f'{self.__class__.__name__} guards its unique key and cannot be batch written')
+        self.raise_if_duplicate()
+        super().check_batch_write()
+
+    def check_batch_delete(self):
+        if self.unique_key_guarded():
+            raise ValueError(f'{self.__class__.__name__} guards its unique key and cannot be batch deleted')
+        super().check_batch_delete()
+
+    def delete(self, condition=None, conditional_operator=None, **expected_values):
+        if not self.unique_key_guarded():
+            return super().delete(condition=condition, conditional_operator=conditional_operator, **expected_values)
+        if conditional_operator is not None or expected_values:
+            raise ValueError('A unique key guarded delete only supports condition expressions')
+        transaction = TransactWrite()
+        self.delete_in_transaction(transaction, condition=condition)
+        return transaction.commit()
+
+    # The claim is read first and only released when this record owns it, the delete is conditional on it still being
+    # owned by this record.  A claim owned by another record, or no claim at all, leaves the unique key as it is.
+    def delete_in_transaction(self, transaction, condition=None):
+        transaction.delete(self, condition=condition)
+        unique_key = self.unique_key() if self.persisted_unique_key is None else self.persisted_unique_key
+        owner_key = self.owner_key()
+        try:
+            claim = UniqueKeyDataModel.get(unique_key, consistent_read=True)
+        except UniqueKeyDataModel.DoesNotExist:
+            claim = None
+        if claim is not None and claim.owner_key == owner_key:
+            transaction.delete(claim, condition=UniqueKeyDataModel.owner_key == owner_key)
+        transaction.after_commit(functools.partial(setattr, self, 'persisted_unique_key', None))
+
+    # Field updates only check uniqueness when they change the unique key, see #renamed_by.
+    def update_changes(self, changes, condition=None):
+        renamed = self.renamed_by(changes)
+        if renamed is None or not self.unique_key_guarded():
+            if renamed is not None:
+                renamed.raise_if_duplicate()
+            return super().update_changes(changes, condition=condition)
+        transaction = TransactWrite()
+        self.update_changes_in_transaction(transaction, changes, condition=condition)
+        transaction.commit()
+
+    def update_changes_in_transaction(self, transaction, changes, condition=None):
+        renamed = self.renamed_by(changes)
+        if renamed is not None and not self.unique_key_guarded():
+            renamed.raise_if_duplicate()
+        super().update_changes_in_transaction(transaction, changes, condition=condition)
+        if renamed is not None and self.unique_key_guarded():
+            self.claim_unique_key(transaction, renamed.unique_key())
+
+    def claim_unique_key(self, transaction, unique_key):
+        owner_key = self.owner_key()
+        transaction.save(UniqueKeyDataModel(unique_key, owner_table=self.Meta.table_name, owner_key=owner_key),
+                         condition=UniqueKeyDataModel.claim_condition(owner_key),
+                         failure=AlreadyExists(f'Record with unique key {unique_key} already exists.'))
+        if self.persisted_unique_key not in (None, unique_key):
+            transaction.delete(UniqueKeyDataModel(self.persisted_unique_key),
+                               condition=UniqueKeyDataModel.claim_condition(owner_key))
+        transaction.after_commit(functools.partial(setattr, self, 'persisted_unique_key', unique_key))
+
+    # The record as it would be after the changes, with its derived fields set by the on init hooks, or None when
+    # the changes leave its unique key as it is.
+    def renamed_by(self, changes):
+        if not self.__unique_key_fields__:
+            return None
+        renamed = self.__class__(**dict(self.attribute_values, **changes))
+        if renamed.unique_key() == self.unique_key():
+            return None
+        return renamed
+
+    def unique_key(self):
+        values = [self.Meta.table_name] + [getattr(self, field) for field in self.__unique_key_fields__]
+        return self.UNIQUE_KEY_SEPARATOR.join(str(value) for value in values)
+
+    def unique_key_guarded(self):
+        return bool(getattr(self.Meta, 'unique_key_guard', False) and self.__unique_key_fields__)
@@ -1,22 +1,44 @@
+from app.models.persistence import VersionConflict
 from app.models.persistence.base import BaseModel
 from pynamodb.attributes import NumberAttribute
 
 
 # This mixin adds the ability to create and maintain an incrementing version
+# Writes of a record that has been read or saved are compare-and-swap, they are conditional on the stored version
+# still being the version this record holds and raise VersionConflict otherwise.  A new record starts at version 0.
 class VersionMixin(BaseModel):
     version = NumberAttribute()
     __before_save_hooks__ = ['set_version']
+    __meta_attributes__ = ['version']
     __on_update_hooks__ = ['generate_version_update_action']
 
-    def __init__(self, hash_key=None, range_key=None, **attributes):
-        self.assign_or_extend('before_save_hooks', __class__.__before_save_hooks__)
-        self.assign_or_extend('on_update_hooks', __class__.__on_update_hooks__)
-        self.assign_or_extend('__meta_attributes__', ['version'])
-        super().__init__(hash_key, range_key, **attributes)
-
     def generate_version_update_action(self):
         next_version = 0 if self.version is None else self.version + 1
         return self.__class__.version.set(next_version)
 
+    def save(self, condition=None, conditional_operator=None, **expected_values):
+        version = self.version
+        try:
+            super().save(condition=condition, conditional_operator=conditional_operator, **expected_values)
+        except BaseException:
+            self.version = version
+            raise
+
     def set_version(self):
-        self.version = 0
+        if not self.persisted or self.version is None:
+            self.version = 0
+        else:
+            self.version = self.version + 1
+
+    def write_condition(self, condition=None):
+        if not self.persisted:
+            return super().write_condition(condition)
+        if self.version is None:
+            expected = self.__class__.version.does_not_exist()
+        else:
+            expected = self.__class__.version == self.version
+        return expected if condition is None else condition & expected
+
+    def write_conflict(self):
+        key = ', '.join(str(key) for key in self._item_key() if key is not None)
+        return VersionConflict(f'{self.Meta.table_name} record {key} is no longer at version {self.version}')
@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+
+
+# A cursor is the last evaluated key of a query serialized into an opaque, URL safe string.  It can be handed to a
+# client and passed back to resume the query right after the last result that was consumed.
+def encode_cursor(last_evaluated_key):
+    if last_evaluated_key is None:
+        return None
+    data = json.dumps(last_evaluated_key, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def decode_cursor(cursor):
+    if cursor is None:
+        return None
+    try:
+        last_evaluated_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f'{cursor} is not a valid cursor')
+    if not isinstance(last_evaluated_key, dict):
+        raise ValueError(f'{cursor} is not a valid cursor')
+    return last_evaluated_key
+
+
+# Streams the results of a pynamodb query one DynamoDB page at a time, mapping each record with map_fn and skipping
+# records that predicate rejects.  The cursor property is the resume point after the last record consumed, or None
+# once the query is exhausted.
+class QueryStream(object):
+    def __init__(self, results, map_fn=None, predicate=None):
+        self.results = results
+        self.map_fn = map_fn
+        self.predicate = predicate
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            record = next(self.results)
+            if self.predicate is None or self.predicate(record):
+                return record if self.map_fn is None else self.map_fn(record)
+
+    @property
+    def cursor(self):
+        return encode_cursor(self.results.last_evaluated_key)
+
+    # Consumes at most count results, the cursor then resumes after the last of them.
+    def take(self, count):
+        results = list()
+        for result in self:
+            results.append(result)
+            if len(results) == count:
+                break
+        return results
@@ -0,0 +1,261 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from app.models.persistence import AlreadyExists, TransactionCanceled, VersionConflict
+from app.models.persistence.base import BaseMeta, BaseModel
+from app.models.persistence.event import EventDataModel, HareEventDataModel, KennelEventDataModel
+from app.models.persistence.hasher import HasherDataModel, HasherMotherKennelAttribute
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from app.models.persistence.location import EventLocationDataModel
+from app.models.persistence.mixins.version import VersionMixin
+from app.models.persistence.pagination import decode_cursor, QueryStream
+from app.models.persistence.throttle import CapacityThrottle
+from pynamodb.attributes import NumberAttribute, UnicodeAttribute, UTCDateTimeAttribute
+from pynamodb.exceptions import PutError, UpdateError
+
+
+# A propagation job rewrites the denormalized references of one kennel, hasher or event after it changed.  The job
+# record is the checkpoint of the work, the stage being rewritten and the cursor within it, so an interrupted job
+# resumes where it stopped.  Enqueuing a job again restarts it, the job record's version makes a worker still running
+# the previous job stop at its next checkpoint.
+class PropagationJobModel(VersionMixin, BaseModel):
+    PENDING = 'pending'
+    DONE = 'done'
+
+    class Meta(BaseMeta):
+        table_name = 'propagation_jobs'
+
+    job_id = UnicodeAttribute(hash_key=True)
+    kind = UnicodeAttribute()
+    source_id = UnicodeAttribute()
+    start_time = UTCDateTimeAttribute(null=True)
+    geohash = UnicodeAttribute(null=True)
+    status = UnicodeAttribute()
+    stage = NumberAttribute(default=0)
+    cursor = UnicodeAttribute(null=True)
+    rewritten = NumberAttribute(default=0)
+    skipped = NumberAttribute(default=0)
+
+    @classmethod
+    def enqueue(cls, kind, source_id, start_time=None, geohash=None):
+        job_id = f'{kind}#{source_id}'
+        while True:
+            try:
+                job = cls.get(job_id, consistent_read=True)
+            except cls.DoesNotExist:
+                job = cls(job_id)
+            job.kind, job.source_id, job.start_time, job.geohash = kind, source_id, start_time, geohash
+            job.status, job.stage, job.cursor, job.rewritten, job.skipped = cls.PENDING, 0, None, 0, 0
+            try:
+                job.save(condition=None if job.persisted else cls.job_id.does_not_exist())
+                return job
+            except VersionConflict:
+                continue
+            except PutError as e:
+                if BaseModel._error_code(e) != 'ConditionalCheckFailedException':
+                    raise
+
+    @classmethod
+    def pending(cls):
+        return cls.scan(cls.status == cls.PENDING, consistent_read=True)
+
+
+# The records of one table holding a copy of a reference, fetched in batches with the cursor to resume after each.
+class PropagationStage(object):
+    def __init__(self, model_class, field, ref, batches):
+        self.model_class = model_class
+        self.field = field
+        self.ref = ref
+        self.batches = batches
+
+    def is_current(self, record):
+        attribute = self.model_class.get_attributes()[self.field]
+        return attribute.serialize(getattr(record, self.field)) == attribute.serialize(self.ref)
+
+
+# Batches of the records a query streams, see QueryStream.
+def query_batches(query):
+    def batches(cursor, batch_size):
+        stream = QueryStream(query(batch_size, decode_cursor(cursor)))
+        while True:
+            records = stream.take(batch_size)
+            if not records:
+                return
+            yield records, stream.cursor
+    return batches
+
+
+# Batches of the records with the given keys, read with BatchGetItem.  The cursor is the offset of the next key.
+def key_batches(model_class, keys):
+    def batches(cursor, batch_size):
+        for start in range(int(cursor or 0), len(keys), batch_size):
+            records = model_class.batch_get_in_order(keys[start:start + batch_size], consistent_read=True)
+            yield [record for record in records if record is not None], str(start + batch_size)
+    return batches
+
+
+# Rewrites the references of enqueued jobs:
+# - a kennel's reference in its kennel_members partition and in the mother kennel of its hashers, found through
+#   HasherMotherKennelIndex once HasherDataModel#backfill_mother_kennel_id has indexed the hashers stored before it,
+# - a hasher's reference in its kennel_members records, found through HasherMembershipIndex,
+# - an event's reference in the hare_events and kennel_events records of its hares and kennels, and in its
+#   event_locations record when the job has the location's geohash.
+# Records are read in batches and each stale copy is rewritten with an UpdateItem conditional on the record still
+# existing, and on its version for versioned models.  A record changed in between is read again and retried, the
+# copy is always rewritten from the current source record.  Writes to a table are throttled to a share of its
+# provisioned write capacity, or to units_per_second when given.
+class ReferencePropagator(object):
+    BATCH_SIZE = 25
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, batch_size=BATCH_SIZE, max_workers=4, capacity_fraction=0.5, units_per_second=None):
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.capacity_fraction = capacity_fraction
+        self.units_per_second = units_per_second
+        self.throttles = dict()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    @staticmethod
+    def enqueue_kennel(kennel_id):
+        return PropagationJobModel.enqueue('kennel', kennel_id)
+
+    @staticmethod
+    def enqueue_hasher(hasher_id):
+        return PropagationJobModel.enqueue('hasher', hasher_id)
+
+    @staticmethod
+    def enqueue_event(event_id, start_time, geohash=None):
+        return PropagationJobModel.enqueue('event', event_id, start_time=start_time, geohash=geohash)
+
+    # Runs the pending jobs and returns those that completed, a job taken over by another worker or enqueued again is
+    # left to that run.
+    def run_pending(self):
+        completed = list()
+        for job in PropagationJobModel.pending():
+            if self.stopping.is_set():
+                break
+            try:
+                job = self.run(job)
+            except VersionConflict:
+                continue
+            if job.status == PropagationJobModel.DONE:
+                completed.append(job)
+        return completed
+
+    def run(self, job):
+        stages = self.stages(job)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while job.stage < len(stages):
+                stage = stages[job.stage]
+                for (records, cursor) in stage.batches(job.cursor, self.batch_size):
+                    rewritten = sum(executor.map(lambda record: self.rewrite(stage, record), records))
+                    job.rewritten += rewritten
+                    job.skipped += len(records) - rewritten
+                    job.cursor = cursor
+                    job.save()
+                    if self.stopping.is_set():
+                        return job
+                job.stage += 1
+                job.cursor = None
+                job.save()
+        job.status = PropagationJobModel.DONE
+        job.save()
+        return job
+
+    def stages(self, job):
+        try:
+            return getattr(self, f'{job.kind}_stages')(job)
+        except (KennelDataModel.DoesNotExist, HasherDataModel.DoesNotExist, EventDataModel.DoesNotExist):
+            return list()
+
+    @staticmethod
+    def kennel_stages(job):
+        kennel = KennelDataModel.get(job.source_id, consistent_read=True)
+        mother_kennel = HasherMotherKennelAttribute(**kennel.to_ref().attribute_values)
+        return [
+            PropagationStage(KennelMemberDataModel, 'kennel_ref', kennel.to_ref(), query_batches(
+                lambda page_size, start: KennelMemberDataModel.query(
+                    kennel.kennel_id, page_size=page_size, last_evaluated_key=start, consistent_read=True))),
+            PropagationStage(HasherDataModel, 'mother_kennel', mother_kennel, query_batches(
+                lambda page_size, start: HasherDataModel.mother_kennel_index.query(
+                    kennel.kennel_id, page_size=page_size, last_evaluated_key=start))),
+        ]
+
+    @staticmethod
+    def hasher_stages(job):
+        hasher = HasherDataModel.get(job.source_id, consistent_read=True)
+        return [
+            PropagationStage(KennelMemberDataModel, 'hasher_ref', hasher.to_ref(), query_batches(
+                lambda page_size, start: KennelMemberDataModel.hasher_membership_index.query(
+                    hasher.hasher_id, page_size=page_size, last_evaluated_key=start))),
+        ]
+
+    @staticmethod
+    def event_stages(job):
+        event = EventDataModel.get(job.source_id, job.start_time, consistent_read=True)
+        event_ref = event.to_ref()
+        hare_keys = [(hare['hasher_id'], event.start_time) for hare in event.hares]
+        kennel_keys = [(kennel['kennel_id'], event.start_time) for kennel in event.kennels]
+        stages = [PropagationStage(HareEventDataModel, 'event_ref', event_ref,
+                                   key_batches(HareEventDataModel, hare_keys)),
+                  PropagationStage(KennelEventDataModel, 'event_ref', event_ref,
+                                   key_batches(KennelEventDataModel, kennel_keys))]
+        if job.geohash is not None:
+            stages.append(PropagationStage(EventLocationDataModel, 'event_ref', event_ref,
+                                           key_batches(EventLocationDataModel, [(job.geohash, event.start_time)])))
+        return stages
+
+    # Returns whether the record was rewritten.  A rewrite that would make a duplicate, e.g. a hasher whose mother
+    # kennel takes the name of another kennel where the hash name is taken, is skipped.
+    def rewrite(self, stage, record):
+        model_class = record.__class__
+        exists = getattr(model_class, model_class._get_meta_data().hash_keyname).exists()
+        for _ in range(self.MAX_ATTEMPTS):
+            if stage.is_current(record):
+                return False
+            self.throttle(model_class).acquire()
+            try:
+                record.update_changes({stage.field: stage.ref}, condition=exists)
+                return True
+            except AlreadyExists:
+                return False
+            except TransactionCanceled:
+                pass
+            except UpdateError as e:
+                if BaseModel._error_code(e) != 'ConditionalCheckFailedException':
+                    raise
+            try:
+                record.refresh(consistent_read=True)
+            except model_class.DoesNotExist:
+                return False
+        return False
+
+    def throttle(self, model_class):
+        with self.lock:
+            throttle = self.throttles.get(model_class.Meta.table_name)
+            if throttle is None:
+                if self.units_per_second is None:
+                    throttle = CapacityThrottle.for_table(model_class, fraction=self.capacity_fraction)
+                else:
+                    throttle = CapacityThrottle(self.units_per_second)
+                self.throttles[model_class.Meta.table_name] = throttle
+            return throttle
+
+    # Runs pending jobs in a daemon thread every poll_interval seconds until #stop.
+    def start(self, poll_interval=5.0):
+        self.stopping.clear()
+
+        def poll():
+            while not self.stopping.is_set():
+                self.run_pending()
+                self.stopping.wait(poll_interval)
+        self.thread = threading.Thread(target=poll, name='reference-propagator', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
@@ -0,0 +1,35 @@
+import threading
+import time
+
+
+# A token bucket of capacity units.  #acquire blocks until the units are available, so callers sharing a throttle
+# together stay under units_per_second, with bursts of at most burst units.
+class CapacityThrottle(object):
+    def __init__(self, units_per_second, burst=None):
+        if units_per_second <= 0:
+            raise ValueError('A throttle requires a positive rate')
+        self.units_per_second = float(units_per_second)
+        self.burst = float(units_per_second if burst is None else burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # A throttle for a share of the provisioned capacity of a model's table, see DescribeTable.  Tables billed on
+    # demand report no provisioned capacity, default_units_per_second applies to them.
+    @classmethod
+    def for_table(cls, model_class, capacity='WriteCapacityUnits', fraction=0.5, default_units_per_second=100):
+        throughput = model_class.describe_table().get('ProvisionedThroughput', dict())
+        units = throughput.get(capacity) or 0
+        return cls(units * fraction if units else default_units_per_second)
+
+    def acquire(self, units=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.units_per_second)
+                self.updated = now
+                if self.tokens >= units or self.tokens >= self.burst:
+                    self.tokens -= units
+                    return
+                wait = (units - self.tokens) / self.units_per_second
+            time.sleep(wait)
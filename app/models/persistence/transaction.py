@@ -0,0 +1,155 @@
+import re
+from app.models.persistence import TransactionCanceled
+from app.models.persistence.base import change_listeners, publish_change
+from botocore.exceptions import ClientError
+from pynamodb.expressions.update import Update
+
+
+# A thin TransactWriteItems builder over the pynamodb connection.  Operations are serialized as they are added and
+# sent in a single all-or-nothing call on commit, or on exit when used as a context manager.  The botocore client is
+# called directly because the pynamodb connection drops the cancellation reasons from the error.  An operation may
+# carry the exception to raise when its condition fails, and callbacks registered with #after_commit run once the
+# transaction succeeds.  The writes are published to the change listeners once committed, see base.publish_change.
+# A transaction built only to collect operations, e.g. to find out how many a save takes, can lift the limit on the
+# number of operations with limited=False, it cannot be committed then.
+class TransactWrite(object):
+    MAX_OPERATIONS = 25
+    CANCELED_ERROR = 'TransactionCanceledException'
+    CHANGE_EVENTS = {'Put': 'INSERT', 'Update': 'MODIFY', 'Delete': 'REMOVE'}
+
+    def __init__(self, connection=None, limited=True):
+        self.connection = connection
+        self.max_operations = self.MAX_OPERATIONS if limited else None
+        self.operations = list()
+        self.failures = list()
+        self.callbacks = list()
+        self.model_classes = list()
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+
+    def after_commit(self, callback):
+        self.callbacks.append(callback)
+
+    def condition_check(self, model_class, hash_key, range_key=None, condition=None, failure=None):
+        if condition is None:
+            raise ValueError('A condition check requires a condition')
+        hash_key, range_key = model_class._serialize_keys(hash_key, range_key)
+        operation = self._keyed_operation(model_class, hash_key, range_key)
+        self._add('ConditionCheck', operation, model_class, condition=condition, failure=failure)
+
+    def delete(self, model, condition=None, failure=None):
+        self._add('Delete', self._model_key_operation(model), model.__class__, condition=condition, failure=failure)
+
+    def extend(self, other):
+        if self.max_operations is not None and len(self.operations) + len(other.operations) > self.max_operations:
+            raise ValueError(f'DynamoDB allows a maximum of {self.max_operations} operations in a transaction')
+        if self.connection is None:
+            self.connection = other.connection
+        self.operations.extend(other.operations)
+        self.failures.extend(other.failures)
+        self.callbacks.extend(other.callbacks)
+        self.model_classes.extend(other.model_classes)
+
+    def save(self, model, condition=None, failure=None):
+        operation = {'TableName': model.Meta.table_name, 'Item': model._serialize(attr_map=True)['attributes']}
+        self._add('Put', operation, model.__class__, condition=condition, failure=failure)
+
+    def update(self, model, actions, condition=None, failure=None):
+        if not actions:
+            raise ValueError('An update requires at least one action')
+        self._add('Update', self._model_key_operation(model), model.__class__, condition=condition, actions=actions,
+                  failure=failure)
+
+    def update_by_key(self, model_class, hash_key, actions, range_key=None, condition=None, failure=None):
+        if not actions:
+            raise ValueError('An update requires at least one action')
+        hash_key, range_key = model_class._serialize_keys(hash_key, range_key)
+        operation = self._keyed_operation(model_class, hash_key, range_key)
+        self._add('Update', operation, model_class, condition=condition, actions=actions, failure=failure)
+
+    def commit(self):
+        if not self.operations:
+            return None
+        if self.max_operations is None:
+            raise ValueError('A transaction without a limit on its operations cannot be committed')
+        operations, failures, callbacks = self.operations, self.failures, self.callbacks
+        model_classes = self.model_classes
+        self.operations, self.failures, self.callbacks, self.model_classes = list(), list(), list(), list()
+        try:
+            response = self.connection.client.transact_write_items(TransactItems=operations)
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            if error.get('Code') != self.CANCELED_ERROR:
+                raise
+            message = error.get('Message', '')
+            reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', list())]
+            canceled = TransactionCanceled(message, reasons or self._cancellation_reasons(message))
+            for index in canceled.failed_operations():
+                if index < len(failures) and failures[index] is not None:
+                    raise failures[index]
+            raise canceled
+        if change_listeners or any(model_class.observes_changes for model_class in model_classes):
+            self._publish_changes(operations, model_classes)
+        for callback in callbacks:
+            callback()
+        return response
+
+    def _publish_changes(self, operations, model_classes):
+        for (operation, model_class) in zip(operations, model_classes):
+            ((operation_type, request),) = operation.items()
+            if operation_type not in self.CHANGE_EVENTS:
+                continue
+            if operation_type == 'Put':
+                meta_data = model_class._get_meta_data()
+                names = [name for name in (meta_data.hash_keyname, meta_data.range_keyname) if name is not None]
+                keys, image = {name: request['Item'][name] for name in names}, request['Item']
+            else:
+                keys, image = request['Key'], None
+            publish_change(self.CHANGE_EVENTS[operation_type], model_class, keys, image)
+
+    def _add(self, operation_type, operation, model_class, condition=None, actions=None, failure=None):
+        if len(self.operations) == self.max_operations:
+            raise ValueError(f'DynamoDB allows a maximum of {self.max_operations} operations in a transaction')
+        if self.connection is None:
+            self.connection = model_class._get_connection().connection
+        name_placeholders = dict()
+        expression_values = dict()
+        if actions:
+            operation['UpdateExpression'] = Update(*actions).serialize(name_placeholders, expression_values)
+        if condition is not None:
+            operation['ConditionExpression'] = condition.serialize(name_placeholders, expression_values)
+        if name_placeholders:
+            operation['ExpressionAttributeNames'] = {v: k for (k, v) in name_placeholders.items()}
+        if expression_values:
+            operation['ExpressionAttributeValues'] = expression_values
+        self.operations.append({operation_type: operation})
+        self.failures.append(failure)
+        self.model_classes.append(model_class)
+
+    @staticmethod
+    def _keyed_operation(model_class, hash_key, range_key):
+        operation = {'TableName': model_class.Meta.table_name}
+        operation.update(model_class._get_connection().connection.get_identifier_map(
+            model_class.Meta.table_name, hash_key, range_key))
+        return operation
+
+    def _model_key_operation(self, model):
+        args, kwargs = model._get_save_args(attributes=False, null_check=False)
+        return self._keyed_operation(model.__class__, args[0], kwargs.get('range_key'))
+
+    # DynamoDB reports the per operation reasons in the message, e.g.
+    # 'Transaction cancelled, please refer cancellation reasons for specific reasons [None, ConditionalCheckFailed]'
+    @staticmethod
+    def _cancellation_reasons(message):
+        match = re.search(r'\[(.*)\]', message)
+        if match is None:
+            return list()
+        return [reason.strip() for reason in match.group(1).split(',')]
@@ -0,0 +1,18 @@
+from app.models.persistence.base import BaseMeta, BaseModel
+from pynamodb.attributes import UnicodeAttribute
+
+
+# The unique key data model is a companion table used to enforce uniqueness of searchable values.  Each item claims
+# a unique key on behalf of the record identified by owner_table and owner_key, and is written in the same
+# transaction as that record.
+class UniqueKeyDataModel(BaseModel):
+    class Meta(BaseMeta):
+        table_name = 'unique_keys'
+
+    unique_key = UnicodeAttribute(hash_key=True)
+    owner_table = UnicodeAttribute()
+    owner_key = UnicodeAttribute()
+
+    @classmethod
+    def claim_condition(cls, owner_key):
+        return cls.unique_key.does_not_exist() | (cls.owner_key == owner_key)
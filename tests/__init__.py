@@ -1,8 +1,9 @@
-from .mixins import MultiMixinTests, TimestampTests, VersionTests
+from .mixins import MultiMixinTests, TimestampTests, UniqueKeyTests, VersionTests
 from .models import EventTests, HasherTests, KennelTests
+from .import_time_tests import ImportTimeTests, LazyClassTests
 from .pynamo_tests import PynamoTests
-# https://www.python.org/dev/peps/pep-0382/
-__import__('pkg_resources').declare_namespace(__name__)
+# pkgutil-style namespace package, see https://packaging.python.org/guides/packaging-namespace-packages/
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
 
-__all__ = ['EventTests', 'HasherTests', 'KennelTests', 'MultiMixinTests', 'PynamoTests',
-           'TimestampTests', 'VersionTests']
+__all__ = ['EventTests', 'HasherTests', 'ImportTimeTests', 'KennelTests', 'LazyClassTests', 'MultiMixinTests',
+           'PynamoTests', 'TimestampTests', 'UniqueKeyTests', 'VersionTests']
@@ -1,8 +1,10 @@
+from .cached_get_tests import CachedGetTests
 from .multi_mixin_tests import MultiMixinTests
 from .timestamp_tests import TimestampTests
+from .unique_key_tests import UniqueKeyTests
 from .version_tests import VersionTests
 
-# https://www.python.org/dev/peps/pep-0382/
-__import__('pkg_resources').declare_namespace(__name__)
+# pkgutil-style namespace package, see https://packaging.python.org/guides/packaging-namespace-packages/
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
 
-__all__ = ['MultiMixinTests', 'TimestampTests', 'VersionTests']
+__all__ = ['CachedGetTests', 'MultiMixinTests', 'TimestampTests', 'UniqueKeyTests', 'VersionTests']
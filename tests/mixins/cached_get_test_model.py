@@ -0,0 +1,12 @@
+from app.models.persistence.base import BaseModel
+from app.models.persistence.mixins.cached_get import CachedGetMixin
+from app.models.persistence.mixins.version import VersionMixin
+from pynamodb.attributes import UnicodeAttribute
+
+
+class CachedGetTestModel(CachedGetMixin, VersionMixin, BaseModel):
+    class Meta:
+        table_name = 'cached_get_tests'
+
+    test_id = UnicodeAttribute(hash_key=True)
+    field1 = UnicodeAttribute()
@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+from app.models.persistence import base
+from app.models.persistence.cache import TTLCache
+from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.transaction import TransactWrite
+from .cached_get_test_model import CachedGetTestModel
+
+
+class CachedGetTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        CachedGetTestModel.Meta.host = 'http://localhost:8000'
+        if CachedGetTestModel.exists():
+            CachedGetTestModel.delete_table()
+        CachedGetTestModel.create_table(read_capacity_units=1, write_capacity_units=1, wait=True)
+
+    def setUp(self):
+        CachedGetTestModel.use_cache(TTLCache())
+        CachedGetTestModel.cache_stats.reset()
+        CachedGetTestModel.cache_validate_after = 30
+        CachedGetTestModel('test', field1='one').save()
+
+    def test_read_through(self):
+        first = CachedGetTestModel.get('test')
+        second = CachedGetTestModel.get('test')
+        self.assertEqual(second.field1, 'one')
+        self.assertIsNot(first, second)
+        stats = CachedGetTestModel.cache_statistics()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (1, 1, 0.5))
+
+    def test_consistent_reads_bypass_the_cache(self):
+        CachedGetTestModel.get('test', consistent_read=True)
+        self.assertEqual(CachedGetTestModel.cache_statistics()['misses'], 0)
+        self.assertEqual(len(CachedGetTestModel.entity_cache), 0)
+
+    def test_own_writes_invalidate(self):
+        model = CachedGetTestModel.get('test')
+        model.update_changes({'field1': 'two'})
+        self.assertEqual(CachedGetTestModel.get('test').field1, 'two')
+        with TransactWrite() as transaction:
+            model.update_changes_in_transaction(transaction, {'field1': 'three'})
+        self.assertEqual(CachedGetTestModel.get('test').field1, 'three')
+        model.delete()
+        with self.assertRaises(CachedGetTestModel.DoesNotExist):
+            CachedGetTestModel.get('test')
+
+    def test_writes_publish_no_image_without_listeners(self):
+        self.assertListEqual(base.change_listeners, [])
+        model = CachedGetTestModel.get('test')
+        serialize = CachedGetTestModel._serialize
+        with mock.patch.object(CachedGetTestModel, '_serialize', autospec=True, side_effect=serialize) as serialized:
+            model.update_changes({'field1': 'two'})
+            CachedGetTestModel('other', field1='one').save()
+        self.assertFalse([call for call in serialized.call_args_list if call[1].get('attr_map')])
+        self.assertEqual(CachedGetTestModel.get('test').field1, 'two')
+
+    def test_write_during_validation(self):
+        CachedGetTestModel.get('test')
+        CachedGetTestModel.cache_validate_after = 0
+        connection = CachedGetTestModel._get_connection()
+        get_item = connection.get_item
+
+        def write_after_read(hash_key, **kwargs):
+            response = get_item(hash_key, **kwargs)
+            if kwargs.get('attributes_to_get') == ['version']:
+                CachedGetTestModel.get('test', consistent_read=True).update_changes({'field1': 'two'})
+            return response
+        with mock.patch.object(connection, 'get_item', side_effect=write_after_read):
+            self.assertEqual(CachedGetTestModel.get('test').field1, 'two')
+        CachedGetTestModel.cache_validate_after = 30
+        self.assertEqual(CachedGetTestModel.get('test').field1, 'two')
+
+    def test_validates_against_version(self):
+        CachedGetTestModel.get('test')
+        CachedGetTestModel._get_connection().update_item(
+            'test', actions=[CachedGetTestModel.field1.set('other'), CachedGetTestModel.version.set(7)])
+        self.assertEqual(CachedGetTestModel.get('test').field1, 'one')
+        CachedGetTestModel.cache_validate_after = 0
+        self.assertEqual(CachedGetTestModel.get('test').field1, 'other')
+        self.assertEqual(CachedGetTestModel.get('test').field1, 'other')
+        stats = CachedGetTestModel.cache_statistics()
+        self.assertEqual((stats['hits'], stats['misses'], stats['validations']), (2, 2, 2))
+
+    def test_unversioned_models_cache_briefly(self):
+        self.assertEqual(HasherDataModel.cache_ttl, 30)
+        self.assertEqual(HasherDataModel.entity_cache.ttl, 30)
+
+    def test_ttl_and_lru(self):
+        now = [0]
+        cache = TTLCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(cache.get('b'), (False, None))
+        self.assertEqual(cache.get('a'), (True, 1))
+        now[0] = 10
+        self.assertEqual(cache.get('a'), (False, None))
+        self.assertEqual(cache.evictions, 1)
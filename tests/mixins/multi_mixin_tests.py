@@ -43,6 +43,14 @@ class MultiMixinTests(unittest.TestCase):
         for key in model.__meta_attributes__:
             self.assertNotIn(key, attributes.keys())
 
+    def test_hook_chains_shared(self):
+        a = MultiMixinTestModel('test1', field='a')
+        b = MultiMixinTestModel('test2', field='b')
+        self.assertIs(a.before_save_hooks, b.before_save_hooks)
+        self.assertIs(a.on_update_hooks, b.on_update_hooks)
+        self.assertEqual(len(a.before_save_hooks), 2)
+        self.assertListEqual(list(MultiMixinTestModel.__meta_attributes__), ['created_at', 'modified_at', 'version'])
+
     @classmethod
     def tearDownClass(cls):
         if MultiMixinTestModel.exists():
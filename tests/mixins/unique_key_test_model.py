@@ -0,0 +1,15 @@
+from app.models.persistence.base import BaseMeta, BaseModel
+from app.models.persistence.mixins.timestamps import TimeStampableMixin
+from app.models.persistence.mixins.unique_key import UniqueKeyMixin
+from pynamodb.attributes import UnicodeAttribute
+
+
+class UniqueKeyTestModel(TimeStampableMixin, UniqueKeyMixin, BaseModel):
+    __unique_key_fields__ = ['name']
+
+    class Meta(BaseMeta):
+        table_name = 'unique_key_tests'
+        unique_key_guard = True
+
+    test_id = UnicodeAttribute(hash_key=True)
+    name = UnicodeAttribute()
@@ -0,0 +1,99 @@
+import asyncio
+import unittest
+from app.models.persistence import AlreadyExists, TransactionCanceled
+from app.models.persistence.unique_key import UniqueKeyDataModel
+from tests.models.logic import clean_create_tables
+from .unique_key_test_model import UniqueKeyTestModel
+
+
+class UniqueKeyTests(unittest.TestCase):
+    def setUp(self):
+        clean_create_tables([UniqueKeyTestModel, UniqueKeyDataModel])
+
+    def test_save_claims_key(self):
+        model = UniqueKeyTestModel('test1', name='name1')
+        model.save()
+        claim = UniqueKeyDataModel.get(model.unique_key())
+        self.assertEqual(claim.owner_table, 'unique_key_tests')
+        self.assertEqual(claim.owner_key, 'test1')
+        self.assertEqual(UniqueKeyTestModel.get('test1').name, 'name1')
+
+    def test_duplicate_key(self):
+        UniqueKeyTestModel('test1', name='name1').save()
+        with self.assertRaises(AlreadyExists):
+            UniqueKeyTestModel('test2', name='name1').save()
+        with self.assertRaises(UniqueKeyTestModel.DoesNotExist):
+            UniqueKeyTestModel.get('test2')
+
+    def test_batch_write_refused(self):
+        model = UniqueKeyTestModel('test1', name='name1')
+        loop = asyncio.new_event_loop()
+        try:
+            with self.assertRaises(ValueError):
+                loop.run_until_complete(UniqueKeyTestModel.async_batch_write([model]))
+            with self.assertRaises(ValueError):
+                loop.run_until_complete(UniqueKeyTestModel.async_batch_write(items_to_delete=[model]))
+        finally:
+            loop.close()
+        self.assertEqual(UniqueKeyTestModel.count(), 0)
+
+    def test_resave(self):
+        model = UniqueKeyTestModel('test1', name='name1')
+        model.save()
+        model.save()
+        UniqueKeyTestModel.get('test1').save()
+
+    def test_rename_releases_key(self):
+        model = UniqueKeyTestModel('test1', name='name1')
+        model.save()
+        old_key = model.unique_key()
+        model.name = 'name2'
+        model.save()
+        with self.assertRaises(UniqueKeyDataModel.DoesNotExist):
+            UniqueKeyDataModel.get(old_key)
+        UniqueKeyTestModel('test2', name='name1').save()
+        with self.assertRaises(AlreadyExists):
+            UniqueKeyTestModel('test3', name='name2').save()
+
+    def test_delete_releases_key(self):
+        model = UniqueKeyTestModel('test1', name='name1')
+        model.save()
+        UniqueKeyTestModel.get('test1').delete()
+        with self.assertRaises(UniqueKeyDataModel.DoesNotExist):
+            UniqueKeyDataModel.get(model.unique_key())
+        UniqueKeyTestModel('test2', name='name1').save()
+
+    def test_delete_keeps_key_of_another_record(self):
+        UniqueKeyTestModel('test1', name='name1').save()
+        UniqueKeyTestModel('test2', name='name1').delete()
+        self.assertEqual(UniqueKeyDataModel.get(UniqueKeyTestModel('test1', name='name1').unique_key()).owner_key,
+                         'test1')
+
+    def test_rename_before_first_save(self):
+        UniqueKeyTestModel('test1', name='name1').save()
+        model = UniqueKeyTestModel('test2', name='name1')
+        model.name = 'name2'
+        model.save()
+        self.assertEqual(UniqueKeyDataModel.get(model.unique_key()).owner_key, 'test2')
+        self.assertEqual(UniqueKeyDataModel.count(), 2)
+
+    def test_failed_condition(self):
+        UniqueKeyTestModel('test1', name='name1').save()
+        with self.assertRaises(TransactionCanceled) as context:
+            UniqueKeyTestModel('test1', name='name2').save(condition=UniqueKeyTestModel.test_id.does_not_exist())
+        self.assertListEqual(context.exception.failed_operations(), [0])
+
+    def test_unguarded(self):
+        UniqueKeyTestModel.Meta.unique_key_guard = False
+        try:
+            UniqueKeyTestModel('test1', name='name1').save()
+            UniqueKeyTestModel('test2', name='name1').save()
+        finally:
+            UniqueKeyTestModel.Meta.unique_key_guard = True
+        self.assertEqual(UniqueKeyDataModel.count(), 0)
+
+    @classmethod
+    def tearDownClass(cls):
+        for table in [UniqueKeyTestModel, UniqueKeyDataModel]:
+            if table.exists():
+                table.delete_table()
@@ -1,4 +1,6 @@
 import unittest
+from app.models.persistence import VersionConflict
+from pynamodb.exceptions import PutError
 from .version_test_model import VersionTestModel
 
 
@@ -72,6 +74,40 @@ class VersionTests(unittest.TestCase):
         retrieved = VersionTestModel.get('test')
         self.assertEqual(retrieved.version, 0)
 
+    def test_resave_increments_version(self):
+        model = VersionTestModel('test3', field1='test_1')
+        model.save()
+        model.save()
+        self.assertEqual(model.version, 1)
+        self.assertEqual(VersionTestModel.get('test3').version, 1)
+
+    def test_stale_save_conflicts(self):
+        VersionTestModel('test4', field1='test_1').save()
+        first = VersionTestModel.get('test4')
+        second = VersionTestModel.get('test4')
+        first.save()
+        with self.assertRaises(VersionConflict):
+            second.save()
+        self.assertEqual(second.version, 0)
+        self.assertEqual(VersionTestModel.get('test4').version, 1)
+
+    def test_stale_update_conflicts(self):
+        VersionTestModel('test5', field1='test_1').save()
+        first = VersionTestModel.get('test5')
+        second = VersionTestModel.get('test5')
+        first.add_update_action('field1', 'set', 'first')
+        first.update()
+        second.add_update_action('field1', 'set', 'second')
+        with self.assertRaises(VersionConflict):
+            second.update()
+        self.assertEqual(VersionTestModel.get('test5').field1, 'first')
+
+    def test_caller_condition_errors_unchanged(self):
+        model = VersionTestModel('test6', field1='test_1')
+        model.save()
+        with self.assertRaises(PutError):
+            model.save(condition=VersionTestModel.field1 == 'other')
+
     @classmethod
     def tearDownClass(cls):
         if VersionTestModel.exists():
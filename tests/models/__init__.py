@@ -3,5 +3,5 @@ from tests.models.persistence import EventTests, HasherTests, KennelTests
 
 __all__ = ['EventTests', 'HasherTests', 'KennelTests', 'KennelLogicTests']
 
-# https://www.python.org/dev/peps/pep-0382/
-__import__('pkg_resources').declare_namespace(__name__)
+# pkgutil-style namespace package, see https://packaging.python.org/guides/packaging-namespace-packages/
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
@@ -0,0 +1,6 @@
+from tests.models.index.indexer_tests import IndexerTests
+
+__all__ = ['IndexerTests']
+
+# pkgutil-style namespace package, see https://packaging.python.org/guides/packaging-namespace-packages/
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
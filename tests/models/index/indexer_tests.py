@@ -0,0 +1,86 @@
+import unittest
+from datetime import datetime, timezone
+from app.models.index.event import EventIndexModel
+from app.models.index.indexer import Indexer
+from app.models.index.kennel import KennelIndexModel
+from app.models.index.stream import change_record, LocalChangeStream, plain_image
+from app.models.logic.event import EventLogicModel
+from app.models.logic.hasher import HasherLogicModel
+from app.models.logic.kennel import KennelLogicModel
+from app.models.persistence.event import EventDataModel, HareEventDataModel, KennelEventDataModel
+from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from tests.models import logic
+
+
+class IndexerTests(unittest.TestCase):
+    tables = [EventDataModel, EventIndexModel, HareEventDataModel, HasherDataModel, KennelDataModel,
+              KennelEventDataModel, KennelIndexModel, KennelMemberDataModel]
+
+    def setUp(self):
+        logic.clean_create_tables(self.tables)
+        self.stream = LocalChangeStream().attach()
+        self.indexer = Indexer()
+        self.start_time = datetime(2020, 5, 1, 18, 30, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        self.stream.detach()
+
+    def catch_up(self):
+        return self.indexer.process(self.stream.read())
+
+    def test_kennel_page(self):
+        kennel = KennelLogicModel.create('Test Kennel', 'TKH3')
+        hasher = HasherLogicModel.create('Testy Hasher', kennel)
+        kennel.add_member(hasher)
+        event = EventLogicModel.create('Trail', self.start_time, [kennel], [hasher], 'The park',
+                                       description='A trail', type='basic')
+        self.catch_up()
+        page = KennelIndexModel.page(kennel.kennel_id)
+        self.assertEqual(page['kennel']['name'], 'Test Kennel')
+        self.assertEqual(page['kennel']['next_trail_number'], 2)
+        self.assertEqual(page['members'][hasher.hasher_id]['hash_name'], 'Testy Hasher')
+        (event_ref,) = page['events'].values()
+        self.assertEqual(event_ref['event_id'], event.event_id)
+        self.assertEqual(EventIndexModel.page(event.event_id)['event']['name'], 'Trail')
+
+    def test_updates_and_removals(self):
+        kennel = KennelLogicModel.create('Test Kennel', 'TKH3')
+        hasher = HasherLogicModel.create('Testy Hasher', kennel)
+        kennel.add_member(hasher)
+        self.catch_up()
+        kennel.description = 'Renamed'
+        kennel.save()
+        KennelMemberDataModel.get(kennel.kennel_id, hasher.hasher_id).delete()
+        self.catch_up()
+        page = KennelIndexModel.page(kennel.kennel_id, consistent_read=True)
+        self.assertEqual(page['kennel']['description'], 'Renamed')
+        self.assertEqual(page['members'], dict())
+        kennel.persistence_object.delete()
+        self.catch_up()
+        self.assertIsNone(KennelIndexModel.page(kennel.kennel_id, consistent_read=True))
+
+    def test_replayed_records_are_idempotent(self):
+        kennel = KennelLogicModel.create('Test Kennel', 'TKH3')
+        records = self.stream.read()
+        self.indexer.process(records)
+        version = KennelIndexModel.get(kennel.kennel_id).version
+        self.indexer.process(records)
+        self.assertEqual(KennelIndexModel.get(kennel.kennel_id).version, version)
+
+    def test_record_without_image_reads_the_item(self):
+        kennel = KennelLogicModel.create('Test Kennel', 'TKH3')
+        self.stream.read()
+        keys = {'kennel_id': {'S': kennel.kennel_id}}
+        self.assertEqual(self.indexer.process([change_record('MODIFY', 'kennels', keys)]), 1)
+        self.assertEqual(KennelIndexModel.page(kennel.kennel_id)['kennel']['acronym'], 'TKH3')
+
+    def test_ignores_other_tables(self):
+        record = change_record('INSERT', 'hashers', {'hasher_id': {'S': 'h1'}}, {'hasher_id': {'S': 'h1'}})
+        self.assertEqual(self.indexer.process([record]), 0)
+
+    def test_plain_image(self):
+        image = {'name': {'S': 'Trail'}, 'count': {'N': '2'}, 'ratio': {'N': '0.5'}, 'gone': {'NULL': True},
+                 'refs': {'L': [{'M': {'id': {'S': 'a'}}}]}, 'tags': {'SS': ['b', 'a']}}
+        self.assertEqual(plain_image(image), {'name': 'Trail', 'count': 2, 'ratio': 0.5, 'gone': None,
+                                              'refs': [{'id': 'a'}], 'tags': ['a', 'b']})
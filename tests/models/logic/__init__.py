@@ -1,7 +1,13 @@
+from .aio import AsyncLogicTests
 from .common import clean_create_tables
+from .event import EventLogicTests
+from .geocoding import GeocodingTests
 from .kennel import KennelLogicTests, KennelMembershipTests
+from .pages import PageLoaderTests
+from .session import SessionTests
 
-__all__ = ['KennelLogicTests', 'KennelMembershipTests', 'clean_create_tables']
+__all__ = ['AsyncLogicTests', 'EventLogicTests', 'GeocodingTests', 'KennelLogicTests', 'KennelMembershipTests',
+           'PageLoaderTests', 'SessionTests', 'clean_create_tables']
 
-# https://www.python.org/dev/peps/pep-0382/
-__import__('pkg_resources').declare_namespace(__name__)
+# pkgutil-style namespace package, see https://packaging.python.org/guides/packaging-namespace-packages/
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
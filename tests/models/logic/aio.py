@@ -0,0 +1,53 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+from app.models.logic.event import EventLogicModel
+from app.models.logic.hasher import HasherLogicModel
+from app.models.logic.kennel import KennelLogicModel
+from app.models.persistence import AlreadyExists
+from app.models.persistence.event import EventDataModel, HareEventDataModel, KennelEventDataModel
+from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from tests.models.logic.common import clean_create_tables
+
+
+class AsyncLogicTests(unittest.TestCase):
+    def setUp(self):
+        clean_create_tables([EventDataModel, HareEventDataModel, HasherDataModel, KennelDataModel,
+                             KennelEventDataModel, KennelMemberDataModel])
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_create_and_lookup(self):
+        kennel = self.run_async(KennelLogicModel.async_create('Test Kennel', 'TKH3'))
+        hasher = self.run_async(HasherLogicModel.async_create('Testy Hasher', kennel))
+        self.assertEqual(self.run_async(KennelLogicModel.async_lookup_by_id(kennel.kennel_id)).name, 'Test Kennel')
+        actual = self.run_async(HasherLogicModel.async_lookup_by_id(hasher.hasher_id))
+        self.assertEqual(actual.mother_kennel.name, 'Test Kennel')
+
+    def test_create_keeps_uniqueness(self):
+        self.run_async(KennelLogicModel.async_create('Test Kennel', 'TKH3'))
+        with self.assertRaises(AlreadyExists):
+            self.run_async(KennelLogicModel.async_create('Test  kennel', 'TK2'))
+
+    def test_fan_out_reads(self):
+        kennel = KennelLogicModel.create('Test Kennel', 'TKH3')
+        hasher = HasherLogicModel.create('Testy Hasher', kennel)
+        kennel.add_member(hasher)
+        start_time = datetime.now(tz=timezone.utc) + timedelta(days=1)
+        EventLogicModel.create('Trail', start_time, [kennel], [hasher], 'The park', description='A trail',
+                               type='basic')
+
+        async def fan_out():
+            return await asyncio.gather(KennelLogicModel.async_lookup_by_id(kennel.kennel_id),
+                                        KennelLogicModel.async_list_members(kennel),
+                                        KennelLogicModel.async_upcoming_events(kennel))
+        found, members, events = self.run_async(fan_out())
+        self.assertEqual(found.kennel_id, kennel.kennel_id)
+        self.assertEqual([member.hasher_id for member in members], [hasher.hasher_id])
+        self.assertEqual([event.name for event in events], ['Trail'])
@@ -0,0 +1,120 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from app.models.logic.event import EventLogicModel
+from app.models.logic.hasher import HasherLogicModel
+from app.models.logic.kennel import KennelLogicModel
+from app.models.persistence import TransactionCanceled, base
+from app.models.persistence.event import EventDataModel, HareEventDataModel, KennelEventDataModel
+from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.kennel import KennelDataModel
+from app.models.persistence.location import EventLocationDataModel, LocationReferenceModel
+from tests.models import logic
+
+
+class EventLogicTests(unittest.TestCase):
+    tables = [EventDataModel, EventLocationDataModel, HareEventDataModel, HasherDataModel, KennelDataModel,
+              KennelEventDataModel]
+
+    def setUp(self):
+        logic.clean_create_tables(self.tables)
+        self.kennel = KennelLogicModel.create('Test Kennel', 'TKH3')
+        self.hares = [HasherLogicModel.create(f'Hare {x}', self.kennel) for x in range(2)]
+        self.start_time = datetime.now(tz=timezone.utc)
+        self.location = LocationReferenceModel(geohash='dr5ru7', name='Park', address1='1 Park Pl', address2='',
+                                               city='Fakesville', state_province_region='FK', postal_code='12345',
+                                               latitude=40.7, longitude=-74.0)
+
+    def test_create(self):
+        event = EventLogicModel.create('Trail', self.start_time, [self.kennel], self.hares, 'The park',
+                                       description='A trail', type='basic', location=self.location)
+        actual = EventLogicModel.lookup_by_id(event.event_id, self.start_time)
+        self.assertEqual(actual.name, 'Trail')
+        kennel_event = KennelEventDataModel.get(self.kennel.kennel_id, self.start_time)
+        self.assertEqual(kennel_event.event_id, event.event_id)
+        self.assertEqual(kennel_event.event_ref.name, 'Trail')
+        for hare in self.hares:
+            self.assertEqual(HareEventDataModel.get(hare.hasher_id, self.start_time).event_id, event.event_id)
+        event_location = EventLocationDataModel.get(self.location.geohash, self.start_time)
+        self.assertEqual(event_location.event_ref.event_id, event.event_id)
+        self.assertEqual(KennelDataModel.get(self.kennel.kennel_id).next_trail_number, 2)
+
+    def test_create_increments_trail_number(self):
+        EventLogicModel.create('Trail 1', self.start_time, [self.kennel], self.hares, 'The park',
+                               description='A trail', type='basic')
+        EventLogicModel.create('Trail 2', self.start_time, [self.kennel], [], 'The park', description='A trail',
+                               type='basic')
+        self.assertEqual(KennelDataModel.get(self.kennel.kennel_id).next_trail_number, 3)
+
+    def test_create_many_hares(self):
+        hares = [HasherLogicModel.create(f'Many Hare {x}', self.kennel) for x in range(30)]
+        event = EventLogicModel.create('Trail', self.start_time, [self.kennel], hares, 'The park',
+                                       description='A trail', type='basic')
+        for hare in hares:
+            self.assertEqual(HareEventDataModel.get(hare.hasher_id, self.start_time).event_id, event.event_id)
+        self.assertEqual(KennelEventDataModel.get(self.kennel.kennel_id, self.start_time).event_id, event.event_id)
+        self.assertEqual(KennelDataModel.get(self.kennel.kennel_id).next_trail_number, 2)
+
+    def test_create_many_hares_publishes_fan_out(self):
+        hares = [HasherLogicModel.create(f'Many Hare {x}', self.kennel) for x in range(30)]
+        changes = list()
+
+        def listener(event_name, model_class, keys, new_image):
+            changes.append((event_name, model_class))
+        base.change_listeners.append(listener)
+        try:
+            EventLogicModel.create('Trail', self.start_time, [self.kennel], hares, 'The park', description='A trail',
+                                   type='basic')
+        finally:
+            base.change_listeners.remove(listener)
+        self.assertEqual(changes.count(('INSERT', HareEventDataModel)), 30)
+        self.assertEqual(changes.count(('INSERT', KennelEventDataModel)), 1)
+
+    def test_create_unknown_kennel(self):
+        kennel = KennelLogicModel('Unsaved Kennel', 'UKH3')
+        with self.assertRaises(TransactionCanceled):
+            EventLogicModel.create('Trail', self.start_time, [kennel], self.hares, 'The park', description='A trail',
+                                   type='basic')
+        self.assertEqual(EventDataModel.count(), 0)
+        self.assertEqual(HareEventDataModel.count(), 0)
+
+    def test_events_near(self):
+        event = EventLogicModel.create('Trail', self.start_time, [self.kennel], self.hares, 'The park',
+                                       description='A trail', type='basic', location=self.location)
+        actual = EventLogicModel.events_near(40.71, -74.0, 5)
+        self.assertListEqual([ref.event_id for (_, ref) in actual], [event.event_id])
+        self.assertListEqual(EventLogicModel.events_near(40.71, -74.0, 5, end=self.start_time - timedelta(days=1)),
+                             list())
+
+    def create_events(self, days):
+        return [EventLogicModel.create(f'Trail {day}', self.start_time + timedelta(days=day), [self.kennel],
+                                       self.hares[:1], 'The park', description='A trail', type='basic')
+                for day in days]
+
+    def test_upcoming_events(self):
+        self.create_events([-2, -1, 1, 2, 3])
+        actual = KennelLogicModel.upcoming_events(self.kennel, count=2, after=self.start_time)
+        self.assertListEqual([ref.name for ref in actual], ['Trail 1', 'Trail 2'])
+        actual = KennelLogicModel.past_events(self.kennel, count=5, before=self.start_time)
+        self.assertListEqual([ref.name for ref in actual], ['Trail -1', 'Trail -2'])
+
+    def test_events_between(self):
+        self.create_events(range(5))
+        stream = KennelLogicModel.events_between(self.kennel, self.start_time + timedelta(days=1),
+                                                 self.start_time + timedelta(days=3), page_size=2)
+        self.assertListEqual([ref.name for ref in stream.take(2)], ['Trail 1', 'Trail 2'])
+        rest = KennelLogicModel.events_between(self.kennel, self.start_time + timedelta(days=1),
+                                               self.start_time + timedelta(days=3), cursor=stream.cursor)
+        self.assertListEqual([ref.name for ref in rest], ['Trail 3'])
+
+    def test_hare_history(self):
+        self.create_events(range(4))
+        actual = HasherLogicModel.hare_history(self.hares[0])
+        self.assertListEqual([ref.name for ref in actual], ['Trail 3', 'Trail 2', 'Trail 1', 'Trail 0'])
+        actual = HasherLogicModel.hare_history(self.hares[0], before=self.start_time + timedelta(days=2), limit=1)
+        self.assertListEqual([ref.name for ref in actual], ['Trail 1'])
+        self.assertListEqual(list(HasherLogicModel.hare_history(self.hares[1])), list())
+
+    def tearDown(self):
+        for table in self.tables:
+            if table.exists():
+                table.delete_table()
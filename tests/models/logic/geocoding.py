@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from app.models.logic.geocoding import DiskStore, Geocoder, GeocodingFailed, MemoryCache, normalize_address
+from app.models.persistence import geo
+from app.models.persistence.location import LocationDataModel
+from freezegun import freeze_time
+
+
+class LocalProvider(object):
+    def __init__(self, known, release=None, failures=0):
+        self.known = known
+        self.release = release
+        self.failures = failures
+        self.calls = list()
+        self.batches = list()
+
+    def geocode(self, address):
+        self.calls.append(address)
+        if self.release is not None:
+            self.release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise GeocodingFailed('timed out')
+        return self.known.get(address)
+
+    def geocode_many(self, addresses):
+        self.batches.append(list(addresses))
+        return [self.known.get(address) for address in addresses]
+
+
+class GeocodingTests(unittest.TestCase):
+    def setUp(self):
+        self.address = '1 Main St, New York, NY'
+        self.key = normalize_address(self.address)
+        self.provider = LocalProvider({self.key: (40.7128, -74.006)})
+
+    def test_normalize_address(self):
+        self.assertEqual(normalize_address('  1 Main  St ,New York,NY. '), '1 main st, new york, ny')
+
+    def test_geocode_cached(self):
+        geocoder = Geocoder(self.provider)
+        self.assertEqual(geocoder.geocode(self.address), (40.7128, -74.006))
+        self.assertEqual(geocoder.geocode('1 MAIN ST,  new york, ny'), (40.7128, -74.006))
+        self.assertIsNone(geocoder.geocode('Nowhere'))
+        self.assertIsNone(geocoder.geocode('nowhere'))
+        self.assertListEqual(self.provider.calls, [self.key, 'nowhere'])
+
+    def test_memory_cache_evicts_least_recent(self):
+        cache = MemoryCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(cache.get('b'), (False, None))
+        self.assertEqual(cache.get('a'), (True, 1))
+
+    def test_disk_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'geocodes.sqlite')
+            store = DiskStore(path)
+            Geocoder(self.provider, store=store).geocode(self.address)
+            store.close()
+            store = DiskStore(path)
+            geocoder = Geocoder(LocalProvider(dict()), store=store)
+            self.assertEqual(geocoder.geocode(self.address), (40.7128, -74.006))
+            self.assertListEqual(geocoder.provider.calls, list())
+            store.close()
+
+    def test_no_match_expires(self):
+        with tempfile.TemporaryDirectory() as directory, freeze_time('2019-06-01') as frozen:
+            store = DiskStore(os.path.join(directory, 'geocodes.sqlite'))
+            geocoder = Geocoder(self.provider, store=store, negative_ttl=60)
+            self.assertIsNone(geocoder.geocode(self.address + ' Apt 2'))
+            self.assertIsNone(geocoder.geocode(self.address + ' Apt 2'))
+            self.assertEqual(len(self.provider.calls), 1)
+            frozen.tick(61)
+            self.provider.known[normalize_address(self.address + ' Apt 2')] = (40.7128, -74.006)
+            self.assertEqual(geocoder.geocode(self.address + ' Apt 2'), (40.7128, -74.006))
+            self.assertEqual(Geocoder(LocalProvider(dict()), store=store).geocode(self.address + ' Apt 2'),
+                             (40.7128, -74.006))
+            store.close()
+
+    def test_failure_not_cached(self):
+        provider = LocalProvider(self.provider.known, failures=1)
+        geocoder = Geocoder(provider)
+        with self.assertRaises(GeocodingFailed):
+            geocoder.geocode(self.address)
+        self.assertEqual(geocoder.geocode(self.address), (40.7128, -74.006))
+        self.assertListEqual(provider.calls, [self.key, self.key])
+
+    def test_concurrent_lookups_coalesce(self):
+        release = threading.Event()
+        provider = LocalProvider(self.provider.known, release=release)
+        geocoder = Geocoder(provider)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(geocoder.geocode, self.address) for _ in range(4)]
+            time.sleep(0.2)
+            release.set()
+            results = [future.result() for future in futures]
+        self.assertListEqual(results, [(40.7128, -74.006)] * 4)
+        self.assertListEqual(provider.calls, [self.key])
+
+    def test_geocode_many(self):
+        geocoder = Geocoder(self.provider)
+        geocoder.geocode(self.address)
+        actual = geocoder.geocode_many(['Nowhere', self.address, 'nowhere'])
+        self.assertListEqual(actual, [None, (40.7128, -74.006), None])
+        self.assertListEqual(self.provider.batches, [['nowhere']])
+
+    def test_locate(self):
+        location = LocationDataModel(name='Park', searchable_name='park', address1='1 Main St', city='New York',
+                                     state_province_region='NY')
+        self.assertTrue(Geocoder(self.provider).locate(location))
+        self.assertEqual((location.latitude, location.longitude), (40.7128, -74.006))
+        self.assertEqual(location.geohash, geo.encode(40.7128, -74.006, 8))
+        self.assertFalse(Geocoder(LocalProvider(dict())).locate(LocationDataModel(address1='Nowhere')))
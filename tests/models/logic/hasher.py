@@ -42,6 +42,13 @@ class HasherLogicTests(unittest.TestCase):
         self.assertEqual(self.mother_kennel.name, actual.mother_kennel.name)
         self.assertEqual(self.mother_kennel.acronym, actual.mother_kennel.acronym)
 
+    def test_lookup_many(self):
+        hashers = [HasherLogicModel.create(f'{self.hash_name} {x}', self.mother_kennel) for x in range(3)]
+        ids = [hashers[1].hasher_id, 'missing', hashers[0].hasher_id]
+        self.assertListEqual(HasherLogicModel.lookup_many(ids), [hashers[1], None, hashers[0]])
+        refs = [hasher.persistence_object.to_ref() for hasher in hashers]
+        self.assertListEqual(HasherLogicModel.lookup_many_by_ref(refs), hashers)
+
     def test_redundant_create(self):
         HasherLogicModel.create(self.hash_name, self.mother_kennel)
         with self.assertRaises(AlreadyExists):
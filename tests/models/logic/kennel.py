@@ -1,9 +1,11 @@
 import unittest
+from unittest.mock import patch
 from app.models.logic.hasher import HasherLogicModel
 from app.models.logic.kennel import KennelLogicModel
-from app.models.persistence import AlreadyExists
+from app.models.persistence import AlreadyExists, VersionConflict
 from app.models.persistence.hasher import HasherDataModel
 from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from app.models.persistence.unique_key import UniqueKeyDataModel
 from tests.models import logic
 
 
@@ -27,6 +29,24 @@ class KennelLogicTests(unittest.TestCase):
         lookup = KennelLogicModel.lookup_by_ref(ref)
         self.assertEqual(orig, lookup)
 
+    def test_lookup_many(self):
+        kennels = [KennelLogicModel.create(f'{self.name}_{x}', f'{self.acronym}{x}') for x in range(3)]
+        ids = [kennels[2].kennel_id, 'missing', kennels[0].kennel_id, kennels[2].kennel_id]
+        actual = KennelLogicModel.lookup_many(ids)
+        self.assertListEqual(actual, [kennels[2], None, kennels[0], kennels[2]])
+        refs = [kennel.persistence_object.to_ref() for kennel in kennels]
+        self.assertListEqual(KennelLogicModel.lookup_many_by_ref(refs), kennels)
+
+    def test_lookup_many_chunked(self):
+        with KennelDataModel.batch_write() as batch:
+            for x in range(150):
+                kennel = KennelDataModel(f'kennel_{x:03}', name=f'Kennel {x}', acronym=f'K{x}H3')
+                kennel.run_before_save_hooks()
+                batch.save(kennel)
+        ids = [f'kennel_{x:03}' for x in reversed(range(150))]
+        actual = KennelLogicModel.lookup_many(ids)
+        self.assertListEqual([kennel.kennel_id for kennel in actual], ids)
+
     def test_lookup_kennel_doesnt_exist(self):
         with self.assertRaises(KennelDataModel.DoesNotExist):
             KennelLogicModel.lookup_by_id(self.kennel_id)
@@ -38,12 +58,121 @@ class KennelLogicTests(unittest.TestCase):
         self.assertEqual(actual.name, self.name)
         self.assertEqual(actual.acronym, self.acronym)
 
+    def test_members_not_loaded_on_create(self):
+        actual = KennelLogicModel.create(self.name, self.acronym)
+        self.assertFalse(actual.members_loaded())
+
+    def test_members_not_loaded_on_lookup(self):
+        KennelDataModel(self.kennel_id, name=self.name, acronym=self.acronym).save()
+        actual = KennelLogicModel.lookup_by_id(self.kennel_id)
+        self.assertFalse(actual.members_loaded())
+        self.assertListEqual(actual.members, list())
+        self.assertTrue(actual.members_loaded())
+
+    def test_allocate_trail_numbers(self):
+        kennel = KennelLogicModel.create(self.name, self.acronym, next_trail_number=10)
+        self.assertListEqual(list(kennel.allocate_trail_numbers(count=2)), [10, 11])
+        self.assertEqual(kennel.next_trail_number, 12)
+        self.assertEqual(KennelLogicModel.lookup_by_id(kennel.kennel_id).next_trail_number, 12)
+
+    def test_lookup_reads_through_cache(self):
+        kennel = KennelLogicModel.create(self.name, self.acronym, next_trail_number=10)
+        KennelDataModel.cache_stats.reset()
+        KennelLogicModel.lookup_by_id(kennel.kennel_id)
+        self.assertEqual(KennelLogicModel.lookup_by_id(kennel.kennel_id).next_trail_number, 10)
+        kennel.allocate_trail_numbers()
+        self.assertEqual(KennelLogicModel.lookup_by_id(kennel.kennel_id).next_trail_number, 11)
+        stats = KennelDataModel.cache_statistics()
+        self.assertEqual((stats['hits'], stats['misses'], stats['invalidations']), (1, 2, 1))
+
     def test_cant_create_same_name(self):
         logic.clean_create_tables([KennelDataModel, ])
         KennelLogicModel.create(self.name, self.acronym)
         with self.assertRaises(AlreadyExists):
             KennelLogicModel.create(self.name, 'xxxhhh')
 
+    def test_cant_create_same_name_unique_key_guard(self):
+        logic.clean_create_tables([KennelDataModel, UniqueKeyDataModel])
+        KennelDataModel.Meta.unique_key_guard = True
+        try:
+            KennelLogicModel.create(self.name, self.acronym)
+            with self.assertRaises(AlreadyExists):
+                KennelLogicModel.create(self.name.upper(), 'xxxhhh')
+        finally:
+            KennelDataModel.Meta.unique_key_guard = False
+            UniqueKeyDataModel.delete_table()
+
+    def test_save_updates_changed_attributes(self):
+        kennel = KennelLogicModel.create(self.name, self.acronym)
+        version = kennel.persistence_object.version
+        kennel.description = 'A drinking club with a running problem'
+        self.assertDictEqual(kennel.changed_attributes(), {'description': kennel.description})
+        with patch.object(KennelDataModel, 'save') as save, \
+                patch.object(KennelDataModel, 'stream_matching_records_by_name') as matching:
+            kennel.save()
+        save.assert_not_called()
+        matching.assert_not_called()
+        self.assertEqual(kennel.persistence_object.version, version + 1)
+        self.assertDictEqual(kennel.changed_attributes(), dict())
+        self.assertEqual(KennelLogicModel.lookup_by_id(kennel.kennel_id).description, kennel.description)
+
+    def test_save_without_changes(self):
+        kennel = KennelLogicModel.create(self.name, self.acronym)
+        with patch.object(KennelDataModel, 'update') as update:
+            KennelLogicModel.lookup_by_id(kennel.kennel_id).save()
+        update.assert_not_called()
+
+    def test_save_conflict(self):
+        kennel = KennelLogicModel.create(self.name, self.acronym)
+        stale = KennelLogicModel.lookup_by_id(kennel.kennel_id)
+        kennel.description = 'First'
+        kennel.save()
+        stale.description = 'Second'
+        with self.assertRaises(VersionConflict):
+            stale.save()
+
+    def test_save_conflict_retry_merges(self):
+        kennel = KennelLogicModel.create(self.name, self.acronym)
+        stale = KennelLogicModel.lookup_by_id(kennel.kennel_id)
+        kennel.webpage = 'http://example.com'
+        kennel.save()
+        stale.description = 'Second'
+        stale.save(retries=1)
+        actual = KennelLogicModel.lookup_by_id(kennel.kennel_id)
+        self.assertEqual(actual.description, 'Second')
+        self.assertEqual(actual.webpage, 'http://example.com')
+        self.assertEqual(stale.webpage, 'http://example.com')
+        self.assertEqual(actual.persistence_object.version, 2)
+
+    def test_save_rename(self):
+        KennelLogicModel.create(self.name, self.acronym)
+        kennel = KennelLogicModel.create('Other Kennel', 'OKH3')
+        kennel.name = self.name.upper()
+        with self.assertRaises(AlreadyExists):
+            kennel.save()
+        kennel.name = 'Renamed Kennel'
+        kennel.save()
+        self.assertEqual(KennelDataModel.get(kennel.kennel_id).searchable_name, 'renamedkennel')
+
+    def test_save_rename_unique_key_guard(self):
+        logic.clean_create_tables([KennelDataModel, UniqueKeyDataModel])
+        KennelDataModel.Meta.unique_key_guard = True
+        try:
+            KennelLogicModel.create(self.name, self.acronym)
+            kennel = KennelLogicModel.create('Other Kennel', 'OKH3')
+            kennel.name = self.name
+            with self.assertRaises(AlreadyExists):
+                kennel.save()
+            kennel.name = 'Renamed Kennel'
+            kennel.save()
+            self.assertEqual(kennel.persistence_object.searchable_name, 'renamedkennel')
+            with self.assertRaises(UniqueKeyDataModel.DoesNotExist):
+                UniqueKeyDataModel.get('kennels#otherkennel')
+            KennelLogicModel.create('Other Kennel', 'OKH3')
+        finally:
+            KennelDataModel.Meta.unique_key_guard = False
+            UniqueKeyDataModel.delete_table()
+
     def tearDown(self):
         if KennelMemberDataModel.exists():
             KennelMemberDataModel.delete_table()
@@ -76,6 +205,13 @@ class KennelMembershipTests(unittest.TestCase):
         self.assertListEqual(x, [self.hasher1.persistence_object.to_ref(), self.hasher2.persistence_object.to_ref()])
         self.assertListEqual(self.kennel_b.members, [self.hasher3.persistence_object.to_ref()])
 
+    def test_load_members_reloads(self):
+        self.assertListEqual(self.kennel_a.members, list())
+        KennelLogicModel.create_membership(self.kennel_a, self.hasher1)
+        self.assertListEqual(self.kennel_a.members, list())
+        self.kennel_a.load_members(page_size=1)
+        self.assertListEqual(self.kennel_a.members, [self.hasher1.persistence_object.to_ref()])
+
     def test_add_member(self):
         self.kennel_a.add_member(self.hasher1)
         self.kennel_a.add_member(self.hasher2)
@@ -84,6 +220,20 @@ class KennelMembershipTests(unittest.TestCase):
                              [self.hasher1.persistence_object.to_ref(), self.hasher2.persistence_object.to_ref()])
         self.assertListEqual(self.kennel_b.members, [self.hasher3.persistence_object.to_ref()])
 
+    def test_has_member_without_roster(self):
+        KennelLogicModel.create_membership(self.kennel_a, self.hasher1)
+        self.assertTrue(self.kennel_a.has_member(self.hasher1))
+        self.assertFalse(self.kennel_a.has_member(self.hasher2))
+        self.assertFalse(self.kennel_a.members_loaded())
+
+    def test_add_member_updates_loaded_roster(self):
+        self.kennel_a.load_members()
+        self.kennel_a.add_member(self.hasher2)
+        self.kennel_a.add_member(self.hasher1)
+        self.assertListEqual(self.kennel_a.members,
+                             [self.hasher1.persistence_object.to_ref(), self.hasher2.persistence_object.to_ref()])
+        self.assertListEqual(self.kennel_a.members, KennelLogicModel.list_members(self.kennel_a))
+
     def test_add_same_member_twice(self):
         self.kennel_a.add_member(self.hasher1)
         with self.assertRaises(AlreadyExists):
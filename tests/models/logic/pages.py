@@ -0,0 +1,68 @@
+import asyncio
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from app.models.logic import pages
+from app.models.logic.event import EventLogicModel
+from app.models.logic.hasher import HasherLogicModel
+from app.models.logic.kennel import KennelLogicModel
+from app.models.persistence.event import EventDataModel, HareEventDataModel, KennelEventDataModel
+from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from tests.models.logic.common import clean_create_tables
+
+
+class PageLoaderTests(unittest.TestCase):
+    def setUp(self):
+        clean_create_tables([EventDataModel, HareEventDataModel, HasherDataModel, KennelDataModel,
+                             KennelEventDataModel, KennelMemberDataModel])
+        self.kennel = KennelLogicModel.create('Test Kennel', 'TKH3')
+        self.hasher = HasherLogicModel.create('Testy Hasher', self.kennel)
+        self.kennel.add_member(self.hasher)
+        now = datetime.now(tz=timezone.utc)
+        for (name, start_time) in (('Past', now - timedelta(days=7)), ('Next', now + timedelta(days=7))):
+            EventLogicModel.create(name, start_time, [self.kennel], [self.hasher], 'The park',
+                                   description='A trail', type='basic')
+
+    def test_load_kennel_page(self):
+        page = pages.load_kennel_page(self.kennel.kennel_id)
+        self.assertEqual(page.kennel.name, 'Test Kennel')
+        self.assertEqual([member.hasher_id for member in page.members], [self.hasher.hasher_id])
+        self.assertEqual([event.name for event in page.upcoming_events], ['Next'])
+
+    def test_load_hasher_page(self):
+        page = pages.load_hasher_page(self.hasher.hasher_id)
+        self.assertEqual(page.hasher.hash_name, 'Testy Hasher')
+        self.assertEqual([membership.kennel_id for membership in page.memberships], [self.kennel.kennel_id])
+        self.assertEqual([event.name for event in page.hare_history], ['Next', 'Past'])
+
+    def test_async_loaders(self):
+        loop = asyncio.new_event_loop()
+        try:
+            async def load():
+                return await asyncio.gather(pages.async_load_kennel_page(self.kennel.kennel_id),
+                                            pages.async_load_hasher_page(self.hasher.hasher_id))
+            kennel_page, hasher_page = loop.run_until_complete(load())
+        finally:
+            loop.close()
+        self.assertEqual(kennel_page.kennel.kennel_id, self.kennel.kennel_id)
+        self.assertEqual(hasher_page.hasher.hasher_id, self.hasher.hasher_id)
+        self.assertEqual(len(hasher_page.hare_history), 2)
+
+    def test_missing_kennel_raises(self):
+        with self.assertRaises(KennelDataModel.DoesNotExist):
+            pages.load_kennel_page('missing')
+
+    def test_reads_run_concurrently(self):
+        def slow(original):
+            def read(*args, **kwargs):
+                time.sleep(0.2)
+                return original(*args, **kwargs)
+            return read
+        with patch.object(KennelLogicModel, 'lookup_by_id', slow(KennelLogicModel.lookup_by_id)), \
+                patch.object(KennelLogicModel, 'list_members', slow(KennelLogicModel.list_members)), \
+                patch.object(KennelLogicModel, 'upcoming_events', slow(KennelLogicModel.upcoming_events)):
+            start = time.monotonic()
+            pages.load_kennel_page(self.kennel.kennel_id)
+            self.assertLess(time.monotonic() - start, 0.5)
@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import patch
+from app.models.logic.hasher import HasherLogicModel
+from app.models.logic.kennel import KennelLogicModel
+from app.models.logic.session import Session
+from app.models.persistence import AlreadyExists
+from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from app.models.persistence.transaction import TransactWrite
+from tests.models import logic
+
+
+class SessionTests(unittest.TestCase):
+    def setUp(self):
+        self.name = 'Test_Kennel'
+        self.acronym = 'TKH3'
+        logic.clean_create_tables([KennelDataModel, KennelMemberDataModel, HasherDataModel])
+
+    def test_get_uses_identity_map(self):
+        kennel = KennelLogicModel.create(self.name, self.acronym)
+        session = Session()
+        with patch.object(KennelLogicModel, 'lookup_by_id', wraps=KennelLogicModel.lookup_by_id) as lookup:
+            first = session.get(KennelLogicModel, kennel.kennel_id)
+            second = session.get(KennelLogicModel, kennel.kennel_id)
+        self.assertIs(first, second)
+        self.assertEqual(first, kennel)
+        self.assertEqual(lookup.call_count, 1)
+
+    def test_get_many_reads_only_missing(self):
+        kennels = [KennelLogicModel.create(f'{self.name}_{x}', f'{self.acronym}{x}') for x in range(3)]
+        session = Session()
+        cached = session.get(KennelLogicModel, kennels[1].kennel_id)
+        ids = [kennels[2].kennel_id, kennels[1].kennel_id, 'missing', kennels[0].kennel_id, kennels[2].kennel_id]
+        with patch.object(KennelLogicModel, 'lookup_many', wraps=KennelLogicModel.lookup_many) as lookup:
+            actual = session.get_many(KennelLogicModel, ids)
+        lookup.assert_called_once_with([kennels[2].kennel_id, 'missing', kennels[0].kennel_id])
+        self.assertListEqual(actual, [kennels[2], kennels[1], None, kennels[0], kennels[2]])
+        self.assertIs(actual[1], cached)
+        self.assertIs(actual[0], actual[4])
+
+    def test_commit_writes_in_one_transaction(self):
+        kennel = KennelLogicModel(self.name, self.acronym)
+        hasher = HasherLogicModel('Hasher', kennel)
+        with patch.object(TransactWrite, 'commit', autospec=True, side_effect=TransactWrite.commit) as commit:
+            with Session() as session:
+                session.add(kennel)
+                session.add(hasher)
+                session.add(kennel)
+        self.assertEqual(commit.call_count, 1)
+        self.assertEqual(KennelLogicModel.lookup_by_id(kennel.kennel_id), kennel)
+        self.assertEqual(HasherLogicModel.lookup_by_id(hasher.hasher_id), hasher)
+        self.assertIsNotNone(kennel.persistence_object.created_at)
+        self.assertIs(session.get(KennelLogicModel, kennel.kennel_id), kennel)
+
+    def test_commit_updates_changed_attributes(self):
+        created = KennelLogicModel.create(self.name, self.acronym)
+        with Session() as session:
+            kennel = session.get(KennelLogicModel, created.kennel_id)
+            kennel.description = 'Updated'
+            session.add(kennel)
+        self.assertEqual(kennel.persistence_object.version, created.persistence_object.version + 1)
+        self.assertEqual(KennelLogicModel.lookup_by_id(created.kennel_id).description, 'Updated')
+
+    def test_commit_checks_uniqueness(self):
+        KennelLogicModel.create(self.name, self.acronym)
+        session = Session()
+        session.add(KennelLogicModel(self.name, 'OTHER'))
+        with self.assertRaises(AlreadyExists):
+            session.commit()
+
+    def test_commit_rejects_duplicates_within_session(self):
+        session = Session()
+        session.add(KennelLogicModel(self.name, self.acronym))
+        session.add(KennelLogicModel(self.name, 'OTHER'))
+        with self.assertRaises(AlreadyExists):
+            session.commit()
+        self.assertEqual(KennelDataModel.count(), 0)
+
+    def test_add_rejects_second_object_for_key(self):
+        kennel = KennelLogicModel.create(self.name, self.acronym)
+        session = Session()
+        session.get(KennelLogicModel, kennel.kennel_id)
+        with self.assertRaises(ValueError):
+            session.add(kennel)
+
+    def test_failed_commit_keeps_only_unwritten_objects(self):
+        kennels = [KennelLogicModel(f'{self.name}_{x}', f'{self.acronym}{x}') for x in range(2)]
+        session = Session()
+        for kennel in kennels:
+            session.add(kennel)
+        calls = list()
+        commit = TransactWrite.commit
+
+        def fail_second(transaction):
+            calls.append(transaction)
+            if len(calls) == 2:
+                raise RuntimeError('commit failed')
+            return commit(transaction)
+        with patch.object(TransactWrite, 'MAX_OPERATIONS', 1), \
+                patch.object(TransactWrite, 'commit', autospec=True, side_effect=fail_second):
+            with self.assertRaises(RuntimeError):
+                session.commit()
+        self.assertListEqual(session.dirty, [kennels[1]])
+        self.assertEqual(KennelLogicModel.lookup_by_id(kennels[0].kennel_id), kennels[0])
+        with patch.object(TransactWrite, 'commit', autospec=True, side_effect=TransactWrite.commit) as commit:
+            session.commit()
+        self.assertEqual(commit.call_count, 1)
+        self.assertEqual(KennelLogicModel.lookup_by_id(kennels[1].kennel_id), kennels[1])
+
+    def test_commit_rejects_object_larger_than_a_transaction(self):
+        session = Session()
+        session.add(KennelLogicModel(self.name, self.acronym))
+        with patch.object(TransactWrite, 'MAX_OPERATIONS', 0):
+            with self.assertRaises(ValueError) as context:
+                session.commit()
+        self.assertIn('more than fit in one transaction', str(context.exception))
+
+    def test_rollback_on_error(self):
+        kennel = KennelLogicModel(self.name, self.acronym)
+        with self.assertRaises(RuntimeError):
+            with Session() as session:
+                session.add(kennel)
+                raise RuntimeError('handler failed')
+        self.assertListEqual(session.dirty, list())
+        with self.assertRaises(KennelDataModel.DoesNotExist):
+            KennelLogicModel.lookup_by_id(kennel.kennel_id)
@@ -1,10 +1,19 @@
+from tests.models.persistence.aio_tests import AsyncPersistenceTests
 from tests.models.persistence.base_tests import BaseTests
+from tests.models.persistence.bulk_import_tests import BulkImportTests
+from tests.models.persistence.coalescing_tests import CoalescingTests
+from tests.models.persistence.connections_tests import ConnectionTests
 from tests.models.persistence.event_tests import EventTests
+from tests.models.persistence.geo_tests import GeoTests, ProximityTests
 from tests.models.persistence.hasher_tests import HasherTests
 from tests.models.persistence.kennel_tests import KennelTests
 from tests.models.persistence.kennel_member_tests import KennelMemberTests
+from tests.models.persistence.pagination_tests import PaginationTests
+from tests.models.persistence.propagation_tests import PropagationTests
 
-__all__ = ['BaseTests', 'EventTests', 'HasherTests', 'KennelTests', 'KennelMemberTests']
+__all__ = ['AsyncPersistenceTests', 'BaseTests', 'BulkImportTests', 'CoalescingTests', 'ConnectionTests', 'EventTests',
+           'GeoTests', 'HasherTests', 'KennelTests', 'KennelMemberTests', 'PaginationTests', 'PropagationTests',
+           'ProximityTests']
 
-# https://www.python.org/dev/peps/pep-0382/
-__import__('pkg_resources').declare_namespace(__name__)
+# pkgutil-style namespace package, see https://packaging.python.org/guides/packaging-namespace-packages/
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+from app.models.persistence import AlreadyExists, base
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from app.models.persistence.hasher import HasherReferenceModel
+from tests.models import logic
+
+
+class AsyncPersistenceTests(unittest.TestCase):
+    def setUp(self):
+        logic.clean_create_tables([KennelDataModel, KennelMemberDataModel])
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_save_and_get(self):
+        kennel = KennelDataModel('k1', name='Test Kennel', acronym='TKH3')
+        self.run_async(kennel.async_save())
+        self.assertEqual(kennel.version, 0)
+        actual = self.run_async(KennelDataModel.async_get('k1', consistent_read=True))
+        self.assertEqual((actual.name, actual.searchable_name), ('Test Kennel', 'testkennel'))
+
+    def test_save_keeps_uniqueness(self):
+        self.run_async(KennelDataModel('k1', name='Test Kennel', acronym='TKH3').async_save())
+        with self.assertRaises(AlreadyExists):
+            self.run_async(KennelDataModel('k2', name='test  kennel', acronym='TK2').async_save())
+
+    def test_update_changes(self):
+        kennel = KennelDataModel('k1', name='Test Kennel', acronym='TKH3')
+        self.run_async(kennel.async_save())
+        self.run_async(kennel.async_update_changes({'acronym': 'NEW'}))
+        self.assertEqual((kennel.searchable_acronym, kennel.version), ('new', 1))
+        kennel.add_update_action('description', 'set', 'A kennel')
+        self.run_async(kennel.async_update())
+        self.assertEqual(KennelDataModel.get('k1', consistent_read=True).description, 'A kennel')
+
+    def test_batch_write_get_and_query(self):
+        members = [KennelMemberDataModel('k1', f'h{x}', kennel_ref={'kennel_id': 'k1', 'name': 'K', 'acronym': 'K'},
+                                         hasher_ref=HasherReferenceModel(hasher_id=f'h{x}', hash_name=f'H{x}'))
+                   for x in range(5)]
+        self.run_async(KennelMemberDataModel.async_batch_write(members))
+        found = self.run_async(KennelMemberDataModel.async_batch_get_in_order([('k1', 'h3'), ('k1', 'none')]))
+        self.assertEqual([None if record is None else record.hasher_id for record in found], ['h3', None])
+
+        async def collect():
+            return [record.hasher_id async for record in KennelMemberDataModel.async_query('k1', page_size=2)]
+        self.assertEqual(self.run_async(collect()), [f'h{x}' for x in range(5)])
+
+    def test_batch_write_publishes_changes(self):
+        members = [KennelMemberDataModel('k1', f'h{x}', kennel_ref={'kennel_id': 'k1', 'name': 'K', 'acronym': 'K'},
+                                         hasher_ref=HasherReferenceModel(hasher_id=f'h{x}', hash_name=f'H{x}'))
+                   for x in range(3)]
+        changes = list()
+
+        def listener(event_name, model_class, keys, new_image):
+            changes.append((event_name, keys['hasher_id']['S']))
+        base.change_listeners.append(listener)
+        try:
+            self.run_async(KennelMemberDataModel.async_batch_write(members[:2]))
+            self.run_async(KennelMemberDataModel.async_batch_write(members[2:], items_to_delete=members[1:2]))
+        finally:
+            base.change_listeners.remove(listener)
+        self.assertListEqual(changes, [('INSERT', 'h0'), ('INSERT', 'h1'), ('INSERT', 'h2'), ('REMOVE', 'h1')])
+
+    def test_batch_write_refuses_conditional_writes(self):
+        kennel = KennelDataModel('k1', name='Test Kennel', acronym='TKH3')
+        kennel.save()
+        kennel.description = 'A kennel'
+        with self.assertRaises(ValueError):
+            self.run_async(KennelDataModel.async_batch_write([kennel]))
+        self.assertEqual(kennel.version, 0)
+        self.assertIsNone(KennelDataModel.get('k1', consistent_read=True).description)
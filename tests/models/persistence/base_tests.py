@@ -1,6 +1,12 @@
 import unittest
 from app.models.persistence.base import BaseMeta, BaseModel
-from pynamodb.attributes import ListAttribute, NumberAttribute, UnicodeAttribute, UnicodeSetAttribute
+from pynamodb.attributes import ListAttribute, MapAttribute, NumberAttribute, UnicodeAttribute, UnicodeSetAttribute
+
+
+class BaseTestReferenceModel(MapAttribute):
+    hash_key = UnicodeAttribute()
+    non_key_value = UnicodeAttribute()
+    missing_value = UnicodeAttribute(null=True)
 
 
 class BaseTestModel(BaseModel):
@@ -24,6 +30,12 @@ class BaseTestModel(BaseModel):
     def test_hook_action_generation(self, value):
         return [BaseTestModel.hook_attribute.set(value)]
 
+    def numeric_hook_action(self, value):
+        return [BaseTestModel.hook_attribute.set(str(value))]
+
+    def set_hook_attribute(self):
+        self.hook_attribute = 'saved'
+
 
 class BaseTests(unittest.TestCase):
     @classmethod
@@ -154,6 +166,19 @@ class BaseTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             b.add_update_action('list_attribute', 'append', ['b'])
 
+    def test_field_object_cached(self):
+        self.assertIs(BaseTestModel.__get_field_object__('non_key_value'), BaseTestModel.non_key_value)
+        self.assertIn('non_key_value', BaseTestModel._field_objects_)
+
+    def test_to_ref(self):
+        b = BaseTestModel('a', 'b', non_key_value='c', numeric_value=1)
+        ref = b.to_ref(BaseTestReferenceModel)
+        self.assertEqual(ref.hash_key, 'a')
+        self.assertEqual(ref.non_key_value, 'c')
+        self.assertIsNone(ref.missing_value)
+        self.assertSetEqual(set(BaseTestModel.reference_keys(BaseTestReferenceModel)),
+                            {'hash_key', 'non_key_value', 'missing_value'})
+
     def test_assign_or_extend_assign(self):
         b = BaseTestModel('a', 'b', non_key_value='c', numeric_value=1, list_attribute=['a'])
         b.assign_or_extend('cheese', ['a', 'b', 'c'])
@@ -180,6 +205,21 @@ class BaseTests(unittest.TestCase):
         b.assign_or_update('cheese', {'b': 3, 'c': 4})
         self.assertDictEqual(b.cheese, {'a': 1, 'b': 3, 'c': 4})
 
+    def test_assign_or_extend_hook_chain(self):
+        b = BaseTestModel('a', 'b', non_key_value='c')
+        b.assign_or_extend('before_save_hooks', ['set_hook_attribute'])
+        b.save()
+        self.assertEqual(BaseTestModel.get('a', 'b').hook_attribute, 'saved')
+        self.assertTupleEqual(BaseTestModel.before_save_hooks, tuple())
+
+    def test_assign_or_update_hook_chain(self):
+        b = BaseTestModel('a', 'b', non_key_value='c')
+        b.assign_or_update('update_action_hooks', {'set': {'numeric_value': 'numeric_hook_action'}})
+        b.add_update_action('numeric_value', 'set', 1)
+        self.assertNotIn('numeric_value', BaseTestModel.update_action_hooks['set'])
+        self.assertTrue(all(callable(hook) for hook in BaseTestModel.update_action_hooks['set'].values()))
+        self.assertEqual(len(b.update_actions), 2)
+
     def test_assign_or_update_non_dict_value(self):
         b = BaseTestModel('a', 'b', non_key_value='c', numeric_value=1, list_attribute=['a'])
         with self.assertRaises(ValueError):
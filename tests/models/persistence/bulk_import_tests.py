@@ -0,0 +1,128 @@
+import io
+import unittest
+from unittest.mock import patch
+from app.models.persistence.bulk_import import BulkImporter, ImportJobModel, ImportKind, read_rows
+from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from app.models.persistence.unique_key import UniqueKeyDataModel
+from app.models.logic.hasher import HasherLogicModel
+from app.models.logic.kennel import KennelLogicModel
+from pynamodb.connection import TableConnection
+from pynamodb.constants import UNPROCESSED_ITEMS
+from tests.models import logic
+
+KENNELS_CSV = '''name,acronym,region,contact
+Test Kennel,TKH3,North;South,"{""email"": ""gm@tkh3.org""}"
+test  kennel,TK2,,
+Other Kennel,OKH3,,
+Existing Kennel,EKH3,,
+No Acronym,,,
+'''
+
+
+class BulkImportTests(unittest.TestCase):
+    def setUp(self):
+        logic.clean_create_tables([HasherDataModel, ImportJobModel, KennelDataModel, KennelMemberDataModel])
+        self.importer = BulkImporter(chunk_size=2, max_workers=2, max_pending=2, units_per_second=1000)
+        self.existing = KennelLogicModel.create('Existing Kennel', 'EKH3')
+
+    def test_import_kennels(self):
+        report = self.importer.run('kennels', 'kennels', read_rows(io.StringIO(KENNELS_CSV)))
+        self.assertEqual((report.read, report.written, report.duplicates, report.existing, report.rejected),
+                         (5, 2, 1, 1, 1))
+        (kennel,) = KennelDataModel.name_index.query('testkennel')
+        self.assertEqual((kennel.acronym, kennel.region, kennel.contact, kennel.version),
+                         ('TKH3', ['North', 'South'], {'email': 'gm@tkh3.org'}, 0))
+        self.assertIsNotNone(kennel.created_at)
+        self.assertEqual(KennelDataModel.count(), 3)
+
+    def test_import_hashers_and_memberships(self):
+        lines = ['{"hash_name": "Testy Hasher", "mother_kennel": "existing  kennel"}',
+                 '{"hash_name": "testy hasher", "mother_kennel_id": "%s"}' % self.existing.kennel_id,
+                 '{"hash_name": "Lost Hasher", "mother_kennel": "Nowhere"}',
+                 '{"hash_name": "Other Hasher", "mother_kennel": "Existing Kennel", "real_name": "Bob"}']
+        report = self.importer.run('hashers', 'hashers', read_rows(io.StringIO('\n'.join(lines)), 'json'))
+        self.assertEqual((report.written, report.duplicates, report.rejected), (2, 1, 1))
+        hashers = {hasher.hash_name: hasher for hasher in HasherDataModel.scan()}
+        self.assertEqual(hashers['Testy Hasher'].mother_kennel_id, self.existing.kennel_id)
+        self.assertEqual(hashers['Other Hasher'].real_name, 'Bob')
+        rows = [{'kennel': 'Existing Kennel', 'hash_name': 'Testy Hasher', 'mother_kennel': 'Existing Kennel'},
+                {'kennel_id': self.existing.kennel_id, 'hasher_id': hashers['Other Hasher'].hasher_id},
+                {'kennel': 'existing kennel', 'hasher_id': hashers['Other Hasher'].hasher_id}]
+        report = self.importer.run('members', 'memberships', iter(rows))
+        self.assertEqual((report.written, report.duplicates), (2, 1))
+        kennel = KennelLogicModel.lookup_by_id(self.existing.kennel_id)
+        self.assertEqual(sorted(member.hash_name for member in kennel.members), ['Other Hasher', 'Testy Hasher'])
+        hasher = HasherLogicModel.lookup_by_id(hashers['Testy Hasher'].hasher_id)
+        self.assertTrue(kennel.has_member(hasher))
+
+    def test_resume_after_failure(self):
+        rows = [{'name': f'Kennel {x}', 'acronym': f'K{x}'} for x in range(6)]
+        original = TableConnection.batch_write_item
+        calls = list()
+
+        def fail_third(connection, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError('crash')
+            return original(connection, *args, **kwargs)
+        importer = BulkImporter(chunk_size=2, max_workers=1, max_pending=1, units_per_second=1000)
+        with patch.object(TableConnection, 'batch_write_item', fail_third):
+            with self.assertRaises(RuntimeError):
+                importer.run('resume', 'kennels', iter(rows))
+        self.assertEqual(ImportJobModel.get('resume').position, 4)
+        report = importer.run('resume', 'kennels', iter(rows))
+        self.assertEqual((report.read, report.written), (6, 6))
+        self.assertEqual(KennelDataModel.count(), 7)
+        self.assertEqual(importer.run('resume', 'kennels', iter(rows)), report)
+
+    def test_retries_unprocessed_items(self):
+        original = TableConnection.batch_write_item
+        calls = list()
+
+        def leave_one(connection, put_items=None, **kwargs):
+            calls.append(len(put_items))
+            if len(calls) > 1:
+                return original(connection, put_items=put_items, **kwargs)
+            original(connection, put_items=put_items[:-1], **kwargs)
+            return {UNPROCESSED_ITEMS: {'kennels': [{'PutRequest': {'Item': put_items[-1]}}]}}
+        rows = [{'name': f'Kennel {x}', 'acronym': f'K{x}'} for x in range(3)]
+        with patch.object(TableConnection, 'batch_write_item', leave_one):
+            report = BulkImporter(chunk_size=10, units_per_second=1000).run('retry', 'kennels', iter(rows))
+        self.assertEqual(calls, [3, 1])
+        self.assertEqual((report.written, KennelDataModel.count()), (3, 4))
+
+    def test_malformed_json_line_is_rejected(self):
+        lines = ['{"name": "Test Kennel", "acronym": "TKH3"}', '{"name": "Broken', '["not", "a", "row"]',
+                 '{"name": "Other Kennel", "acronym": "OKH3"}']
+        report = self.importer.run('json', 'kennels', read_rows(io.StringIO('\n'.join(lines)), 'json'))
+        self.assertEqual((report.read, report.written, report.rejected), (4, 2, 2))
+        self.assertEqual(KennelDataModel.count(), 3)
+
+    def test_guarded_import_claims_keys_conditionally(self):
+        logic.clean_create_tables([UniqueKeyDataModel])
+        claimed = KennelDataModel('other', name='Claimed Kennel', acronym='CKH3')
+        UniqueKeyDataModel(claimed.unique_key(), owner_table='kennels', owner_key='other').save()
+        rows = [{'name': 'Test Kennel', 'acronym': 'TKH3'}, {'name': 'Claimed Kennel', 'acronym': 'CKH3'}]
+        KennelDataModel.Meta.unique_key_guard = True
+        try:
+            report = self.importer.run('guarded', 'kennels', iter(rows))
+            self.assertEqual((report.written, report.existing), (1, 1))
+            self.assertEqual(KennelDataModel.count(), 2)
+            (kennel,) = KennelDataModel.name_index.query('testkennel')
+            self.assertEqual(UniqueKeyDataModel.get(kennel.unique_key()).owner_key, kennel.kennel_id)
+            self.assertEqual(UniqueKeyDataModel.get(claimed.unique_key()).owner_key, 'other')
+        finally:
+            KennelDataModel.Meta.unique_key_guard = False
+            UniqueKeyDataModel.delete_table()
+
+    def test_import_kinds_implement_build(self):
+        class IncompleteImport(ImportKind):
+            model_class = KennelDataModel
+
+        with self.assertRaises(TypeError):
+            IncompleteImport(None)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            self.importer.run('job', 'events', iter([]))
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from app.models.persistence.coalescing import CoalescingTableConnection, request_key, SingleFlight
+from app.models.persistence.kennel import KennelDataModel
+from pynamodb.connection import TableConnection
+
+
+class CoalescingTests(unittest.TestCase):
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def slow_call(self, *args, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        return {'Item': {'kennel_id': {'S': 'k1'}}}
+
+    def run_concurrently(self, function, count=8):
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(function) for _ in range(count)]
+            while self.single_flight.calls + self.single_flight.shared < count and self.calls < count:
+                time.sleep(0.01)
+            self.release.set()
+            return [future.result() for future in futures]
+
+    def test_shares_one_call(self):
+        results = self.run_concurrently(lambda: self.single_flight.do('key', self.slow_call))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.single_flight.shared, 7)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.single_flight.in_flight, dict())
+
+    def test_shares_errors(self):
+        def fail():
+            self.release.wait(5)
+            raise KeyError('boom')
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(self.single_flight.do, 'key', fail) for _ in range(2)]
+            time.sleep(0.05)
+            self.release.set()
+            for future in futures:
+                with self.assertRaises(KeyError):
+                    future.result()
+
+    def test_coalesces_identical_gets(self):
+        connection = CoalescingTableConnection('kennels', single_flight=self.single_flight)
+        with patch.object(TableConnection, 'get_item', side_effect=self.slow_call):
+            self.run_concurrently(lambda: connection.get_item('k1'))
+        self.assertEqual(self.calls, 1)
+
+    def test_consistent_reads_are_not_coalesced(self):
+        connection = CoalescingTableConnection('kennels', single_flight=self.single_flight)
+        self.release.set()
+        with patch.object(TableConnection, 'get_item', side_effect=self.slow_call):
+            self.run_concurrently(lambda: connection.get_item('k1', consistent_read=True), count=3)
+        self.assertEqual(self.calls, 3)
+
+    def test_query_parameters_are_part_of_the_key(self):
+        self.assertEqual(request_key(KennelDataModel.name == 'a'), request_key(KennelDataModel.name == 'a'))
+        self.assertNotEqual(request_key(KennelDataModel.name == 'a'), request_key(KennelDataModel.name == 'b'))
+        self.assertEqual(request_key({'b': 1, 'a': 2}), request_key({'a': 2, 'b': 1}))
+        self.assertEqual(request_key(['a', 'b']), ('a', 'b'))
+
+    def test_models_use_coalescing_connections(self):
+        self.assertIsInstance(KennelDataModel._get_connection(), CoalescingTableConnection)
+        self.assertEqual(KennelDataModel._get_connection().table_name, 'kennels')
@@ -0,0 +1,51 @@
+import unittest
+from app.models.persistence.base import BaseMeta, BaseModel
+from app.models.persistence.connections import connection_settings, ConnectionRegistry, session_class
+from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.kennel import KennelDataModel
+from pynamodb.attributes import UnicodeAttribute
+from tests.models import logic
+
+
+class MissingTableModel(BaseModel):
+    class Meta(BaseMeta):
+        table_name = 'connection_tests_missing'
+        connections = ConnectionRegistry()
+
+    test_id = UnicodeAttribute(hash_key=True)
+
+
+class ConnectionTests(unittest.TestCase):
+    def test_models_share_a_connection(self):
+        self.assertIs(KennelDataModel._get_connection().connection, HasherDataModel._get_connection().connection)
+        self.assertIsNot(KennelDataModel._get_connection(), HasherDataModel._get_connection())
+
+    def test_settings_from_meta(self):
+        settings = connection_settings(KennelDataModel.Meta)
+        self.assertEqual(settings.pool_size, BaseMeta.pool_size)
+        connection = KennelDataModel._get_connection().connection
+        self.assertEqual(connection._request_timeout_seconds,
+                         (BaseMeta.connect_timeout_seconds, BaseMeta.read_timeout_seconds))
+        self.assertEqual(connection._max_retry_attempts_exception, BaseMeta.max_retry_attempts)
+        adapter = connection.requests_session.get_adapter('https://dynamodb.us-east-1.amazonaws.com')
+        self.assertEqual(adapter._pool_maxsize, BaseMeta.pool_size)
+
+    def test_keep_alive(self):
+        self.assertNotIn('close', session_class(2, True)().headers.get('Connection', ''))
+        self.assertEqual(session_class(2, False)().headers['Connection'], 'close')
+
+    def test_warm_up(self):
+        logic.clean_create_tables([KennelDataModel])
+        connection = KennelDataModel._get_connection().connection
+        connection._tables.pop(KennelDataModel.Meta.table_name, None)
+        self.assertEqual(KennelDataModel.Meta.connections.warm_up([KennelDataModel], connections=2), list())
+        self.assertIn(KennelDataModel.Meta.table_name, connection._tables)
+
+    def test_warm_up_keeps_the_table_description(self):
+        logic.clean_create_tables([KennelDataModel])
+        KennelDataModel._meta_table = None
+        KennelDataModel.Meta.connections.warm_up([KennelDataModel])
+        self.assertEqual(KennelDataModel._meta_table.hash_keyname, 'kennel_id')
+
+    def test_warm_up_reports_missing_tables(self):
+        self.assertEqual(MissingTableModel.Meta.connections.warm_up(), ['connection_tests_missing'])
@@ -1,6 +1,7 @@
 import unittest
 from datetime import datetime, timezone
-from app.models.persistence.event import EventDataModel, HareEventDataModel, KennelEventDataModel
+from unittest.mock import patch
+from app.models.persistence.event import EventDataModel, EventReferenceModel, HareEventDataModel, KennelEventDataModel
 from app.models.persistence.hasher import HasherReferenceModel
 from app.models.persistence.kennel import KennelReferenceModel
 from freezegun import freeze_time
@@ -181,6 +182,15 @@ class HareEventTests(unittest.TestCase):
         self.assertEqual(retrieved_obj, self.hare_event)
         self.assertTrue(retrieved_obj.event_id, 'changed')
 
+    def test_events(self):
+        with patch.object(HareEventDataModel, 'from_raw_data') as from_raw_data:
+            actual = list(HareEventDataModel.events(self.hares[0].hasher_id))
+        from_raw_data.assert_not_called()
+        self.assertEqual(len(actual), 1)
+        self.assertIsInstance(actual[0], EventReferenceModel)
+        self.assertEqual(actual[0].event_id, self.event_id)
+        self.assertEqual(actual[0].start_time, self.start_time)
+
     def test_delete(self):
         self.assertTrue(self.hare_event.exists())
         self.hare_event.delete()
@@ -239,6 +249,13 @@ class KennelEventTests(unittest.TestCase):
         self.assertEqual(retrieved_obj, self.kennel_event)
         self.assertTrue(retrieved_obj.event_id, 'changed')
 
+    def test_events(self):
+        with patch.object(KennelEventDataModel, 'from_raw_data') as from_raw_data:
+            actual = list(KennelEventDataModel.events(self.kennels[0].kennel_id))
+        from_raw_data.assert_not_called()
+        self.assertListEqual([ref.event_id for ref in actual], [self.event_id])
+        self.assertListEqual(list(KennelEventDataModel.events('kennel_2')), list())
+
     def test_delete(self):
         self.assertTrue(self.kennel_event.exists())
         self.kennel_event.delete()
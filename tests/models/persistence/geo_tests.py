@@ -0,0 +1,128 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from app.models.persistence import geo
+from app.models.persistence.base import BaseMeta
+from app.models.persistence.event import EventReferenceModel
+from app.models.persistence.location import EventLocationDataModel, LocationDataModel, LocationReferenceModel
+from app.models.persistence.mixins.geohash_buckets import GeohashBucketsMixin
+from pynamodb.attributes import UnicodeAttribute
+from pynamodb.models import Model
+from tests.models.logic import clean_create_tables
+
+
+class GeoTests(unittest.TestCase):
+    def test_encode(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geo.encode(40.7128, -74.006, 5), 'dr5re')
+
+    def test_decode_exactly(self):
+        latitude, longitude, lat_error, lon_error = geo.decode_exactly('u4pruydqqvj')
+        self.assertAlmostEqual(latitude, 57.64911, delta=lat_error)
+        self.assertAlmostEqual(longitude, 10.40744, delta=lon_error)
+
+    def test_cell_and_neighbours(self):
+        cells = geo.cell_and_neighbours('dr5re')
+        self.assertEqual(len(set(cells)), 9)
+        self.assertEqual(cells[0], 'dr5re')
+        latitude, longitude, lat_error, lon_error = geo.decode_exactly('dr5re')
+        for (lat_step, lon_step) in [(1, 1), (-1, 0), (0, -1)]:
+            point = geo.encode(latitude + 1.5 * lat_error * lat_step, longitude + 1.5 * lon_error * lon_step, 5)
+            self.assertIn(point, cells)
+
+    def test_cell_and_neighbours_wraps(self):
+        cells = geo.cell_and_neighbours(geo.encode(0.1, 179.99, 3))
+        self.assertIn(geo.encode(0.1, -179.99, 3), cells)
+        self.assertEqual(len(geo.cell_and_neighbours(geo.encode(89.99, 0.0, 2))), 6)
+
+    def test_haversine(self):
+        self.assertAlmostEqual(geo.haversine_km(51.5074, -0.1278, 48.8566, 2.3522), 343.5, delta=1)
+        self.assertEqual(geo.haversine_km(40.0, -74.0, 40.0, -74.0), 0)
+
+    def test_precision_for_radius(self):
+        precisions = EventLocationDataModel.GEOHASH_PRECISIONS
+        self.assertEqual(geo.precision_for_radius(1, 40.7, precisions), 5)
+        self.assertEqual(geo.precision_for_radius(10, 40.7, precisions), 4)
+        self.assertEqual(geo.precision_for_radius(100, 40.7, precisions), 3)
+        self.assertIsNone(geo.precision_for_radius(1000, 40.7, precisions))
+
+
+class ProximityTests(unittest.TestCase):
+    def setUp(self):
+        clean_create_tables([EventLocationDataModel, LocationDataModel])
+        self.latitude = 40.7128
+        self.longitude = -74.006
+        self.start_time = datetime(2019, 6, 1, 18, tzinfo=timezone.utc)
+
+    def event_location(self, name, north_km, days=0):
+        latitude = self.latitude + north_km / geo.KM_PER_DEGREE
+        geohash = geo.encode(latitude, self.longitude, 8)
+        start_time = self.start_time + timedelta(days=days)
+        location_ref = LocationReferenceModel(geohash=geohash, name=name, address1='1 Main St', address2='',
+                                              city='New York', state_province_region='NY', postal_code='10001',
+                                              latitude=latitude, longitude=self.longitude)
+        event_ref = EventReferenceModel(event_id=name, hares=[], name=name, description='A trail', kennels=[],
+                                        start_time=start_time, start_location=name)
+        return EventLocationDataModel(geohash, start_time, location_ref=location_ref, event_ref=event_ref)
+
+    def save_event_location(self, name, north_km, days=0):
+        self.event_location(name, north_km, days).save()
+
+    def test_events_near(self):
+        for (name, north_km) in [('far', 8), ('near', 0.5), ('nearby', -2), ('across town', 3.5)]:
+            self.save_event_location(name, north_km)
+        actual = EventLocationDataModel.events_near(self.latitude, self.longitude, 3)
+        self.assertListEqual([record.event_ref.name for (_, record) in actual], ['near', 'nearby'])
+        self.assertAlmostEqual(actual[0][0], 0.5, places=2)
+        actual = EventLocationDataModel.events_near(self.latitude, self.longitude, 10, limit=3)
+        self.assertListEqual([record.event_ref.name for (_, record) in actual], ['near', 'nearby', 'across town'])
+
+    def test_events_near_time_window(self):
+        for day in range(4):
+            self.save_event_location(f'day {day}', 0.1 * (day + 1), days=day)
+        actual = EventLocationDataModel.events_near(self.latitude, self.longitude, 1,
+                                                    start=self.start_time + timedelta(days=1),
+                                                    end=self.start_time + timedelta(days=2))
+        self.assertListEqual([record.event_ref.name for (_, record) in actual], ['day 1', 'day 2'])
+
+    def test_locations_near(self):
+        for (name, north_km) in [('Park', 1), ('Bar', 0.2), ('Far Park', 30)]:
+            latitude = self.latitude + north_km / geo.KM_PER_DEGREE
+            LocationDataModel(geo.encode(latitude, self.longitude, 8), LocationDataModel.searchable_value(name),
+                              name=name, address1='1 Main St', address2='Suite 1', city='New York',
+                              state_province_region='NY', postal_code='10001', latitude=latitude,
+                              longitude=self.longitude).save()
+        actual = LocationDataModel.near(self.latitude, self.longitude, 5)
+        self.assertListEqual([record.name for (_, record) in actual], ['Bar', 'Park'])
+
+    def test_backfill_geohash_buckets(self):
+        self.save_event_location('near', 0.5)
+        legacy = self.event_location('legacy', 1)
+        legacy.save()
+        Model.update(legacy, actions=[getattr(EventLocationDataModel, f'geohash_{precision}').remove()
+                                      for precision in EventLocationDataModel.GEOHASH_PRECISIONS])
+        self.assertListEqual([record.event_ref.name for (_, record) in
+                              EventLocationDataModel.events_near(self.latitude, self.longitude, 3)], ['near'])
+        self.assertEqual(EventLocationDataModel.backfill_geohash_buckets(), 1)
+        self.assertListEqual([record.event_ref.name for (_, record) in
+                              EventLocationDataModel.events_near(self.latitude, self.longitude, 3)],
+                             ['near', 'legacy'])
+        self.assertEqual(EventLocationDataModel.backfill_geohash_buckets(), 0)
+
+    def test_coordinates_required(self):
+        class NoCoordinatesModel(GeohashBucketsMixin):
+            class Meta(BaseMeta):
+                table_name = 'no_coordinates'
+
+            geohash = UnicodeAttribute(hash_key=True)
+
+        with self.assertRaises(TypeError):
+            NoCoordinatesModel('dr5re')
+
+    def test_radius_too_large(self):
+        with self.assertRaises(ValueError):
+            EventLocationDataModel.events_near(self.latitude, self.longitude, 1000)
+
+    def tearDown(self):
+        for table in [EventLocationDataModel, LocationDataModel]:
+            if table.exists():
+                table.delete_table()
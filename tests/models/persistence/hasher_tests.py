@@ -3,6 +3,7 @@ from datetime import datetime, timezone
 from app.models.persistence import AlreadyExists
 from app.models.persistence.hasher import HasherDataModel
 from freezegun import freeze_time
+from pynamodb.models import Model
 
 
 class HasherTests(unittest.TestCase):
@@ -133,6 +134,15 @@ class HasherTests(unittest.TestCase):
         start.save()
         self.assertTrue(HasherDataModel.record_exists(start))
 
+    def test_backfill_mother_kennel_id(self):
+        HasherDataModel(self.hasher_id, hash_name=self.name, mother_kennel=self.kennel).save()
+        Model.update(HasherDataModel.get(self.hasher_id), actions=[HasherDataModel.mother_kennel_id.remove()])
+        self.assertEqual(HasherDataModel.mother_kennel_index.count(self.kennel['kennel_id']), 0)
+        self.assertEqual(HasherDataModel.backfill_mother_kennel_id(), 1)
+        self.assertListEqual([hasher.hasher_id for hasher in
+                              HasherDataModel.mother_kennel_index.query(self.kennel['kennel_id'])], [self.hasher_id])
+        self.assertEqual(HasherDataModel.backfill_mother_kennel_id(), 0)
+
     def test_is_ref(self):
         mdl = HasherDataModel('hasher1', mother_kennel=self.kennel, hash_name=self.name)
         ref = mdl.to_ref()
@@ -1,5 +1,6 @@
 import unittest
 from datetime import datetime, timezone
+from unittest.mock import patch
 from app.models.logic.hasher import HasherLogicModel
 from app.models.logic.kennel import KennelLogicModel
 from app.models.persistence.hasher import HasherDataModel
@@ -63,3 +64,39 @@ class KennelMemberTests(unittest.TestCase):
         actual_names = [hasher.hash_name for hasher in actual]
         expected_names = [f'hasher_1{x}' for x in range(5)]
         self.assertListEqual(actual_names, expected_names)
+
+    def test_members_resume_from_cursor(self):
+        for x in range(5):
+            hasher = HasherDataModel(f'hasher_{x}', hash_name=f'Hasher {x}', mother_kennel=self.kennel.to_ref())
+            KennelMemberDataModel(self.kennel.kennel_id, hasher.hasher_id, hasher_ref=hasher.to_ref(),
+                                  kennel_ref=self.kennel.to_ref()).save()
+        stream = KennelMemberDataModel.stream_members(self.kennel.kennel_id, page_size=2)
+        first = stream.take(3)
+        cursor = stream.cursor
+        rest = list(KennelMemberDataModel.stream_members(self.kennel.kennel_id, page_size=2, cursor=cursor))
+        self.assertListEqual([ref.hasher_id for ref in first + rest], [f'hasher_{x}' for x in range(5)])
+        self.assertEqual(len(list(stream)), 2)
+        self.assertIsNone(stream.cursor)
+
+    def test_members_projection(self):
+        KennelMemberDataModel(self.kennel.kennel_id, self.hasher.hasher_id, kennel_ref=self.kennel.to_ref(),
+                              hasher_ref=self.hasher.to_ref()).save()
+        with patch.object(KennelMemberDataModel, 'from_raw_data') as from_raw_data:
+            actual = KennelMemberDataModel.members(self.kennel.kennel_id)
+        from_raw_data.assert_not_called()
+        self.assertListEqual(actual, [self.hasher.to_ref()])
+
+    def test_memberships(self):
+        other = KennelLogicModel.create('Test Kennel 2', 'TK2H3').persistence_object
+        for kennel in [other, self.kennel]:
+            KennelMemberDataModel(kennel.kennel_id, self.hasher.hasher_id, kennel_ref=kennel.to_ref(),
+                                  hasher_ref=self.hasher.to_ref()).save()
+        actual = list(KennelMemberDataModel.memberships(self.hasher.hasher_id))
+        expected = sorted([other.to_ref(), self.kennel.to_ref()], key=lambda ref: ref.kennel_id)
+        self.assertListEqual(actual, expected)
+
+    def test_is_member(self):
+        self.assertFalse(KennelMemberDataModel.is_member(self.kennel.kennel_id, self.hasher.hasher_id))
+        KennelMemberDataModel(self.kennel.kennel_id, self.hasher.hasher_id, kennel_ref=self.kennel.to_ref(),
+                              hasher_ref=self.hasher.to_ref()).save()
+        self.assertTrue(KennelMemberDataModel.is_member(self.kennel.kennel_id, self.hasher.hasher_id))
@@ -1,6 +1,6 @@
 import unittest
 from datetime import datetime, timezone
-from app.models.persistence import AlreadyExists
+from app.models.persistence import AlreadyExists, VersionConflict
 from app.models.persistence.kennel import KennelDataModel
 from freezegun import freeze_time
 
@@ -108,6 +108,12 @@ class KennelTests(unittest.TestCase):
         with self.assertRaises(AlreadyExists):
             kennel2.save()
 
+    def test_stream_matching_records(self):
+        kennel = KennelDataModel(self.kennel_id, name=self.name, acronym=self.acronym)
+        kennel.save()
+        self.assertListEqual(list(KennelDataModel.stream_matching_records(kennel, False, page_size=1)), [kennel])
+        self.assertListEqual(list(KennelDataModel.stream_matching_records_by_name(kennel, page_size=1)), list())
+
     def test_save_with_existing_record(self):
         KennelDataModel('kennel1', name=self.name, acronym=self.acronym).save()
         with self.assertRaises(AlreadyExists):
@@ -184,3 +190,38 @@ class KennelTests(unittest.TestCase):
         k.update()
         k.refresh()
         self.assertEqual(k.searchable_acronym, k.searchable_value(new_acronym))
+
+    def test_allocate_trail_number(self):
+        KennelDataModel(self.kennel_id, name=self.name, acronym=self.acronym).save()
+        self.assertListEqual(list(KennelDataModel.allocate_trail_numbers(self.kennel_id)), [1])
+        self.assertListEqual(list(KennelDataModel.allocate_trail_numbers(self.kennel_id)), [2])
+        self.assertEqual(KennelDataModel.get(self.kennel_id).next_trail_number, 3)
+
+    def test_allocate_trail_number_block(self):
+        KennelDataModel(self.kennel_id, name=self.name, acronym=self.acronym, next_trail_number=100).save()
+        self.assertListEqual(list(KennelDataModel.allocate_trail_numbers(self.kennel_id, count=3)), [100, 101, 102])
+        self.assertListEqual(list(KennelDataModel.allocate_trail_numbers(self.kennel_id)), [103])
+
+    def test_stale_save_after_allocation(self):
+        KennelDataModel(self.kennel_id, name=self.name, acronym=self.acronym).save()
+        stale = KennelDataModel.get(self.kennel_id, consistent_read=True)
+        self.assertListEqual(list(KennelDataModel.allocate_trail_numbers(self.kennel_id, count=3)), [1, 2, 3])
+        stale.description = 'stale'
+        with self.assertRaises(VersionConflict):
+            stale.save()
+        self.assertListEqual(list(KennelDataModel.allocate_trail_numbers(self.kennel_id)), [4])
+
+    def test_allocate_trail_number_updates_record(self):
+        record = KennelDataModel(self.kennel_id, name=self.name, acronym=self.acronym)
+        record.save()
+        KennelDataModel.allocate_trail_numbers(self.kennel_id, count=2, record=record)
+        self.assertEqual((record.next_trail_number, record.version), (3, 1))
+        record.description = 'current'
+        record.save()
+        self.assertEqual(KennelDataModel.get(self.kennel_id, consistent_read=True).next_trail_number, 3)
+
+    def test_allocate_trail_number_missing_kennel(self):
+        with self.assertRaises(KennelDataModel.DoesNotExist):
+            KennelDataModel.allocate_trail_numbers(self.kennel_id)
+        with self.assertRaises(ValueError):
+            KennelDataModel.allocate_trail_numbers(self.kennel_id, count=0)
@@ -0,0 +1,20 @@
+import unittest
+from app.models.persistence.pagination import decode_cursor, encode_cursor
+
+
+class PaginationTests(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        last_evaluated_key = {'kennel_id': {'S': 'kennel_1'}, 'hasher_id': {'S': 'hasher/+=1'}}
+        cursor = encode_cursor(last_evaluated_key)
+        self.assertNotIn('/', cursor)
+        self.assertNotIn('+', cursor)
+        self.assertDictEqual(decode_cursor(cursor), last_evaluated_key)
+
+    def test_no_cursor(self):
+        self.assertIsNone(encode_cursor(None))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_invalid_cursor(self):
+        for cursor in ['not a cursor', encode_cursor({'a': 1})[:-2], 'WzFd']:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
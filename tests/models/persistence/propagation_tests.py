@@ -0,0 +1,113 @@
+import unittest
+from datetime import datetime, timezone
+from app.models.logic.event import EventLogicModel
+from app.models.logic.hasher import HasherLogicModel
+from app.models.logic.kennel import KennelLogicModel
+from app.models.persistence import VersionConflict
+from app.models.persistence.event import EventDataModel, HareEventDataModel, KennelEventDataModel
+from app.models.persistence.hasher import HasherDataModel
+from app.models.persistence.kennel import KennelDataModel, KennelMemberDataModel
+from app.models.persistence.location import EventLocationDataModel, LocationReferenceModel
+from app.models.persistence.propagation import PropagationJobModel, ReferencePropagator
+from app.models.persistence.throttle import CapacityThrottle
+from tests.models import logic
+
+
+class PropagationTests(unittest.TestCase):
+    tables = [EventDataModel, EventLocationDataModel, HareEventDataModel, HasherDataModel, KennelDataModel,
+              KennelEventDataModel, KennelMemberDataModel, PropagationJobModel]
+
+    def setUp(self):
+        logic.clean_create_tables(self.tables)
+        self.propagator = ReferencePropagator(batch_size=2, units_per_second=1000)
+        self.kennel = KennelLogicModel.create('Test Kennel', 'TKH3')
+        self.hashers = [HasherLogicModel.create(f'Hasher {x}', self.kennel) for x in range(3)]
+        for hasher in self.hashers:
+            self.kennel.add_member(hasher)
+
+    def test_kennel_rename(self):
+        self.kennel.name = 'Renamed Kennel'
+        self.kennel.acronym = 'RKH3'
+        self.kennel.save()
+        self.propagator.enqueue_kennel(self.kennel.kennel_id)
+        (job,) = self.propagator.run_pending()
+        self.assertEqual(job.rewritten, 6)
+        for member in KennelMemberDataModel.query(self.kennel.kennel_id):
+            self.assertEqual((member.kennel_ref.name, member.kennel_ref.acronym), ('Renamed Kennel', 'RKH3'))
+        for hasher in self.hashers:
+            stored = HasherDataModel.get(hasher.hasher_id)
+            self.assertEqual(stored.mother_kennel.name, 'Renamed Kennel')
+            self.assertEqual(stored.searchable_mother_kennel_name, 'renamedkennel')
+        self.assertEqual(self.propagator.run_pending(), list())
+
+    def test_hasher_rename(self):
+        other = KennelLogicModel.create('Other Kennel', 'OKH3')
+        hasher = self.hashers[0]
+        other.add_member(hasher)
+        hasher.hash_name = 'New Name'
+        hasher.save()
+        self.propagator.enqueue_hasher(hasher.hasher_id)
+        (job,) = self.propagator.run_pending()
+        self.assertEqual(job.rewritten, 2)
+        for kennel_id in (self.kennel.kennel_id, other.kennel_id):
+            self.assertEqual(KennelMemberDataModel.get(kennel_id, hasher.hasher_id).hasher_ref.hash_name, 'New Name')
+        self.assertEqual(KennelMemberDataModel.get(self.kennel.kennel_id, self.hashers[1].hasher_id)
+                         .hasher_ref.hash_name, 'Hasher 1')
+
+    def test_event_rename(self):
+        start_time = datetime(2020, 5, 1, 18, 30, tzinfo=timezone.utc)
+        location = LocationReferenceModel(geohash='dr5ru7', name='Park', address1='1 Park Pl', address2='Suite 1',
+                                          city='Fakesville', state_province_region='FK', postal_code='12345',
+                                          latitude=40.7, longitude=-74.0)
+        event = EventLogicModel.create('Trail', start_time, [self.kennel], self.hashers[:2], 'The park',
+                                       description='A trail', type='basic', location=location)
+        event.persistence_object.update_changes({'name': 'Renamed Trail'})
+        self.propagator.enqueue_event(event.event_id, start_time, geohash=location.geohash)
+        (job,) = self.propagator.run_pending()
+        self.assertEqual(job.rewritten, 4)
+        for hare in self.hashers[:2]:
+            self.assertEqual(HareEventDataModel.get(hare.hasher_id, start_time).event_ref.name, 'Renamed Trail')
+        self.assertEqual(KennelEventDataModel.get(self.kennel.kennel_id, start_time).event_ref.name, 'Renamed Trail')
+        self.assertEqual(EventLocationDataModel.get(location.geohash, start_time).event_ref.name, 'Renamed Trail')
+
+    def test_resumes_from_checkpoint(self):
+        self.kennel.name = 'Renamed Kennel'
+        self.kennel.save()
+        job = self.propagator.enqueue_kennel(self.kennel.kennel_id)
+        stage = self.propagator.stages(job)[0]
+        records, cursor = next(stage.batches(None, 2))
+        for record in records:
+            self.propagator.rewrite(stage, record)
+        job.cursor = cursor
+        job.save()
+        job = self.propagator.run(PropagationJobModel.get(job.job_id))
+        self.assertEqual(job.status, PropagationJobModel.DONE)
+        self.assertEqual(job.rewritten, 4)
+        for member in KennelMemberDataModel.query(self.kennel.kennel_id):
+            self.assertEqual(member.kennel_ref.name, 'Renamed Kennel')
+
+    def test_skips_deleted_records(self):
+        self.kennel.name = 'Renamed Kennel'
+        self.kennel.save()
+        job = self.propagator.enqueue_kennel(self.kennel.kennel_id)
+        stage = self.propagator.stages(job)[0]
+        records, _ = next(stage.batches(None, 2))
+        records[0].delete()
+        self.assertFalse(self.propagator.rewrite(stage, records[0]))
+        with self.assertRaises(KennelMemberDataModel.DoesNotExist):
+            KennelMemberDataModel.get(records[0].kennel_id, records[0].hasher_id)
+
+    def test_reenqueued_job_stops_the_running_one(self):
+        job = self.propagator.enqueue_kennel(self.kennel.kennel_id)
+        self.propagator.enqueue_kennel(self.kennel.kennel_id)
+        self.assertEqual(len(self.propagator.run_pending()), 1)
+        with self.assertRaises(VersionConflict):
+            self.propagator.run(job)
+
+    def test_throttle_rate(self):
+        throttle = CapacityThrottle(1000, burst=1)
+        for _ in range(5):
+            throttle.acquire()
+        self.assertLessEqual(throttle.tokens, 1)
+        with self.assertRaises(ValueError):
+            CapacityThrottle(0)